@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Cascade ensemble vs full two-model scoring: autoencoder cost and accuracy
+
+Trains both models once on synthetic traffic, scores the held-out rows with
+the full ensemble (every row through both models) and with the cascade for
+several uncertainty bands, and reports the share of rows sent to the
+autoencoder, AE time, agreement with the full ensemble and the F1 difference.
+Exits with status 1 if the configured band loses more F1 than --tolerance.
+
+Usage:
+    python benchmarks/bench_cascade.py --rows 200000 --uppers 0.01 0.03 0.05 --tolerance 0.03 --json cascade.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from data.synthetic import SyntheticTrafficGenerator  # noqa: E402
+from main import NetworkAnomalyDetectionSystem  # noqa: E402
+
+
+def _score(system, X, method, band=None):
+    system.ensemble.method = method
+    if band is not None:
+        system.ensemble.band = band
+    system.timings["inference"] = {}
+    t0 = time.perf_counter()
+    _, _, flags = system._predict(X)
+    return flags, time.perf_counter() - t0, dict(system.timings["inference"])
+
+
+def run(config, rows, uppers, baseline):
+    system = NetworkAnomalyDetectionSystem(config)
+    data = SyntheticTrafficGenerator.from_config(system.config["data"], n_rows=rows).frame()
+    X_train, X_test, _, y_test = system.preprocess_data(data)
+    system.train_models(X_train)
+    configured = system.ensemble.band
+
+    full, full_sec, full_timings = _score(system, X_test, baseline)
+    full_f1 = system.metrics.calculate_metrics(y_test, full)["f1_score"]
+    report = {
+        "benchmark": "cascade_ensemble",
+        "rows_scored": len(X_test),
+        "baseline": {"method": baseline, "f1_score": full_f1, "total_sec": full_sec,
+                     "autoencoder_sec": full_timings["autoencoder_sec"]},
+        "cascade": [],
+    }
+    print(f"{baseline:<14} f1 {full_f1:.4f}  AE {full_timings['autoencoder_sec']:.4f}s  total {full_sec:.4f}s")
+
+    for upper in sorted(set(uppers) | {configured[1]}):
+        band = (configured[0], upper)
+        flags, seconds, timings = _score(system, X_test, "cascade", band)
+        f1 = system.metrics.calculate_metrics(y_test, flags)["f1_score"]
+        entry = {
+            "band": list(band),
+            "configured": band == configured,
+            "ae_row_fraction": timings["cascade_ae_rows"] / timings["cascade_rows"],
+            "autoencoder_sec": timings["autoencoder_sec"],
+            "total_sec": seconds,
+            "agreement": float(np.mean(flags == full)),
+            "f1_score": f1,
+            "f1_delta": f1 - full_f1,
+        }
+        report["cascade"].append(entry)
+        print(f"cascade {band}  AE rows {entry['ae_row_fraction']:6.1%}  AE {entry['autoencoder_sec']:.4f}s  "
+              f"agreement {entry['agreement']:.4f}  f1 {f1:.4f} ({entry['f1_delta']:+.4f})"
+              f"{'  <- configured' if entry['configured'] else ''}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cascade ensemble against full scoring")
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--uppers", type=float, nargs="+", default=[0.01, 0.03, 0.05, 0.1],
+                        help="Upper bounds of the uncertainty band to try (lower bound from the config)")
+    parser.add_argument("--baseline", default="majority_vote", choices=["majority_vote", "union", "intersection"])
+    parser.add_argument("--tolerance", type=float, default=0.03,
+                        help="Maximum F1 loss of the configured band against the baseline")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.config, args.rows, args.uppers, args.baseline)
+    configured = next(entry for entry in report["cascade"] if entry["configured"])
+    report["tolerance"] = args.tolerance
+    report["within_tolerance"] = -configured["f1_delta"] <= args.tolerance
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if not report["within_tolerance"]:
+        print(f"Configured band loses {-configured['f1_delta']:.4f} F1 (tolerance {args.tolerance})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
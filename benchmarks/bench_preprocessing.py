@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Peak memory (tracemalloc) and time of preprocessing: copy-free float32/float64
+paths vs the previous copy-per-step float64 implementation
+
+Usage:
+    python benchmarks/bench_preprocessing.py --rows 100000 1000000 --json prep_bench.json
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from data.encoding import CategoricalEncoder  # noqa: E402
+from data.preprocessor import NetworkDataPreprocessor  # noqa: E402
+from data.synthetic import SyntheticTrafficGenerator  # noqa: E402
+
+
+class LegacyPreprocessor(NetworkDataPreprocessor):
+    """The previous implementation: frame copy, per-step copies, float64 throughout"""
+
+    def _encode(self, df, fit):
+        obj_cols = self._categorical_columns(df)
+        if fit:
+            self.encoder = CategoricalEncoder().fit(df, obj_cols)
+        for col in obj_cols:
+            if col in self.encoder:
+                df[col] = self.encoder.transform_column(col, df[col])
+        for col in self._categorical_columns(df):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        return df.replace([np.inf, -np.inf], np.nan).fillna(0.0)
+
+    def fit_transform(self, data):
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+
+        df = data.copy()
+        self.label_col = self._detect_label_column(df)
+        y = df[self.label_col].copy()
+        df = df.drop(columns=[self.label_col])
+        df = self._encode(df, fit=True)
+        self.feature_names = df.columns.tolist()
+        X = df.values.astype(float)
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y.values, test_size=self.config.get('test_size', 0.2),
+            random_state=self.config.get('random_state', 42)
+        )
+        self.scaler = StandardScaler().fit(X_train)
+        self.mean_, self.scale_ = self.scaler.mean_, self.scaler.scale_
+        self.is_fitted = True
+        return (X_train - self.mean_) / self.scale_, (X_test - self.mean_) / self.scale_, y_train, y_test
+
+    def transform(self, data):
+        df = data.reindex(columns=self.feature_names, fill_value=0)
+        X = self._encode(df, fit=False).values.astype(float)
+        return None, (X - self.mean_) / self.scale_, None, None
+
+
+def _measure(func):
+    """(seconds, peak bytes allocated above the starting point) of func()"""
+    gc.collect()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    out = func()
+    seconds = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    del out
+    return seconds, peak
+
+
+def run(rows_list, seed=0):
+    variants = {
+        "legacy_float64": lambda: LegacyPreprocessor({}),
+        "float64": lambda: NetworkDataPreprocessor({"dtype": "float64"}, {"enabled": False}),
+        "float32": lambda: NetworkDataPreprocessor({"dtype": "float32"}, {"enabled": False}),
+    }
+    # Warm up lazy imports (scikit-learn) so they are not counted as allocations
+    warmup = SyntheticTrafficGenerator(1000, seed=seed).frame()
+    for make in variants.values():
+        make().fit_transform(warmup)
+
+    results = []
+    for n_rows in rows_list:
+        data = SyntheticTrafficGenerator(n_rows, seed=seed).frame()
+        entry = {"rows": n_rows, "input_bytes": int(data.memory_usage(deep=True).sum())}
+        for name, make in variants.items():
+            pre = make()
+            fit_sec, fit_peak = _measure(lambda: pre.fit_transform(data))
+            tr_sec, tr_peak = _measure(lambda: pre.transform(data))
+            entry[name] = {
+                "fit_transform_sec": round(fit_sec, 4),
+                "fit_transform_peak_bytes_per_row": round(fit_peak / n_rows, 1),
+                "transform_sec": round(tr_sec, 4),
+                "transform_peak_bytes_per_row": round(tr_peak / n_rows, 1),
+            }
+            print(f"{n_rows:>10} rows  {name:<15} fit_transform {fit_sec:7.3f}s {fit_peak / n_rows:7.1f} B/row  "
+                  f"transform {tr_sec:7.3f}s {tr_peak / n_rows:7.1f} B/row")
+        legacy = entry["legacy_float64"]
+        entry["float32_peak_reduction"] = {
+            stage: round(legacy[f"{stage}_peak_bytes_per_row"] / entry["float32"][f"{stage}_peak_bytes_per_row"], 2)
+            for stage in ("fit_transform", "transform")
+        }
+        results.append(entry)
+    return {"benchmark": "preprocessing_memory", "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark preprocessing peak memory with tracemalloc")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    report = run(args.rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
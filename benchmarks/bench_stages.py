@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Stage-level benchmark of the detection pipeline, with regression checks
+
+Times every stage separately (load, fit_transform, transform, IF/AE train and
+score, ensemble, evaluate, plots, report) over one or more dataset sizes and
+reports rows/sec, latency percentiles and peak RSS per stage.
+
+Usage:
+    python benchmarks/bench_stages.py run --rows 10000 100000 1000000 --json stages.json
+    python benchmarks/bench_stages.py compare baseline.json stages.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from data.synthetic import SyntheticTrafficGenerator  # noqa: E402
+from main import NetworkAnomalyDetectionSystem  # noqa: E402
+
+STAGES = (
+    "load", "fit_transform", "transform", "if_train", "if_score",
+    "ae_train", "ae_score", "ensemble", "evaluate", "plots", "report",
+)
+
+def _rss_mb():
+    """Current resident set size in MiB (Linux /proc, else the peak from getrusage)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        scale = 2**20 if sys.platform == "darwin" else 2**10
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class PeakRSS:
+    """Sample RSS on a background thread while the block runs and keep the maximum"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start_mb = self.peak_mb = 0.0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, _rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = _rss_mb()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, _rss_mb())
+
+
+def _percentiles_ms(seconds):
+    values = np.asarray(seconds) * 1000.0
+    return {f"p{q}": round(float(np.percentile(values, q)), 3) for q in (50, 95, 99)}
+
+
+def _dataset(n_rows, data_dir, seed):
+    """CSV for n_rows, generated once and reused across runs"""
+    path = Path(data_dir) / f"stages_{n_rows}_{seed}.csv"
+    if not path.exists():
+        tmp = path.with_suffix(".tmp.csv")
+        SyntheticTrafficGenerator(n_rows, seed=seed).write(str(tmp), workers=0)
+        os.replace(tmp, path)
+    return path
+
+
+def _timed(func, repeat):
+    """Run func repeat times; return (durations, peak RSS MiB, RSS growth MiB, last output)"""
+    durations, out = [], None
+    with PeakRSS() as rss:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out = func()
+            durations.append(time.perf_counter() - t0)
+    return durations, rss.peak_mb, rss.peak_mb - rss.start_mb, out
+
+
+def _batch_latencies(func, n_rows, batch_rows, max_batches):
+    """Latency of func(start, stop) over consecutive batches of batch_rows rows"""
+    latencies = []
+    for start in range(0, n_rows, batch_rows)[:max_batches]:
+        t0 = time.perf_counter()
+        func(start, min(start + batch_rows, n_rows))
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def run_size(system, n_rows, data_dir, args, workdir):
+    """Benchmark every stage on an n_rows dataset"""
+    repeat = {stage: 1 if stage in ("if_train", "ae_train") else args.repeat for stage in STAGES}
+    skip = set(args.skip or ())
+    stages = {}
+    path = _dataset(n_rows, data_dir, args.seed)
+
+    def record(stage, func, rows, batched=None):
+        if stage in skip:
+            return None
+        durations, peak, growth, out = _timed(func, repeat[stage])
+        median = float(np.median(durations))
+        entry = {
+            "rows": int(rows),
+            "repeat": len(durations),
+            "median_sec": round(median, 6),
+            "min_sec": round(float(np.min(durations)), 6),
+            "rows_per_sec": round(rows / median) if median > 0 else None,
+            "run_latency_ms": _percentiles_ms(durations),
+            "peak_rss_mb": round(peak, 1),
+            "rss_growth_mb": round(growth, 1),
+        }
+        if batched is not None:
+            lat = _batch_latencies(batched, rows, args.batch_rows, args.max_batches)
+            entry["batch_rows"] = args.batch_rows
+            entry["batch_latency_ms"] = _percentiles_ms(lat)
+        stages[stage] = entry
+        print(f"{n_rows:>10} rows  {stage:<14} {median:9.4f}s  "
+              f"{entry['rows_per_sec'] or 0:>12,} rows/s  peak RSS {peak:8.1f} MiB")
+        return out
+
+    data = record("load", lambda: system.data_loader.load_from_file(str(path)), n_rows)
+    if data is None:
+        data = system.data_loader.load_from_file(str(path))
+
+    fitted = record("fit_transform", lambda: system.preprocessor.fit_transform(data), n_rows)
+    X_train, X_test, _, y_test = fitted if fitted is not None else system.preprocessor.fit_transform(data)
+    system.preprocessor_fitted = True
+
+    record("transform", lambda: system.preprocessor.transform(data), n_rows,
+           lambda a, b: system.preprocessor.transform(data.iloc[a:b]))
+
+    X_fit = X_train[:args.max_train_rows]
+    if "if_train" in skip:
+        system.if_detector.train(X_fit)
+    record("if_train", lambda: system.if_detector.train(X_fit), len(X_fit))
+    if_results = record("if_score", lambda: system.if_detector.predict(X_test), len(X_test),
+                        lambda a, b: system.if_detector.predict(X_test[a:b]))
+    if if_results is None:
+        if_results = system.if_detector.predict(X_test)
+
+    if "ae_train" in skip:
+        system.ae_detector.train(X_fit)
+    record("ae_train", lambda: system.ae_detector.train(X_fit), len(X_fit))
+    ae_results = record("ae_score", lambda: system.ae_detector.predict(X_test), len(X_test),
+                        lambda a, b: system.ae_detector.predict(X_test[a:b]))
+    if ae_results is None:
+        ae_results = system.ae_detector.predict(X_test)
+    system.models_trained = True
+
+    if_pred, ae_pred = if_results["predictions"], ae_results["anomalies"]
+    ensemble = record("ensemble", lambda: system.ensemble.combine_predictions(if_pred, ae_pred), len(X_test),
+                      lambda a, b: system.ensemble.combine_predictions(if_pred[a:b], ae_pred[a:b]))
+    if ensemble is None:
+        ensemble = system.ensemble.combine_predictions(if_pred, ae_pred)
+
+    results = {
+        "isolation_forest": if_results,
+        "autoencoder": ae_results,
+        "ensemble": ensemble,
+        "metadata": {
+            "timestamp": datetime.now().isoformat(),
+            "total_samples": len(X_test),
+            "if_anomalies": int(np.sum(if_pred == -1)),
+            "ae_anomalies": int(np.sum(ae_pred)),
+            "ensemble_anomalies": int(np.sum(ensemble)),
+            "timings_sec": system.timings,
+        },
+    }
+    metrics = record("evaluate", lambda: system.evaluate_performance(results, y_test), len(X_test))
+    if metrics is None:
+        metrics = {}
+    record("plots", lambda: system.generate_visualizations(results, X_test, str(workdir), force=True), len(X_test))
+    record("report", lambda: system.generate_report(results, metrics, str(workdir / "detection_report.json")),
+           len(X_test))
+    return stages
+
+
+def run(args):
+    data_dir = Path(args.data_dir or tempfile.gettempdir())
+    data_dir.mkdir(parents=True, exist_ok=True)
+    sizes = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.rows:
+            # A fresh system per size, so no state leaks between sizes
+            system = NetworkAnomalyDetectionSystem(args.config)
+            system.logger.setLevel("WARNING")
+            if args.ae_epochs is not None:
+                system.ae_detector.config["epochs"] = args.ae_epochs
+            stages = run_size(system, n_rows, data_dir, args, Path(tmp))
+            sizes.append({"rows": n_rows, "stages": stages})
+
+    report = {
+        "benchmark": "pipeline_stages",
+        "created_at": datetime.now().isoformat(),
+        "host": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "settings": {
+            "config": args.config,
+            "repeat": args.repeat,
+            "max_train_rows": args.max_train_rows,
+            "ae_epochs": args.ae_epochs,
+            "batch_rows": args.batch_rows,
+            "seed": args.seed,
+        },
+        "sizes": sizes,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def compare(baseline, current, time_tolerance=0.10, rss_tolerance=0.20, min_delta_sec=0.005):
+    """
+    Compare two run() reports stage by stage
+
+    A stage regresses when its median time grows by more than time_tolerance
+    (and by at least min_delta_sec, to ignore timer noise on tiny stages) or
+    its peak RSS grows by more than rss_tolerance.
+
+    Returns:
+        list: One row per (rows, stage) present in both reports
+    """
+    base_sizes = {entry["rows"]: entry["stages"] for entry in baseline["sizes"]}
+    rows = []
+    for entry in current["sizes"]:
+        base_stages = base_sizes.get(entry["rows"])
+        if base_stages is None:
+            continue
+        for stage, cur in entry["stages"].items():
+            base = base_stages.get(stage)
+            if base is None:
+                continue
+            time_ratio = cur["median_sec"] / base["median_sec"] if base["median_sec"] > 0 else 1.0
+            rss_ratio = cur["peak_rss_mb"] / base["peak_rss_mb"] if base["peak_rss_mb"] > 0 else 1.0
+            slower = time_ratio > 1 + time_tolerance and cur["median_sec"] - base["median_sec"] > min_delta_sec
+            heavier = rss_ratio > 1 + rss_tolerance
+            rows.append({
+                "rows": entry["rows"],
+                "stage": stage,
+                "baseline_sec": base["median_sec"],
+                "current_sec": cur["median_sec"],
+                "time_ratio": round(time_ratio, 3),
+                "baseline_rss_mb": base["peak_rss_mb"],
+                "current_rss_mb": cur["peak_rss_mb"],
+                "rss_ratio": round(rss_ratio, 3),
+                "regression": [name for name, bad in (("time", slower), ("rss", heavier)) if bad],
+            })
+    return rows
+
+
+def _compare_command(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.time_tolerance, args.rss_tolerance, args.min_delta_sec)
+    for row in rows:
+        flag = "REGRESSION (" + ", ".join(row["regression"]) + ")" if row["regression"] else "ok"
+        print(f"{row['rows']:>10} rows  {row['stage']:<14} {row['baseline_sec']:9.4f}s -> {row['current_sec']:9.4f}s "
+              f"x{row['time_ratio']:<6}  RSS {row['baseline_rss_mb']:8.1f} -> {row['current_rss_mb']:8.1f} MiB  {flag}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+    regressions = [row for row in rows if row["regression"]]
+    print(f"{len(regressions)} regression(s) in {len(rows)} stage(s) compared")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages and compare against a baseline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Benchmark every stage and write a JSON report")
+    run_parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    run_parser.add_argument("--config", default="config/config.yaml")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Runs per stage (training stages run once)")
+    run_parser.add_argument("--max-train-rows", type=int, default=1_000_000,
+                            help="Cap on rows used by the training stages")
+    run_parser.add_argument("--ae-epochs", type=int, help="Override autoencoder epochs")
+    run_parser.add_argument("--batch-rows", type=int, default=1000, help="Batch size for per-batch latency")
+    run_parser.add_argument("--max-batches", type=int, default=200)
+    run_parser.add_argument("--skip", nargs="+", choices=STAGES, help="Stages not to time")
+    run_parser.add_argument("--data-dir", help="Where generated datasets are cached (default: temp dir)")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--json", help="Write results to this JSON file")
+
+    cmp_parser = sub.add_parser("compare", help="Flag stages that regressed against a baseline report")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("current")
+    cmp_parser.add_argument("--time-tolerance", type=float, default=0.10)
+    cmp_parser.add_argument("--rss-tolerance", type=float, default=0.20)
+    cmp_parser.add_argument("--min-delta-sec", type=float, default=0.005)
+    cmp_parser.add_argument("--json", help="Write the comparison to this JSON file")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(_compare_command(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,117 @@
 import { useEffect, useRef, useState } from 'react'
 import { Link, useNavigate } from 'react-router-dom'
 
+const SUPPORTED_EXT = ['.csv', '.json', '.jsonl', '.ndjson', '.parquet', '.feather', '.arrow']
+const MAX_LOG_LINES = 300
+
 export default function Upload() {
   const [file, setFile] = useState<File | null>(null)
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState<string | null>(null)
   const [result, setResult] = useState<any>(null)
+  const [job, setJob] = useState<any>(null)
   const [logs, setLogs] = useState<string[]>([])
   const [logError, setLogError] = useState<string | null>(null)
   const navigate = useNavigate()
   const pollRef = useRef<number | null>(null)
+  const streamRef = useRef<EventSource | null>(null)
+  // Byte offset in the log file up to which lines have been shown
+  const cursorRef = useRef<number | null>(null)
 
   const onSubmit = async (e: React.FormEvent) => {
     e.preventDefault()
     setError(null)
     setResult(null)
     if (!file) {
-      setError('Please choose a CSV file')
+      setError('Please choose a data file')
       return
     }
-    const isCsv = file && (file.name.toLowerCase().endsWith('.csv') || file.type === 'text/csv')
-    if (!isCsv) {
-      setError('Only .csv files are accepted')
+    const name = file.name.toLowerCase().replace(/\.(gz|bz2|xz|zst|zip)$/, '')
+    const isSupported = SUPPORTED_EXT.some((ext) => name.endsWith(ext)) || file.type === 'text/csv'
+    if (!isSupported) {
+      setError(`Supported files: ${SUPPORTED_EXT.join(', ')} (text formats may be compressed)`)
       return
     }
     const form = new FormData()
     form.append('file', file)
     setLoading(true)
-    startLogPolling()
+    setJob(null)
+    startLogStream()
     try {
       const res = await fetch('/api/upload', { method: 'POST', body: form })
-      const ct = res.headers.get('content-type') || ''
-      let data: any = null
-      if (ct.includes('application/json')) {
-        data = await res.json()
-        if (!res.ok) throw new Error(data?.error || `Upload failed (${res.status})`)
-        setResult(data)
-        // Redirect to dashboard after brief delay so user sees success briefly
-        setTimeout(() => navigate('/dashboard'), 600)
-      } else {
-        // Likely an HTML error page (e.g., Vite index.html when backend is down)
-        const text = await res.text()
-        const snippet = text.slice(0, 200).replace(/\s+/g, ' ')
-        throw new Error(`Unexpected non-JSON response (${res.status}). Is the backend running at 127.0.0.1:5000? Details: ${snippet}`)
-      }
+      const data = await readJson(res)
+      if (!res.ok) throw new Error(data?.error || `Upload failed (${res.status})`)
+      const finished = await pollJob(data.status_url || `/api/jobs/${data.job_id}`)
+      if (finished.status !== 'succeeded') throw new Error(finished.error || 'Pipeline failed')
+      setResult(finished.result)
+      // Redirect to dashboard after brief delay so user sees success briefly
+      setTimeout(() => navigate('/dashboard'), 600)
     } catch (err: any) {
       setError(err.message || 'Upload failed')
     } finally {
       setLoading(false)
-      stopLogPolling()
+      stopLogStream()
+    }
+  }
+
+  const readJson = async (res: Response) => {
+    const ct = res.headers.get('content-type') || ''
+    if (ct.includes('application/json')) return res.json()
+    // Likely an HTML error page (e.g., Vite index.html when backend is down)
+    const text = await res.text()
+    const snippet = text.slice(0, 200).replace(/\s+/g, ' ')
+    throw new Error(`Unexpected non-JSON response (${res.status}). Is the backend running at 127.0.0.1:5000? Details: ${snippet}`)
+  }
+
+  // Poll the background job's small status object until it finishes
+  const pollJob = async (url: string): Promise<any> => {
+    for (;;) {
+      const res = await fetch(url)
+      const data = await readJson(res)
+      if (!res.ok) throw new Error(data?.error || `Job status failed (${res.status})`)
+      setJob(data)
+      if (data.status === 'succeeded' || data.status === 'failed') return data
+      await new Promise((resolve) => setTimeout(resolve, 1500))
     }
   }
 
+  const appendLogs = (lines: string[], reset: boolean) => {
+    setLogs((prev) => (reset ? lines : [...prev, ...lines]).slice(-MAX_LOG_LINES))
+  }
+
+  // Last lines of the log (only the tail of the file is read on the server)
   const fetchLogs = async () => {
     try {
       setLogError(null)
-      const r = await fetch('/api/logs?tail=300')
+      const r = await fetch(`/api/logs?tail=${MAX_LOG_LINES}`)
       if (!r.ok) throw new Error('Failed to fetch logs')
       const data = await r.json()
       if (Array.isArray(data.lines)) setLogs(data.lines)
+      if (typeof data.cursor === 'number') cursorRef.current = data.cursor
+    } catch (e: any) {
+      setLogError(e.message)
+    }
+  }
+
+  // Only the lines appended since the last cursor
+  const fetchNewLogs = async () => {
+    if (cursorRef.current === null) return fetchLogs()
+    try {
+      const r = await fetch(`/api/logs?cursor=${cursorRef.current}`)
+      if (!r.ok) throw new Error('Failed to fetch logs')
+      const data = await r.json()
+      if (Array.isArray(data.lines)) appendLogs(data.lines, Boolean(data.reset))
+      if (typeof data.cursor === 'number') cursorRef.current = data.cursor
     } catch (e: any) {
       setLogError(e.message)
     }
   }
 
+  // Fallback when Server-Sent Events are unavailable or the server refuses another stream
   const startLogPolling = () => {
     stopLogPolling()
-    // Fetch immediately and then poll
-    fetchLogs()
-    pollRef.current = window.setInterval(fetchLogs, 1500)
+    fetchNewLogs()
+    pollRef.current = window.setInterval(fetchNewLogs, 1500)
   }
 
   const stopLogPolling = () => {
@@ -78,19 +121,49 @@ export default function Upload() {
     }
   }
 
+  // The server pushes new log lines as they are written
+  const startLogStream = () => {
+    stopLogStream()
+    setLogError(null)
+    if (typeof EventSource === 'undefined') {
+      startLogPolling()
+      return
+    }
+    const source = new EventSource(`/api/logs/stream?tail=${MAX_LOG_LINES}`)
+    source.onmessage = (e) => {
+      const data = JSON.parse(e.data)
+      appendLogs(data.lines || [], Boolean(data.reset))
+      cursorRef.current = Number(e.lastEventId)
+    }
+    source.onerror = () => {
+      // EventSource reconnects on its own (resuming from the last event id) unless the stream was refused
+      if (source.readyState === EventSource.CLOSED) {
+        streamRef.current = null
+        startLogPolling()
+      }
+    }
+    streamRef.current = source
+  }
+
+  const stopLogStream = () => {
+    streamRef.current?.close()
+    streamRef.current = null
+    stopLogPolling()
+  }
+
   useEffect(() => {
-    return () => stopLogPolling()
+    return () => stopLogStream()
   }, [])
 
   return (
     <div className="mx-auto max-w-3xl p-6 text-slate-900 dark:text-slate-100">
       <h1 className="mb-2 text-2xl font-bold tracking-tight">Upload Dataset</h1>
-      <p className="mb-4 text-sm text-gray-600 dark:text-slate-400">Upload a CSV with the expected columns. After processing, view results on the Dashboard.</p>
+      <p className="mb-4 text-sm text-gray-600 dark:text-slate-400">Upload a CSV, JSON Lines, Parquet or Feather file with the expected columns. After processing, view results on the Dashboard.</p>
 
       <form onSubmit={onSubmit} className="rounded-lg border bg-white p-4 shadow-sm dark:border-slate-800 dark:bg-slate-900">
         <input
           type="file"
-          accept=".csv,text/csv"
+          accept={[...SUPPORTED_EXT, '.gz', '.bz2', '.xz', '.zst', '.zip', 'text/csv'].join(',')}
           onChange={(e) => setFile(e.target.files?.[0] || null)}
           className="mb-3 block w-full text-sm"
         />
@@ -105,6 +178,17 @@ export default function Upload() {
           <Link to="/dashboard" className="text-indigo-700 underline dark:text-indigo-400">Go to Dashboard</Link>
         </div>
         {error && <p className="mt-3 text-sm text-red-600">{error}</p>}
+        {loading && job && (
+          <div className="mt-3">
+            <div className="mb-1 flex justify-between text-xs text-gray-600 dark:text-slate-400">
+              <span>{job.status}{job.stage ? ` · ${job.stage}` : ''}</span>
+              <span>{Math.round((job.progress || 0) * 100)}%</span>
+            </div>
+            <div className="h-2 w-full rounded bg-gray-200 dark:bg-slate-800">
+              <div className="h-2 rounded bg-indigo-600 transition-all" style={{ width: `${Math.round((job.progress || 0) * 100)}%` }} />
+            </div>
+          </div>
+        )}
       </form>
 
       {result && (
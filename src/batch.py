@@ -0,0 +1,307 @@
+# =============================================================================
+# FILE: src/batch.py
+# =============================================================================
+
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from data.data_loader import file_format
+from models.bundle import MANIFEST_FILE, is_bundle
+from models.quantile_sketch import QuantileSketch
+from utils.metrics import StreamingMetrics
+
+SUMMARY_FILE = 'summary.json'
+METRICS_FILE = 'metrics.npz'
+SKETCH_FILE = 'sketches.npz'
+REPORT_FILE = 'batch_report.json'
+COUNTERS = ('total_samples', 'if_anomalies', 'ae_anomalies', 'ensemble_anomalies')
+
+# Detection system of a worker process, with the models loaded once, and their identity
+_SYSTEM = None
+_MODELS = None
+
+def _write_json(path: Path, payload: dict):
+    """Write JSON via a temporary file, so a crash never leaves a truncated file behind"""
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(tmp, path)
+
+def _source_info(path: str) -> dict:
+    stat = os.stat(path)
+    return {'path': str(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def _model_identity(model_dir: str) -> dict:
+    """Which models a file was scored with: the bundle's config hash and creation time (legacy: file mtimes)"""
+    if is_bundle(model_dir):
+        with open(Path(model_dir) / MANIFEST_FILE) as f:
+            manifest = json.load(f)
+        return {'config_hash': manifest.get('config_hash'), 'created_at': manifest.get('created_at')}
+    return {'files': {p.name: p.stat().st_mtime_ns for p in sorted(Path(model_dir).iterdir()) if p.is_file()}}
+
+def _sketch_arrays(sketches: Dict[str, QuantileSketch]) -> dict:
+    """Score sketches as flat arrays for np.savez"""
+    arrays = {}
+    for name, sketch in sketches.items():
+        for key, value in sketch.arrays().items():
+            arrays[f'{name}_{key}'] = value
+        arrays[f'{name}_params'] = np.array([sketch.k, sketch.n], dtype=np.int64)
+    return arrays
+
+def _load_sketches(path: Path) -> Dict[str, QuantileSketch]:
+    """Sketches saved by _sketch_arrays"""
+    with np.load(path) as arrays:
+        names = [key[:-len('_params')] for key in arrays.files if key.endswith('_params')]
+        return {
+            name: QuantileSketch.from_arrays(
+                {'items': arrays[f'{name}_items'], 'level_sizes': arrays[f'{name}_level_sizes']},
+                dict(zip(('k', 'n'), arrays[f'{name}_params'].tolist()))
+            )
+            for name in names
+        }
+
+def _init_worker(config_path: str, model_dir: str, n_threads: int):
+    global _SYSTEM, _MODELS
+    from main import NetworkAnomalyDetectionSystem
+    from models.parallel import ModelExecutor
+
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=n_threads, user_api='blas')
+    except ImportError:
+        pass
+    _SYSTEM = NetworkAnomalyDetectionSystem(config_path)
+    # Files are the unit of parallelism: within a file the models run one after the other
+    _SYSTEM.executor = ModelExecutor({'executor': 'serial'})
+    # Read before loading: if the models are replaced in between, resume scores the files again
+    _MODELS = _model_identity(model_dir)
+    _SYSTEM.load_models(model_dir)
+
+def _score_file(path: str, output_dir: str, chunk_size: Optional[int]) -> dict:
+    """Worker process body: score one file in chunks into output_dir and return its summary"""
+    from models.bundle import BundleSchemaError
+
+    # The same schema check as single-file detection: every model feature must be present
+    missing = sorted(set(_SYSTEM.preprocessor.feature_names) - set(_SYSTEM.data_loader.peek_columns(path)))
+    if missing:
+        raise BundleSchemaError(f"Input is missing model features: {missing}")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    source = _source_info(path)
+    evaluation = StreamingMetrics(_SYSTEM.config.get('metrics'))
+    # Score distributions, merged across files (and so across workers) into the batch's thresholds;
+    # a cascade only runs the autoencoder on some rows, so their errors are not representative
+    sketches = {'isolation_forest': QuantileSketch()}
+    if not _SYSTEM.ensemble.is_cascade:
+        sketches['autoencoder'] = QuantileSketch()
+    # Drift is reported per file, not over every file this worker has scored
+    drift = getattr(_SYSTEM.preprocessor, 'drift', None)
+    if drift is not None:
+        drift.reset()
+    t0 = time.perf_counter()
+    summary = _SYSTEM.detect_anomalies_chunked(
+        path, str(output_dir / 'detection_results'), chunk_size, evaluation=evaluation, sketches=sketches
+    )
+    summary.update({'source': source, 'models': _MODELS, 'elapsed_sec': time.perf_counter() - t0, 'worker_pid': os.getpid()})
+    if 'metrics' in summary:
+        np.savez(output_dir / METRICS_FILE, **evaluation.arrays())
+    np.savez(output_dir / SKETCH_FILE, **_sketch_arrays(sketches))
+    # Written last: a summary matching the source file marks the file as done
+    _write_json(output_dir / SUMMARY_FILE, summary)
+    return summary
+
+def discover_files(inputs: str) -> List[str]:
+    """Data files in a directory, or matching a glob pattern, in a supported format (sorted)"""
+    path = Path(inputs)
+    if path.is_dir():
+        candidates = [str(p) for p in path.iterdir() if p.is_file()]
+    else:
+        candidates = glob.glob(inputs, recursive=True)
+    files = []
+    for name in sorted(candidates):
+        try:
+            file_format(name)
+        except ValueError:
+            continue
+        files.append(name)
+    return files
+
+def _input_root(inputs: str) -> str:
+    """The directory, or the part of a glob pattern before its first wildcard component"""
+    if os.path.isdir(inputs):
+        return inputs
+    parts = []
+    for part in Path(inputs).parts:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.path.join(*parts) if parts else '.'
+
+def _output_names(files: List[str], root: str) -> Dict[str, str]:
+    """
+    Output directory name per file: its path relative to the input root
+
+    Names do not depend on which other files matched, so files added to the
+    directory later never change the names (and resume state) of the others.
+    """
+    root = os.path.abspath(root)
+    return {f: os.path.relpath(os.path.abspath(f), root).replace(os.sep, '__') for f in files}
+
+class BatchDetector:
+    """
+    Score many capture files with saved models across a process pool
+
+    Files are sharded across spawn worker processes, each of which loads
+    the models once (bundles are memory-mapped, so workers share the model
+    pages) and scores its files in chunks. Every file gets its own output
+    directory with a result store and a summary.json, written last; on a
+    restart, files whose summary matches the source's size and mtime and
+    the models' identity are not scored again. run() merges all per-file summaries (and, for
+    labelled files, their streamed metrics) into one report. Each file's IF
+    score and AE error sketches are merged too, giving the thresholds the
+    batch's traffic alone would calibrate to at ``quantiles``.
+    """
+
+    def __init__(self, config_path: str, model_dir: str, batch_config: Optional[dict] = None,
+                 workers: Optional[int] = None, chunk_size: Optional[int] = None, metrics_config: Optional[dict] = None,
+                 quantiles: Optional[Dict[str, float]] = None):
+        batch_config = batch_config or {}
+        self.config_path = config_path
+        self.model_dir = model_dir
+        self.workers = workers or batch_config.get('workers') or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.metrics_config = metrics_config
+        # Model name -> quantile of its merged score sketch reported as the batch's threshold
+        self.quantiles = quantiles or {}
+
+    @staticmethod
+    def _completed(output_dir: Path, path: str, models: dict) -> Optional[dict]:
+        """Summary of an earlier run on this exact file with these exact models, if any"""
+        try:
+            with open(output_dir / SUMMARY_FILE) as f:
+                summary = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        source = _source_info(path)
+        recorded = summary.get('source', {})
+        if recorded.get('size') != source['size'] or recorded.get('mtime_ns') != source['mtime_ns']:
+            return None
+        if summary.get('models') != models:
+            return None
+        return summary
+
+    def run(self, inputs: str, output_dir: str, resume: bool = True,
+            progress: Optional[Callable[[int, int, str, dict], None]] = None) -> dict:
+        """
+        Score every file matched by inputs
+
+        Args:
+            inputs (str): Directory or glob pattern of data files
+            output_dir (str): Receives files/<name>/ per input file and batch_report.json
+            resume (bool): Skip files already scored by an earlier run
+            progress: Called as progress(done, total, file, entry) after each file
+                scored (done includes files resumed from an earlier run)
+
+        Returns:
+            dict: The aggregated report (also written to batch_report.json)
+        """
+        files = discover_files(inputs)
+        if not files:
+            raise FileNotFoundError(f"No data files match {inputs}")
+        output_dir = Path(output_dir)
+        outputs = {f: output_dir / 'files' / name for f, name in _output_names(files, _input_root(inputs)).items()}
+
+        models = _model_identity(self.model_dir)
+        entries, summaries, pending = {}, {}, []
+        for f in files:
+            summary = self._completed(outputs[f], f, models) if resume else None
+            if summary is None:
+                pending.append(f)
+            else:
+                summaries[f] = summary
+                entries[f] = {'status': 'resumed'}
+        done = len(summaries)
+
+        t0 = time.perf_counter()
+        workers = max(1, min(self.workers, len(pending)))
+        if pending:
+            n_threads = max(1, (os.cpu_count() or 1) // workers)
+            # spawn: workers start clean rather than inheriting TensorFlow / OpenMP thread state
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'), initializer=_init_worker,
+                                     initargs=(self.config_path, self.model_dir, n_threads)) as pool:
+                futures = {pool.submit(_score_file, f, str(outputs[f]), self.chunk_size): f for f in pending}
+                for future in as_completed(futures):
+                    f = futures[future]
+                    try:
+                        summaries[f] = future.result()
+                        entries[f] = {'status': 'scored'}
+                    except Exception as e:
+                        # One bad capture must not stop the batch; it is retried on the next run
+                        entries[f] = {'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+                    done += 1
+                    if progress:
+                        progress(done, len(files), f, entries[f])
+
+        report = self._aggregate(inputs, files, outputs, summaries, entries)
+        report.update({'workers': workers if pending else 0, 'elapsed_sec': time.perf_counter() - t0})
+        output_dir.mkdir(parents=True, exist_ok=True)
+        _write_json(output_dir / REPORT_FILE, report)
+        return report
+
+    def _aggregate(self, inputs, files, outputs, summaries, entries) -> dict:
+        totals = {counter: 0 for counter in COUNTERS}
+        evaluation = None
+        sketches = {}
+        per_file = []
+        for f in files:
+            entry = {'file': f, 'output': str(outputs[f]), **entries[f]}
+            summary = summaries.get(f)
+            if summary is not None:
+                for counter in COUNTERS:
+                    totals[counter] += summary[counter]
+                entry.update({
+                    'rows': summary['total_samples'],
+                    'ensemble_anomalies': summary['ensemble_anomalies'],
+                    'elapsed_sec': summary.get('elapsed_sec')
+                })
+                metrics_path = outputs[f] / METRICS_FILE
+                if 'metrics' in summary and metrics_path.exists():
+                    with np.load(metrics_path) as arrays:
+                        file_metrics = StreamingMetrics.from_arrays(arrays, self.metrics_config)
+                    evaluation = file_metrics if evaluation is None else evaluation.merge(file_metrics)
+                sketch_path = outputs[f] / SKETCH_FILE
+                if sketch_path.exists():
+                    for name, sketch in _load_sketches(sketch_path).items():
+                        sketches[name] = sketch if name not in sketches else sketches[name].merge(sketch)
+            per_file.append(entry)
+
+        statuses = [entry['status'] for entry in per_file]
+        report = {
+            'timestamp': datetime.now().isoformat(),
+            'inputs': inputs,
+            'files': {status: statuses.count(status) for status in ('scored', 'resumed', 'failed')},
+            **totals,
+            'anomaly_rate': totals['ensemble_anomalies'] / totals['total_samples'] if totals['total_samples'] else 0.0,
+            'per_file': per_file,
+        }
+        report['files']['total'] = len(files)
+        if evaluation is not None:
+            report['metrics'] = evaluation.result()
+        thresholds = {}
+        for name, key in (('isolation_forest', 'offset'), ('autoencoder', 'threshold')):
+            sketch = sketches.get(name)
+            if sketch is not None and sketch.n and name in self.quantiles:
+                q = self.quantiles[name]
+                thresholds[name] = {'rows': sketch.n, 'quantile': q, key: sketch.quantile(q)}
+        if thresholds:
+            report['thresholds'] = thresholds
+        return report
@@ -2,53 +2,250 @@
 # FILE: src/data/data_loader.py
 # =============================================================================
 
+import os
+
 import pandas as pd
 import numpy as np
 
+from .preprocessor import LABEL_CANDIDATES
+from .synthetic import SyntheticTrafficGenerator
+
+COMPRESSION_SUFFIXES = ('.gz', '.bz2', '.xz', '.zst', '.zip')
+TEXT_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'json'}
+COLUMNAR_FORMATS = {'.parquet': 'parquet', '.pq': 'parquet', '.feather': 'arrow', '.arrow': 'arrow', '.ipc': 'arrow'}
+
+def file_format(filepath):
+    """
+    Format of a data file from its name: 'csv', 'jsonl', 'json' (optionally
+    compressed, e.g. .csv.gz), 'parquet' or 'arrow' (Feather / Arrow IPC file)
+    """
+    name = str(filepath).lower()
+    compressed = name.endswith(COMPRESSION_SUFFIXES)
+    if compressed:
+        name = name[:name.rindex('.')]
+    ext = os.path.splitext(name)[1]
+    if ext in TEXT_FORMATS:
+        return TEXT_FORMATS[ext]
+    if ext in COLUMNAR_FORMATS and not compressed:
+        return COLUMNAR_FORMATS[ext]
+    raise ValueError(f"Unsupported file format: {filepath}")
+
 class NetworkDataLoader:
     """Load network traffic data"""
     
     def __init__(self, config):
         self.config = config
         
-    def generate_sample_data(self):
-        """Generate sample network traffic data"""
-        np.random.seed(self.config.get('random_state', 42))
-        n_samples = self.config.get('sample_size', 10000)
-        
-        # Normal traffic patterns
-        data = {
-            'duration': np.random.exponential(2, n_samples),
-            'src_bytes': np.random.lognormal(8, 1.5, n_samples),
-            'dst_bytes': np.random.lognormal(6, 1.2, n_samples),
-            'count': np.random.poisson(10, n_samples),
-            'srv_count': np.random.poisson(5, n_samples),
-            'protocol': np.random.choice(['tcp', 'udp', 'icmp'], n_samples, p=[0.7, 0.2, 0.1]),
-            'service': np.random.choice(['http', 'ftp', 'telnet', 'smtp', 'dns'], n_samples),
-            'flag': np.random.choice(['SF', 'S0', 'REJ', 'RSTR'], n_samples, p=[0.6, 0.2, 0.1, 0.1]),
-            # Ground-truth label: 0 = normal, 1 = anomaly
-            'label': np.zeros(n_samples, dtype=int)
-        }
-        
-        # Add anomalies (10% of data)
-        n_anomalies = int(n_samples * 0.1)
-        anomaly_indices = np.random.choice(n_samples, n_anomalies, replace=False)
-        
-        for idx in anomaly_indices:
-            if np.random.random() > 0.5:
-                data['src_bytes'][idx] *= 100  # Large data transfer
-            else:
-                data['count'][idx] *= 50  # High connection count
-            data['label'][idx] = 1
+    def generate_sample_data(self, n_samples=None):
+        """
+        Generate sample network traffic data
+        
+        See SyntheticTrafficGenerator: seeded per chunk from config
+        'random_state' (the global NumPy random state is left alone), with
+        anomaly rate and types from the config 'synthetic' section.
         
-        return pd.DataFrame(data)
+        Args:
+            n_samples (int): Rows to generate (default: config 'sample_size')
+        """
+        return SyntheticTrafficGenerator.from_config(self.config, n_samples).frame()
     
     def load_from_file(self, filepath):
-        """Load data from file"""
-        if filepath.endswith('.csv'):
-            return pd.read_csv(filepath)
-        elif filepath.endswith('.json'):
-            return pd.read_json(filepath)
+        """
+        Load data from file
+        
+        Supports CSV and JSON / JSON Lines (plain or compressed), Parquet and
+        Feather / Arrow IPC. Only the configured 'features' plus a label column
+        are read (all columns if none of the features is present), and unless
+        'downcast' is disabled, float columns are read as float32 and text
+        columns as pandas categoricals.
+        """
+        fmt = file_format(filepath)
+        if fmt == 'csv':
+            return self._read_csv(filepath, self._projection(self.peek_columns(filepath)))
+        if fmt in ('parquet', 'arrow'):
+            columns = self._projection(self.peek_columns(filepath))
+            read = pd.read_parquet if fmt == 'parquet' else pd.read_feather
+            return self._downcast(read(filepath, columns=columns))
+        
+        lines = fmt == 'jsonl' or not self._is_json_array(filepath)
+        data = pd.read_json(filepath, lines=lines)
+        columns = self._projection(data.columns)
+        if columns is not None:
+            data = data[columns]
+        return self._downcast(data)
+    
+    def iter_chunks(self, filepath, chunk_size=None):
+        """
+        Stream a data file as fixed-size DataFrame chunks
+        
+        Column dtypes are fixed from the first chunk (numeric columns as
+        float64, everything else as str) so every chunk has the same schema
+        regardless of its contents. Columns are projected as in load_from_file.
+        A plain JSON array cannot be streamed and is loaded in full, then sliced.
+        
+        Args:
+            filepath (str): Path to a CSV, JSON Lines, JSON, Parquet or Feather/Arrow file
+            chunk_size (int): Rows per chunk (default: config 'chunk_size')
+            
+        Yields:
+            pd.DataFrame: Consecutive chunks of at most chunk_size rows
+        """
+        chunk_size = int(chunk_size or self.config.get('chunk_size', 100000))
+        fmt = file_format(filepath)
+        
+        if fmt == 'csv':
+            columns = self._projection(self.peek_columns(filepath))
+            reader = pd.read_csv(filepath, chunksize=chunk_size, usecols=columns,
+                                 dtype=self._csv_dtypes(filepath, columns=columns))
+        elif fmt == 'parquet':
+            import pyarrow.parquet as pq
+            batches = pq.ParquetFile(filepath).iter_batches(
+                batch_size=chunk_size, columns=self._projection(self.peek_columns(filepath))
+            )
+            reader = (batch.to_pandas() for batch in batches)
+        elif fmt == 'arrow':
+            import pyarrow as pa
+            columns = self._projection(self.peek_columns(filepath))
+            # Memory-mapped, so slicing the table reads only the rows of each chunk
+            table = pa.ipc.open_file(pa.memory_map(filepath)).read_all()
+            if columns is not None:
+                table = table.select(columns)
+            reader = (table.slice(i, chunk_size).to_pandas() for i in range(0, table.num_rows, chunk_size))
+        elif fmt == 'jsonl' or not self._is_json_array(filepath):
+            reader = pd.read_json(filepath, lines=True, chunksize=chunk_size)
         else:
-            raise ValueError(f"Unsupported file format: {filepath}")
-
+            data = pd.read_json(filepath)
+            reader = (data.iloc[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+        
+        schema = None
+        for chunk in reader:
+            if schema is None:
+                schema = self._stream_schema(chunk)
+                # JSON cannot be projected while parsing
+                columns = self._projection(chunk.columns) if fmt in ('jsonl', 'json') else None
+            if columns is not None:
+                chunk = chunk[columns].copy()
+            yield self._stabilize_dtypes(chunk, schema)
+    
+    def peek_columns(self, filepath):
+        """Column names of a data file, reading as little of it as possible"""
+        fmt = file_format(filepath)
+        if fmt == 'csv':
+            return list(pd.read_csv(filepath, nrows=0).columns)
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            return list(pq.read_schema(filepath).names)
+        if fmt == 'arrow':
+            import pyarrow as pa
+            with pa.memory_map(filepath) as source:
+                return list(pa.ipc.open_file(source).schema.names)
+        for chunk in self.iter_chunks(filepath, chunk_size=1):
+            return list(chunk.columns)
+        return []
+    
+    def _projection(self, columns):
+        """
+        Columns to read: the configured features plus any label column, in file
+        order. None (read everything) if projection is disabled or no feature matches.
+        """
+        features = self.config.get('features') or []
+        if not self.config.get('project_features', True) or not any(c in features for c in columns):
+            return None
+        keep = set(features) | set(LABEL_CANDIDATES)
+        return [c for c in columns if c in keep]
+    
+    def _read_csv(self, filepath, columns):
+        """Read a (possibly compressed) CSV, downcasting dtypes while parsing"""
+        if not self.config.get('downcast', True):
+            return pd.read_csv(filepath, usecols=columns)
+        sample = pd.read_csv(filepath, usecols=columns, nrows=1000)
+        dtypes = {}
+        for col in sample.columns:
+            if col in LABEL_CANDIDATES:
+                continue
+            if sample[col].dtype == np.float64:
+                dtypes[col] = np.float32
+            elif not pd.api.types.is_numeric_dtype(sample[col]):
+                dtypes[col] = 'category'
+        try:
+            data = pd.read_csv(filepath, usecols=columns, dtype=dtypes, engine=self._csv_engine())
+        except ValueError:
+            # A column the sample suggested was numeric is not; parse without hints
+            data = pd.read_csv(filepath, usecols=columns)
+        return self._downcast(data)
+    
+    @staticmethod
+    def _csv_engine():
+        """pyarrow's multithreaded CSV parser when installed, else pandas' C parser"""
+        try:
+            import pyarrow  # noqa: F401
+            return 'pyarrow'
+        except ImportError:
+            return 'c'
+    
+    def _downcast(self, data):
+        """Shrink dtypes in place: float64 -> float32, int64 -> smallest int, text -> category"""
+        if not self.config.get('downcast', True):
+            return data
+        for col in data.columns:
+            if col in LABEL_CANDIDATES:
+                # Labels keep their values (and dtype) for evaluation
+                continue
+            dtype = data[col].dtype
+            if dtype == np.float64:
+                data[col] = data[col].astype(np.float32)
+            elif pd.api.types.is_integer_dtype(dtype):
+                data[col] = pd.to_numeric(data[col], downcast='integer')
+            elif dtype == object or pd.api.types.is_string_dtype(dtype):
+                data[col] = data[col].astype('category')
+        return data
+    
+    @staticmethod
+    def _is_json_array(filepath):
+        """True if the JSON file holds a single top-level array rather than JSON Lines"""
+        from pandas.io.common import get_handle
+        
+        # Same decompression as pd.read_json (every suffix file_format accepts, e.g. .zip and .zst)
+        with get_handle(filepath, 'r', compression='infer') as handles:
+            f = handles.handle
+            while True:
+                ch = f.read(1)
+                if not ch or not ch.isspace():
+                    return ch == '['
+    
+    @staticmethod
+    def _csv_dtypes(filepath, sample_rows=1000, columns=None):
+        """Infer per-column read dtypes from the head of a CSV file"""
+        sample = pd.read_csv(filepath, nrows=sample_rows, usecols=columns)
+        return {c: str for c in sample.columns if not pd.api.types.is_numeric_dtype(sample[c])}
+    
+    def _stream_schema(self, chunk):
+        """
+        Column -> dtype for every chunk of a stream: numeric columns float64 (float32
+        for float columns when downcasting, as load_from_file reads them), the rest str
+        """
+        downcast = self.config.get('downcast', True)
+        schema = {}
+        for col in chunk.columns:
+            dtype = chunk[col].dtype
+            if not pd.api.types.is_numeric_dtype(dtype):
+                schema[col] = object
+            elif downcast and pd.api.types.is_float_dtype(dtype) and col not in LABEL_CANDIDATES:
+                schema[col] = np.float32
+            else:
+                schema[col] = np.float64
+        return schema
+    
+    @staticmethod
+    def _stabilize_dtypes(chunk, schema):
+        """Cast a chunk to the stream schema (see _stream_schema)"""
+        for col in chunk.columns:
+            dtype = schema.get(col, object)
+            if dtype is object:
+                if chunk[col].dtype != object:
+                    # Missing values stay NaN (astype(str) would turn them into 'nan')
+                    values = chunk[col]
+                    chunk[col] = values.astype(str).where(values.notna(), np.nan)
+            elif chunk[col].dtype != dtype:
+                chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(dtype)
+        return chunk
@@ -0,0 +1,154 @@
+# =============================================================================
+# FILE: src/data/drift.py
+# =============================================================================
+
+import threading
+
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+class DriftMonitor:
+    """
+    Per-feature drift monitor based on fixed-bin histograms
+
+    ``fit`` captures a reference histogram per feature, with bin edges at the
+    training data's quantiles (so each reference bin holds roughly the same
+    share of rows). ``update`` adds batches to live histograms over the same
+    bins, which costs one searchsorted per feature and keeps memory constant
+    no matter how many rows are observed. Drift is scored per feature with
+    the Population Stability Index and a binned Kolmogorov-Smirnov distance
+    (the largest gap between the two cumulative histograms).
+
+    The live histograms are guarded by a lock, so one monitor can be fed by
+    concurrent callers (e.g. API request threads sharing a preprocessor).
+    """
+
+    # Probability floor for empty bins, which keeps PSI finite
+    EPSILON = 1e-4
+
+    def __init__(self, n_bins: int = 10, psi_threshold: float = 0.2, ks_threshold: float = 0.1,
+                 min_samples: int = 1000):
+        self.n_bins = int(n_bins)
+        self.psi_threshold = float(psi_threshold)
+        self.ks_threshold = float(ks_threshold)
+        self.min_samples = int(min_samples)
+        self.feature_names: List[str] = []
+        self.edges: Optional[np.ndarray] = None
+        self.reference: Optional[np.ndarray] = None
+        self.live: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> 'DriftMonitor':
+        config = config or {}
+        return cls(
+            n_bins=config.get('n_bins', 10),
+            psi_threshold=config.get('psi_threshold', 0.2),
+            ks_threshold=config.get('ks_threshold', 0.1),
+            min_samples=config.get('min_samples', 1000)
+        )
+
+    def _histogram(self, X: np.ndarray) -> np.ndarray:
+        """Bin counts, shape (n_features, n_bins); inner edges are right-closed like np.digitize"""
+        counts = np.empty((X.shape[1], self.n_bins), dtype=np.int64)
+        for j in range(X.shape[1]):
+            bins = np.searchsorted(self.edges[j], X[:, j], side='right')
+            counts[j] = np.bincount(bins, minlength=self.n_bins)
+        return counts
+
+    def fit(self, X: np.ndarray, feature_names: List[str]) -> 'DriftMonitor':
+        """Capture reference histograms from the (training) feature matrix"""
+        quantiles = np.linspace(0.0, 1.0, self.n_bins + 1)[1:-1]
+        # Repeated edges (e.g. low-cardinality codes) just leave some bins empty
+        self.edges = np.ascontiguousarray(np.quantile(X, quantiles, axis=0).T)
+        self.feature_names = list(feature_names)
+        self.reference = self._histogram(X)
+        self.reset()
+        return self
+
+    def reset(self):
+        """Forget the live histograms (e.g. after retraining, or to monitor each input separately)"""
+        with self._lock:
+            self.live = np.zeros_like(self.reference)
+
+    def update(self, X: np.ndarray):
+        """Add a batch of transformed rows to the live histograms"""
+        if self.reference is None or len(X) == 0:
+            return
+        counts = self._histogram(X)
+        with self._lock:
+            self.live += counts
+
+    @property
+    def observed(self) -> int:
+        return int(self.live[0].sum()) if self.live is not None and len(self.live) else 0
+
+    def scores(self, live: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-feature (PSI, KS) of live histograms (default: the current ones) against the reference"""
+        if live is None:
+            with self._lock:
+                live = self.live.copy()
+        ref = self.reference / np.maximum(self.reference.sum(axis=1, keepdims=True), 1)
+        live = live / np.maximum(live.sum(axis=1, keepdims=True), 1)
+        ks = np.abs(np.cumsum(live, axis=1) - np.cumsum(ref, axis=1)).max(axis=1)
+        ref = np.maximum(ref, self.EPSILON)
+        live = np.maximum(live, self.EPSILON)
+        psi = ((live - ref) * np.log(live / ref)).sum(axis=1)
+        return psi, ks
+
+    def status(self) -> Dict:
+        """
+        Drift summary for reports
+
+        Retraining is recommended when at least ``min_samples`` rows have been
+        observed and any feature's PSI or KS exceeds its threshold.
+        """
+        # One consistent snapshot, however many batches arrive meanwhile
+        with self._lock:
+            live = self.live.copy()
+        observed = int(live[0].sum()) if len(live) else 0
+        psi, ks = self.scores(live)
+        drifted = [
+            name for name, p, k in zip(self.feature_names, psi, ks)
+            if p > self.psi_threshold or k > self.ks_threshold
+        ]
+        enough = observed >= self.min_samples
+        return {
+            'rows_reference': int(self.reference[0].sum()) if len(self.reference) else 0,
+            'rows_observed': observed,
+            'psi_threshold': self.psi_threshold,
+            'ks_threshold': self.ks_threshold,
+            'max_psi': float(psi.max()) if observed and len(psi) else 0.0,
+            'max_ks': float(ks.max()) if observed and len(ks) else 0.0,
+            'features': {
+                name: {'psi': round(float(p), 6), 'ks': round(float(k), 6)}
+                for name, p, k in zip(self.feature_names, psi, ks)
+            } if observed else {},
+            'drifted_features': drifted if observed else [],
+            'enough_samples': enough,
+            'retrain_recommended': bool(enough and drifted)
+        }
+
+    def export_state(self) -> Dict[str, np.ndarray]:
+        """Reference arrays, used to write model bundles"""
+        return {'edges': self.edges, 'reference': self.reference}
+
+    @classmethod
+    def from_state(cls, config: Optional[dict], feature_names: List[str], arrays: Dict[str, np.ndarray]) -> 'DriftMonitor':
+        """Rebuild a fitted monitor (with empty live histograms) from export_state() output"""
+        monitor = cls.from_config(config)
+        monitor.edges = np.asarray(arrays['edges'])
+        monitor.reference = np.asarray(arrays['reference'])
+        monitor.n_bins = monitor.reference.shape[1]
+        monitor.feature_names = list(feature_names)
+        monitor.reset()
+        return monitor
@@ -0,0 +1,75 @@
+# =============================================================================
+# FILE: src/data/encoding.py
+# =============================================================================
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable
+
+class CategoricalEncoder:
+    """
+    Encode categorical columns with frozen lookup tables
+
+    ``fit`` builds one sorted, hash-indexed table of categories per column.
+    ``transform_column`` maps a whole column in a single vectorized pass:
+    the column is factorized, only its distinct values are looked up in the
+    table, and the codes are gathered back. Values never seen during fit
+    (including missing values, if none were present at fit time) go to a
+    reserved bucket equal to the number of known categories. Nothing is
+    mutated after fit, so one fitted encoder can be shared across threads.
+    """
+
+    MISSING = '<NA>'
+
+    def __init__(self):
+        self.tables: Dict[str, pd.Index] = {}
+
+    @staticmethod
+    def _distinct_as_str(series: pd.Series):
+        """Factorize a column; return row codes and its distinct values as strings"""
+        codes, uniques = pd.factorize(series)
+        uniques = np.asarray(uniques, dtype=object).astype(str)
+        return codes, uniques
+
+    def fit(self, df: pd.DataFrame, columns: Iterable[str]) -> 'CategoricalEncoder':
+        """Build a frozen lookup table for each of the given columns"""
+        for col in columns:
+            codes, uniques = self._distinct_as_str(df[col])
+            categories = set(uniques.tolist())
+            if (codes < 0).any():
+                categories.add(self.MISSING)
+            table = pd.Index(sorted(categories), dtype=object)
+            # Build the hash engine now so transform never initialises shared state
+            table.get_indexer(table[:1])
+            self.tables[col] = table
+        return self
+
+    def unseen_code(self, col: str) -> int:
+        """Code of the reserved bucket for values not seen during fit"""
+        return len(self.tables[col])
+
+    def transform_column(self, col: str, series: pd.Series) -> np.ndarray:
+        """Map a column to integer codes using its fitted table"""
+        table = self.tables[col]
+        codes, uniques = self._distinct_as_str(series)
+        lookup = table.get_indexer(uniques)
+        # Last slot of the lookup is used for missing values (factorize code -1)
+        lookup = np.append(lookup, table.get_indexer([self.MISSING]))
+        lookup[lookup < 0] = self.unseen_code(col)
+        return lookup[codes].astype(np.int64, copy=False)
+
+    @classmethod
+    def from_tables(cls, tables: Dict[str, Iterable[str]]) -> 'CategoricalEncoder':
+        """Rebuild a fitted encoder from per-column category arrays (see categories())"""
+        encoder = cls()
+        for col, categories in tables.items():
+            table = pd.Index(np.asarray(categories).astype(str), dtype=object)
+            table.get_indexer(table[:1])
+            encoder.tables[col] = table
+        return encoder
+
+    def categories(self, col: str) -> np.ndarray:
+        return self.tables[col].to_numpy()
+
+    def __contains__(self, col: str) -> bool:
+        return col in self.tables
@@ -5,142 +5,188 @@
 
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.model_selection import train_test_split
 from typing import List, Optional, Tuple
 
+from .drift import DriftMonitor
+from .encoding import CategoricalEncoder
+
+# Column names recognised as the ground-truth label, in order of preference
+LABEL_CANDIDATES = [
+    'label', 'Label', 'labels', 'Labels', 'class', 'Class', 'attack', 'Attack',
+    'Attack_type', 'attack_type', 'Category', 'category'
+]
+
 class NetworkDataPreprocessor:
     """Preprocess network traffic data"""
     
-    def __init__(self, config):
+    def __init__(self, config, drift_config=None):
         self.config = config
-        self.scaler = StandardScaler()
-        self.label_encoders = {}
+        self.drift_config = drift_config or {}
+        self.drift: Optional[DriftMonitor] = None
+        self.scaler = None
+        self.mean_: Optional[np.ndarray] = None
+        self.scale_: Optional[np.ndarray] = None
+        self.encoder = CategoricalEncoder()
         self.feature_names = []
         self.is_fitted = False
         self.label_col: Optional[str] = None
         self.y_name: Optional[str] = None
 
     def _detect_label_column(self, df: pd.DataFrame) -> Optional[str]:
-        candidates = [
-            'label', 'Label', 'labels', 'Labels', 'class', 'Class', 'attack', 'Attack',
-            'Attack_type', 'attack_type', 'Category', 'category'
-        ]
-        for c in candidates:
+        for c in LABEL_CANDIDATES:
             if c in df.columns:
                 return c
         return None
 
-    def _encode_object_columns(self, df: pd.DataFrame, fit: bool) -> pd.DataFrame:
-        df_out = df.copy()
-        obj_cols = [c for c in df_out.columns if df_out[c].dtype == 'object']
-        for col in obj_cols:
-            if fit:
-                le = LabelEncoder()
-                # Replace NaN with a placeholder string for encoding
-                series = df_out[col].astype(str).fillna('<NA>')
-                le.fit(series)
-                df_out[col] = le.transform(series)
-                self.label_encoders[col] = le
-            else:
-                if col in self.label_encoders:
-                    le = self.label_encoders[col]
-                    series = df_out[col].astype(str).fillna('<NA>')
-                    # Safely handle unseen labels by extending classes_
-                    unseen = np.setdiff1d(series.unique(), le.classes_)
-                    if len(unseen) > 0:
-                        le.classes_ = np.concatenate([le.classes_, unseen])
-                    df_out[col] = le.transform(series)
-                else:
-                    # No encoder from fit phase; fallback to factorize (stable order within batch)
-                    df_out[col] = pd.factorize(df_out[col].astype(str).fillna('<NA>'))[0]
-        return df_out
-
-    def _coerce_numeric(self, df: pd.DataFrame) -> pd.DataFrame:
-        df_num = df.copy()
-        for col in df_num.columns:
-            if df_num[col].dtype == 'object':
-                # Should already be encoded, but coerce just in case
-                df_num[col] = pd.to_numeric(df_num[col], errors='coerce')
-        # Fill any NaNs created during coercion
-        df_num = df_num.replace([np.inf, -np.inf], np.nan).fillna(0.0)
-        return df_num
+    @staticmethod
+    def _categorical_columns(df: pd.DataFrame) -> List[str]:
+        """Columns that are not numeric (object, string, category, ...)"""
+        return [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])]
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Floating dtype of transformed matrices (config 'dtype': float32 or float64)"""
+        return np.dtype(self.config.get('dtype', 'float64'))
+
+    def _column_values(self, col: str, series: pd.Series) -> np.ndarray:
+        """One feature column as numbers: category codes, or numeric values (non-numeric -> NaN)"""
+        if col in self.encoder:
+            # Unseen values go to the reserved bucket
+            return self.encoder.transform_column(col, series)
+        values = series.to_numpy()
+        if not (pd.api.types.is_numeric_dtype(values.dtype) or values.dtype == bool):
+            values = pd.to_numeric(series, errors='coerce').to_numpy()
+        return values
+
+    def _to_matrix(self, data: pd.DataFrame, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Build the feature matrix in one preallocated, C-contiguous array of self.dtype
+
+        Each feature column is encoded or coerced on its own and written straight
+        into its slot, so the frame is never copied as a whole; missing feature
+        columns are zeros (as reindex(fill_value=0) would give). ``rows``
+        optionally selects and orders the rows. NaN and +/-inf become 0, in place.
+        """
+        n_rows = len(data) if rows is None else len(rows)
+        X = np.empty((n_rows, len(self.feature_names)), dtype=self.dtype)
+        for j, col in enumerate(self.feature_names):
+            series = data[col] if col in data.columns else pd.Series(0, index=data.index)
+            values = self._column_values(col, series)
+            X[:, j] = values if rows is None else values[rows]
+        np.nan_to_num(X, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        return X
+
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        """Standardize X in place with the fitted mean/scale (no scikit-learn needed at transform time)"""
+        X -= self.mean_.astype(X.dtype, copy=False)
+        X /= self.scale_.astype(X.dtype, copy=False)
+        return X
+
+    def export_state(self) -> Tuple[dict, dict]:
+        """
+        Fitted state as (scalars, arrays), used to write model bundles.
+        Category tables are stored as fixed-width string arrays so they can be memory-mapped.
+        """
+        if not self.is_fitted:
+            raise ValueError("Preprocessor not fitted")
+        categorical = list(self.encoder.tables)
+        arrays = {'scale_mean': np.asarray(self.mean_), 'scale_std': np.asarray(self.scale_)}
+        for i, col in enumerate(categorical):
+            arrays[f'categories_{i}'] = self.encoder.categories(col).astype(str)
+        if self.drift is not None:
+            arrays['drift_edges'] = self.drift.edges
+            arrays['drift_reference'] = self.drift.reference
+        meta = {'label_col': self.label_col, 'categorical_columns': categorical}
+        return meta, arrays
+
+    @classmethod
+    def from_state(cls, config, feature_names: List[str], meta: dict, arrays: dict,
+                   drift_config=None) -> 'NetworkDataPreprocessor':
+        """Rebuild a fitted preprocessor from export_state() output"""
+        pre = cls(config, drift_config)
+        pre.feature_names = list(feature_names)
+        pre.label_col = meta.get('label_col')
+        pre.mean_, pre.scale_ = arrays['scale_mean'], arrays['scale_std']
+        pre.encoder = CategoricalEncoder.from_tables({
+            col: arrays[f'categories_{i}'] for i, col in enumerate(meta['categorical_columns'])
+        })
+        if 'drift_reference' in arrays and pre.drift_config.get('enabled', True):
+            pre.drift = DriftMonitor.from_state(pre.drift_config, pre.feature_names, {
+                'edges': arrays['drift_edges'], 'reference': arrays['drift_reference']
+            })
+        pre.is_fitted = True
+        return pre
 
     def fit_transform(self, data) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
-        """Fit preprocessor and transform data"""
-        df = data.copy()
-
-        # Detect and remove label column from features
-        self.label_col = self._detect_label_column(df)
-        y = None
-        if self.label_col is not None:
-            y = df[self.label_col].copy()
-            df = df.drop(columns=[self.label_col])
-
-        # Encode all object columns robustly
-        df = self._encode_object_columns(df, fit=True)
-
-        # Coerce any remaining non-numeric columns and handle NaNs
-        df = self._coerce_numeric(df)
-
-        # Store feature names consistently
-        self.feature_names = df.columns.tolist()
-
-        # Split data (and labels if available)
-        X = df.values.astype(float)
-        if y is not None:
-            X_train, X_test, y_train, y_test = train_test_split(
-                X,
-                y.values,
-                test_size=self.config.get('test_size', 0.2),
-                random_state=self.config.get('random_state', 42)
-            )
-        else:
-            X_train, X_test = train_test_split(
-                X,
-                test_size=self.config.get('test_size', 0.2),
-                random_state=self.config.get('random_state', 42)
-            )
-            y_train, y_test = None, None
+        """
+        Fit preprocessor and transform data
+        
+        The input frame is not modified or copied. Rows are written into a single
+        feature matrix already in split order (training rows first), so the
+        returned X_train and X_test are contiguous views of it.
+        """
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.model_selection import train_test_split
+
+        # Detect the label column and keep it out of the features
+        self.label_col = self._detect_label_column(data)
+        y = data[self.label_col].to_numpy() if self.label_col is not None else None
+        self.feature_names = [c for c in data.columns if c != self.label_col]
+
+        # Frozen lookup tables for the categorical columns
+        categorical = [c for c in self._categorical_columns(data) if c != self.label_col]
+        self.encoder = CategoricalEncoder().fit(data, categorical)
+
+        # Split row indices (and labels if available); same split as splitting X itself
+        split = train_test_split(
+            np.arange(len(data)),
+            test_size=self.config.get('test_size', 0.2),
+            random_state=self.config.get('random_state', 42)
+        )
+        order = np.concatenate(split)
+        n_train = len(split[0])
+        X = self._to_matrix(data, order)
+        X_train, X_test = X[:n_train], X[n_train:]
+        y_train, y_test = (y[split[0]], y[split[1]]) if y is not None else (None, None)
+        
+        # Scale features (statistics from the training rows; scaled in place)
+        self.scaler = StandardScaler().fit(X_train)
+        self.mean_, self.scale_ = self.scaler.mean_, self.scaler.scale_
+        self._scale(X)
         
-        # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        # Reference histograms for drift monitoring
+        self.drift = None
+        if self.drift_config.get('enabled', True):
+            self.drift = DriftMonitor.from_config(self.drift_config).fit(X_train, self.feature_names)
         
         self.is_fitted = True
-        return X_train_scaled, X_test_scaled, y_train, y_test
+        return X_train, X_test, y_train, y_test
     
     def transform(self, data) -> Tuple[Optional[np.ndarray], np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
         """Transform new data using fitted preprocessor"""
         if not self.is_fitted:
             raise ValueError("Preprocessor not fitted")
         
-        df = data.copy()
-
-        # Drop label column if present
-        if self.label_col is not None and self.label_col in df.columns:
-            y = df[self.label_col].copy()
-            df = df.drop(columns=[self.label_col])
+        # Keep labels aside if present
+        if self.label_col is not None and self.label_col in data.columns:
+            y = data[self.label_col]
         else:
             y = None
 
-        # Ensure we only use columns seen during fit; add any missing as zeros
-        # First, bring df to include all fit columns
-        for col in self.feature_names:
-            if col not in df.columns:
-                df[col] = 0
-        # Remove any unexpected extra columns
-        df = df[self.feature_names]
-
-        # Encode object columns with fitted encoders (handle unseen)
-        df = self._encode_object_columns(df, fit=False)
-
-        # Coerce numeric and handle NaNs
-        df = self._coerce_numeric(df)
-
-        # Scale
-        X = df.values.astype(float)
-        X_scaled = self.scaler.transform(X)
+        # Exactly the columns seen during fit (missing ones as zeros, extras and the
+        # label dropped), categoricals encoded with the fitted lookup tables
+        X_scaled = self._scale(self._to_matrix(data))
+        
+        # Live histograms, lock-protected so concurrent transforms stay safe
+        # (pickled preprocessors from older versions have no monitor)
+        drift = getattr(self, 'drift', None)
+        if drift is not None:
+            drift.update(X_scaled)
         
         # During transform we only provide test set and its labels
         return None, X_scaled, None, (y.values if y is not None else None)
+
+    def drift_status(self) -> Optional[dict]:
+        """Drift of the data transformed so far against the training data (None if not monitored)"""
+        drift = getattr(self, 'drift', None)
+        return drift.status() if drift is not None else None
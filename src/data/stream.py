@@ -0,0 +1,251 @@
+# =============================================================================
+# FILE: src/data/stream.py
+# =============================================================================
+
+import csv
+import json
+import logging
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger('NetworkAnomalyDetector')
+
+class RecordParser:
+    """Parse text lines into record dicts (JSON Lines, or CSV with a header line)"""
+
+    def __init__(self, fmt: str = 'jsonl', columns: Optional[List[str]] = None):
+        if fmt not in ('jsonl', 'csv'):
+            raise ValueError(f"Unsupported stream format: {fmt}")
+        self.fmt = fmt
+        self.columns = columns
+        self.malformed = 0
+
+    def parse(self, line: str) -> Optional[Dict]:
+        """Return a record, or None for blank, header or malformed lines"""
+        line = line.strip()
+        if not line:
+            return None
+        if self.fmt == 'jsonl':
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            if not isinstance(record, dict):
+                self.malformed += 1
+                return None
+            return record
+        values = next(csv.reader([line]))
+        if self.columns is None:
+            self.columns = values
+            return None
+        if len(values) != len(self.columns):
+            self.malformed += 1
+            return None
+        return dict(zip(self.columns, values))
+
+def _feed_lines(lines: Iterator[str], parser: RecordParser, emit: Callable[[Dict], None], stop: threading.Event):
+    for line in lines:
+        if stop.is_set():
+            return
+        record = parser.parse(line)
+        if record is not None:
+            emit(record)
+
+def _follow(path: str, stop: threading.Event, poll_interval: float, from_beginning: bool, header: bool):
+    """
+    Yield complete lines appended to a file (tail -f); restarts if the file is truncated
+
+    With header, the file's first line is yielded once. After a truncation or
+    rotation the first line is dropped only if it repeats that header, so a
+    header the writer has not re-written yet never turns a data line away,
+    and is never mistaken for a record once it arrives.
+    """
+    with open(path, 'r') as f:
+        header_line = None
+        expect_header = header  # the next complete line starts the file
+        if header:
+            line = f.readline()
+            if line.endswith('\n'):
+                header_line, expect_header = line, False
+                yield line
+            else:
+                f.seek(0)  # not written completely yet; read it below
+        if not from_beginning and not expect_header:
+            f.seek(0, os.SEEK_END)
+        partial = ''
+        while not stop.is_set():
+            line = f.readline()
+            if line:
+                partial += line
+                if partial.endswith('\n'):
+                    line, partial = partial, ''
+                    if expect_header:
+                        expect_header = False
+                        if header_line is None:
+                            header_line = line
+                        elif line.strip() == header_line.strip():
+                            continue
+                    yield line
+                continue
+            if os.path.getsize(path) < f.tell():
+                # Truncated or rotated in place: start over, header included
+                f.seek(0)
+                partial = ''
+                expect_header = header
+                continue
+            time.sleep(poll_interval)
+
+def file_source(path: str, fmt: str, poll_interval: float = 0.2, from_beginning: bool = False):
+    """Producer that tails a CSV / JSON Lines file"""
+    def produce(emit, stop):
+        parser = RecordParser(fmt)
+        lines = _follow(path, stop, poll_interval, from_beginning, header=(fmt == 'csv'))
+        _feed_lines(lines, parser, emit, stop)
+    return produce
+
+def stdin_source(fmt: str):
+    """Producer that reads records from standard input until EOF"""
+    def produce(emit, stop):
+        _feed_lines(sys.stdin, RecordParser(fmt), emit, stop)
+    return produce
+
+def socket_source(address: str, fmt: str):
+    """
+    Producer that listens on a local socket ('tcp://host:port' or 'unix:///path')
+
+    Every connection sends line-delimited records (CSV connections start
+    with their own header line) and is read on its own thread.
+    """
+    def produce(emit, stop):
+        if address.startswith('unix://'):
+            path = address[len('unix://'):]
+            if os.path.exists(path):
+                os.unlink(path)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(path)
+        else:
+            host, port = address[len('tcp://'):].rsplit(':', 1)
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((host, int(port)))
+        server.listen()
+        server.settimeout(0.5)
+        logger.info(f"Stream listening on {address}")
+
+        def handle(conn):
+            with conn, conn.makefile('r', encoding='utf-8', errors='replace') as lines:
+                _feed_lines(lines, RecordParser(fmt), emit, stop)
+
+        with server:
+            while not stop.is_set():
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                threading.Thread(target=handle, args=(conn,), daemon=True).start()
+    return produce
+
+def open_source(spec: str, fmt: Optional[str] = None, poll_interval: float = 0.2, from_beginning: bool = False):
+    """
+    Build a record producer from a source spec: '-' (stdin), 'tcp://host:port',
+    'unix:///path' or a file path to tail. fmt defaults to the file extension
+    ('.csv' -> csv) and otherwise to jsonl.
+    """
+    if fmt is None:
+        fmt = 'csv' if spec.endswith('.csv') else 'jsonl'
+    if spec == '-':
+        return stdin_source(fmt)
+    if spec.startswith(('tcp://', 'unix://')):
+        return socket_source(spec, fmt)
+    return file_source(spec, fmt, poll_interval, from_beginning)
+
+class MicroBatcher:
+    """
+    Group streamed records into micro-batches by size or latency deadline
+
+    A producer runs on a background thread and pushes records into a bounded
+    queue. When scoring falls behind and the queue is full, the producer
+    blocks (stops reading its file/socket/stdin), which is the backpressure.
+    ``batches`` yields a batch as soon as ``batch_size`` records are queued
+    or ``max_delay`` seconds after the batch's first record arrived.
+    """
+
+    _END = object()
+
+    def __init__(self, producer, batch_size: int = 512, max_delay: float = 0.2, max_queue: int = 10000):
+        self.producer = producer
+        self.batch_size = max(1, int(batch_size))
+        self.max_delay = float(max_delay)
+        self.queue: 'queue.Queue' = queue.Queue(maxsize=max(1, int(max_queue)))
+        self.stop = threading.Event()
+        self.received = 0
+        self.blocked_sec = 0.0
+        self._thread = threading.Thread(target=self._run, name='stream-reader', daemon=True)
+
+    def _emit(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Backpressure: wait for the scorer to drain the queue
+            t0 = time.perf_counter()
+            while not self.stop.is_set():
+                try:
+                    self.queue.put(record, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+            self.blocked_sec += time.perf_counter() - t0
+        self.received += 1
+
+    def _run(self):
+        try:
+            self.producer(self._emit, self.stop)
+        except Exception:
+            logger.exception("Stream source failed")
+        finally:
+            while True:
+                try:
+                    self.queue.put(self._END, timeout=0.5)
+                    break
+                except queue.Full:
+                    if self.stop.is_set():
+                        break
+
+    def batches(self) -> Iterator[List[Dict]]:
+        """Yield micro-batches until the source ends or close() is called"""
+        self._thread.start()
+        done = False
+        while not done and not self.stop.is_set():
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is self._END:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._END:
+                    done = True
+                    break
+                batch.append(item)
+            yield batch
+
+    @property
+    def backlog(self) -> int:
+        return self.queue.qsize()
+
+    def close(self):
+        self.stop.set()
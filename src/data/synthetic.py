@@ -0,0 +1,260 @@
+# =============================================================================
+# FILE: src/data/synthetic.py
+# =============================================================================
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+PROTOCOLS = (['tcp', 'udp', 'icmp'], [0.7, 0.2, 0.1])
+SERVICES = (['http', 'ftp', 'telnet', 'smtp', 'dns'], None)
+FLAGS = (['SF', 'S0', 'REJ', 'RSTR'], [0.6, 0.2, 0.1, 0.1])
+
+def _exfiltration(chunk, idx, rng):
+    chunk['src_bytes'][idx] *= 100  # Large data transfer
+
+def _scan(chunk, idx, rng):
+    chunk['count'][idx] *= 50  # High connection count
+
+def _dos(chunk, idx, rng):
+    # Flood of half-open connections to one service
+    chunk['count'][idx] *= 50
+    chunk['srv_count'][idx] *= 20
+    chunk['flag'][idx] = FLAGS[0].index('S0')
+
+def _long_session(chunk, idx, rng):
+    chunk['duration'][idx] *= 100
+
+# Vectorized injectors: each modifies the rows idx of a chunk in place
+ANOMALY_TYPES = {
+    'exfiltration': _exfiltration,
+    'scan': _scan,
+    'dos': _dos,
+    'long_session': _long_session,
+}
+
+# Output file suffix -> format; text formats may be gzipped (double suffix, as data_loader.file_format reads them)
+FORMATS = {
+    '.csv': 'csv',
+    '.csv.gz': 'csv',
+    '.jsonl': 'jsonl',
+    '.jsonl.gz': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.ndjson.gz': 'jsonl',
+    '.parquet': 'parquet',
+    '.feather': 'arrow',
+    '.arrow': 'arrow',
+}
+TEXT_OUTPUT_FORMATS = ('csv', 'jsonl')
+
+def output_format(path: str) -> Optional[str]:
+    """Format written for an output path, from its (double) suffix; None if unsupported"""
+    name = Path(path).name.lower()
+    for suffix in sorted(FORMATS, key=len, reverse=True):
+        if name.endswith(suffix):
+            return FORMATS[suffix]
+    return None
+
+class SyntheticTrafficGenerator:
+    """
+    Deterministic, chunked generator of synthetic network traffic
+
+    Rows are produced in chunks of ``chunk_size``; chunk i draws from its own
+    ``np.random.Generator`` seeded with (seed, i), so the data depends only on
+    the seed and chunk size - not on how many processes generate it or in
+    which order. Anomalies are injected with vectorized updates: a fraction
+    ``anomaly_rate`` of each chunk is labelled 1 and split between the
+    ``anomaly_types`` in proportion to their weights.
+    """
+
+    def __init__(self, n_rows: int, chunk_size: int = 100000, seed: int = 42, anomaly_rate: float = 0.1,
+                 anomaly_types: Optional[Dict[str, float]] = None):
+        anomaly_types = anomaly_types or {'exfiltration': 0.5, 'scan': 0.5}
+        unknown = sorted(set(anomaly_types) - set(ANOMALY_TYPES))
+        if unknown:
+            raise ValueError(f"Unknown anomaly types: {unknown} (choose from {sorted(ANOMALY_TYPES)})")
+        if not 0.0 <= anomaly_rate <= 1.0:
+            raise ValueError(f"anomaly_rate must be between 0 and 1, got {anomaly_rate}")
+        weights = np.asarray(list(anomaly_types.values()), dtype=np.float64)
+        if not np.isfinite(weights).all() or (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError(f"anomaly_types weights must be non-negative with a positive sum, got {anomaly_types}")
+        self.n_rows = int(n_rows)
+        self.chunk_size = max(1, int(chunk_size))
+        self.seed = int(seed)
+        self.anomaly_rate = float(anomaly_rate)
+        self.anomaly_types = list(anomaly_types)
+        self.anomaly_weights = weights / weights.sum()
+
+    @classmethod
+    def from_config(cls, config: dict, n_rows: Optional[int] = None) -> 'SyntheticTrafficGenerator':
+        """
+        Build from the 'data' config section (sample_size, random_state, synthetic)
+
+        Raises:
+            ValueError: On unknown anomaly types, non-positive weights or a rate outside [0, 1]
+        """
+        synthetic = config.get('synthetic', {})
+        return cls(
+            n_rows=n_rows if n_rows is not None else config.get('sample_size', 10000),
+            chunk_size=synthetic.get('chunk_size', 100000),
+            seed=config.get('random_state', 42),
+            anomaly_rate=synthetic.get('anomaly_rate', 0.1),
+            anomaly_types=synthetic.get('anomaly_types')
+        )
+
+    @property
+    def n_chunks(self) -> int:
+        return -(-self.n_rows // self.chunk_size)
+
+    def generate_chunk(self, index: int) -> pd.DataFrame:
+        """Rows [index * chunk_size, ...) of the dataset"""
+        n = min(self.chunk_size, self.n_rows - index * self.chunk_size)
+        rng = np.random.default_rng([self.seed, index])
+
+        # Normal traffic patterns; categoricals as codes until the end
+        chunk = {
+            'duration': rng.exponential(2, n),
+            'src_bytes': rng.lognormal(8, 1.5, n),
+            'dst_bytes': rng.lognormal(6, 1.2, n),
+            'count': rng.poisson(10, n),
+            'srv_count': rng.poisson(5, n),
+            'protocol': rng.choice(len(PROTOCOLS[0]), n, p=PROTOCOLS[1]),
+            'service': rng.choice(len(SERVICES[0]), n, p=SERVICES[1]),
+            'flag': rng.choice(len(FLAGS[0]), n, p=FLAGS[1]),
+            # Ground-truth label: 0 = normal, 1 = anomaly
+            'label': np.zeros(n, dtype=np.int64)
+        }
+
+        # Inject anomalies, one vectorized update per type
+        anomalies = rng.choice(n, int(n * self.anomaly_rate), replace=False)
+        kinds = rng.choice(len(self.anomaly_types), len(anomalies), p=self.anomaly_weights)
+        for k, name in enumerate(self.anomaly_types):
+            ANOMALY_TYPES[name](chunk, anomalies[kinds == k], rng)
+        chunk['label'][anomalies] = 1
+
+        for col, (values, _) in (('protocol', PROTOCOLS), ('service', SERVICES), ('flag', FLAGS)):
+            chunk[col] = np.asarray(values, dtype=object)[chunk[col]]
+        frame = pd.DataFrame(chunk)
+        frame.index += index * self.chunk_size
+        return frame
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        for index in range(self.n_chunks):
+            yield self.generate_chunk(index)
+
+    def frame(self) -> pd.DataFrame:
+        """The whole dataset in memory"""
+        chunks = list(self.iter_chunks())
+        return pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+
+    def write(self, path: str, fmt: Optional[str] = None, workers: int = 1, progress=None) -> dict:
+        """
+        Stream the dataset to disk chunk by chunk
+
+        Chunks are generated (and, for CSV, serialized) in up to ``workers``
+        processes and appended in order, with at most two chunks per worker in
+        flight, so memory stays bounded by the chunk size.
+
+        Args:
+            path (str): Output file (.csv, .jsonl or .ndjson, optionally .gz; .parquet, .feather/.arrow)
+            fmt (str): 'csv', 'jsonl', 'parquet' or 'arrow' (default: from the suffix)
+            workers (int): Generator processes (0 or None: one per CPU)
+            progress (callable): Optional callback(rows_written, n_rows)
+
+        Returns:
+            dict: Summary with rows, anomalies, chunks and the output path
+        """
+        fmt = fmt or output_format(path)
+        if fmt not in ('csv', 'jsonl', 'parquet', 'arrow'):
+            raise ValueError(f"Unsupported output format for {path}; use .csv, .jsonl (optionally .gz), .parquet "
+                             f"or .feather")
+        if str(path).lower().endswith('.gz') and fmt not in TEXT_OUTPUT_FORMATS:
+            raise ValueError(f"Cannot gzip {fmt} output: {path}")
+        workers = workers or os.cpu_count() or 1
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        sink = _Sink(path, fmt)
+        summary = {'rows': 0, 'anomalies': 0, 'chunks': 0, 'path': str(path), 'format': fmt}
+        try:
+            for payload, n, n_anomalies in self._generate(fmt, workers):
+                sink.write(payload)
+                summary['rows'] += n
+                summary['anomalies'] += n_anomalies
+                summary['chunks'] += 1
+                if progress is not None:
+                    progress(summary['rows'], self.n_rows)
+        finally:
+            sink.close()
+        return summary
+
+    def _generate(self, fmt, workers):
+        """Yield (payload, rows, anomalies) per chunk, in chunk order"""
+        if workers <= 1:
+            for index in range(self.n_chunks):
+                yield _render_chunk(self, index, fmt)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            window = 2 * workers
+            pending = [pool.submit(_render_chunk, self, i, fmt) for i in range(min(window, self.n_chunks))]
+            next_index = len(pending)
+            while pending:
+                result = pending.pop(0).result()
+                if next_index < self.n_chunks:
+                    pending.append(pool.submit(_render_chunk, self, next_index, fmt))
+                    next_index += 1
+                yield result
+
+def _render_chunk(generator: SyntheticTrafficGenerator, index: int, fmt: str):
+    """Generate one chunk in a worker; text formats are serialized there too, since that dominates the cost"""
+    frame = generator.generate_chunk(index)
+    if fmt == 'csv':
+        payload = frame.to_csv(index=False, header=(index == 0))
+    elif fmt == 'jsonl':
+        payload = frame.to_json(orient='records', lines=True)
+        if not payload.endswith('\n'):
+            payload += '\n'
+    else:
+        payload = frame
+    return payload, len(frame), int(frame['label'].sum())
+
+class _Sink:
+    """Append-only writer for CSV / JSON Lines text or DataFrame chunks (Parquet row groups / Arrow IPC batches)"""
+
+    def __init__(self, path, fmt):
+        self.path, self.fmt = str(path), fmt
+        self._writer = None
+        if fmt in TEXT_OUTPUT_FORMATS:
+            if self.path.lower().endswith('.gz'):
+                import gzip
+                self._file = gzip.open(self.path, 'wt', newline='')
+            else:
+                self._file = open(self.path, 'w', newline='')
+        else:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError(f"Writing {fmt} files requires pyarrow (pip install pyarrow)")
+
+    def write(self, payload):
+        if self.fmt in TEXT_OUTPUT_FORMATS:
+            self._file.write(payload)
+            return
+        import pyarrow as pa
+        table = pa.Table.from_pandas(payload, preserve_index=False)
+        if self._writer is None:
+            if self.fmt == 'parquet':
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                self._writer = pa.ipc.new_file(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self.fmt in TEXT_OUTPUT_FORMATS:
+            self._file.close()
+        elif self._writer is not None:
+            self._writer.close()
@@ -0,0 +1,155 @@
+# =============================================================================
+# FILE: src/jobs.py
+# =============================================================================
+
+import copy
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger('NetworkAnomalyDetector')
+
+class JobQueueFull(RuntimeError):
+    """Raised when the job queue already holds the maximum number of pending jobs"""
+
+
+class Job:
+    """State of a single background job"""
+
+    def __init__(self, kind: str, stages: Sequence[str] = ()):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.stages = list(stages)
+        self.status = 'queued'
+        self.stage: Optional[str] = None
+        self.timings: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def set_timings(self, timings: Dict[str, Any]):
+        """
+        Publish a snapshot of the job's timings
+
+        Call from the thread that updates ``timings``: the copy is taken there,
+        so request threads only ever read a dict no one is mutating.
+        """
+        snapshot = copy.deepcopy(timings)
+        with self._lock:
+            self.timings = snapshot
+
+    def set_stage(self, stage: str, state: str = 'started'):
+        """Progress callback: record the stage currently running"""
+        if state == 'started':
+            self.stage = stage
+
+    @property
+    def progress(self) -> float:
+        """Fraction of stages completed, derived from the pipeline timings"""
+        if self.status == 'succeeded':
+            return 1.0
+        if not self.stages:
+            return 0.0
+        done = self.timings.get('pipeline', {})
+        completed = sum(1 for s in self.stages if f'{s}_sec' in done)
+        return completed / len(self.stages)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('succeeded', 'failed')
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        with self._lock:
+            timings = self.timings
+        data = {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'stage': self.stage,
+            'stages': self.stages,
+            'progress': round(self.progress, 4),
+            'timings': timings,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
+
+
+class JobManager:
+    """
+    Run long jobs on a bounded worker pool.
+
+    ``submit`` returns immediately with a :class:`Job` whose status can be
+    polled; at most ``max_workers`` jobs run at once and at most
+    ``max_pending`` wait in the queue before new submissions are rejected.
+    Finished jobs are kept (oldest evicted first) up to ``max_history``.
+    """
+
+    def __init__(self, max_workers: int = 1, max_pending: int = 8, max_history: int = 100):
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(0, int(max_pending))
+        self.max_history = max(1, int(max_history))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, func: Callable[..., Any], *args, stages: Sequence[str] = (), **kwargs) -> Job:
+        """
+        Queue ``func(job, *args, **kwargs)`` for background execution
+
+        Raises:
+            JobQueueFull: If too many jobs are already waiting
+        """
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status == 'queued')
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"Job queue is full ({pending} pending)")
+            job = Job(kind, stages)
+            self._jobs[job.id] = job
+            self._evict()
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job: Job, func, args, kwargs):
+        job.status = 'running'
+        job.started_at = datetime.now().isoformat()
+        try:
+            job.result = func(job, *args, **kwargs)
+            job.status = 'succeeded'
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = 'failed'
+            logger.exception(f"Job {job.id} ({job.kind}) failed")
+        finally:
+            job.stage = None
+            job.finished_at = datetime.now().isoformat()
+
+    def _evict(self):
+        """Drop the oldest finished jobs beyond ``max_history`` (caller holds the lock)"""
+        excess = len(self._jobs) - self.max_history
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.finished][:excess]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
@@ -2,28 +2,52 @@
 """
 Main entry point for Network Anomaly Detection System
 Modular architecture for production deployment
+
+Heavy dependencies (scikit-learn, TensorFlow, matplotlib, joblib) are
+imported lazily by the stages that need them; see --startup-profile.
 """
 
+import time
+_START_TIME = time.perf_counter()
+
 import argparse
+import functools
+import sys
 import yaml
 import logging
-import pandas as pd
 import numpy as np
 from pathlib import Path
-import joblib
 import json
 from datetime import datetime
-import time
 
 # Import custom modules
 from models.isolation_forest import IsolationForestDetector
 from models.autoencoder import AutoencoderDetector
 from models.ensemble import EnsembleDetector
+from models.forest import PackedForest
+from models.parallel import ModelExecutor
+from models.quantile_sketch import QuantileSketch
+from models.bundle import (
+    BundleSchemaError, config_hash, is_bundle, read_bundle, write_bundle
+)
 from data.data_loader import NetworkDataLoader
 from data.preprocessor import NetworkDataPreprocessor
-from utils.metrics import DetectionMetrics
+from utils.metrics import DetectionMetrics, StreamingMetrics
+from utils.results_store import ResultWriter, write_results
 from utils.visualization import DetectionVisualizer
 from utils.logger import setup_logger
+from utils.startup import startup_report
+
+def _finite_or_none(value):
+    """JSON-safe float: None for NaN (e.g. rows the cascade's autoencoder skipped)"""
+    return float(value) if np.isfinite(value) else None
+
+def _json_default(value):
+    """json.dump fallback: NumPy scalars as Python numbers, anything else as a string"""
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+# Ordered stages of run_full_pipeline; each records '<stage>_sec' in timings['pipeline']
+PIPELINE_STAGES = ('load', 'preprocess', 'train', 'detect', 'evaluate', 'visualize', 'save', 'report')
 
 class NetworkAnomalyDetectionSystem:
     """
@@ -37,28 +61,34 @@ class NetworkAnomalyDetectionSystem:
         Args:
             config_path (str): Path to configuration file
         """
+        self.config_path = config_path
         self.config = self._load_config(config_path)
         self.logger = setup_logger(self.config['logging'])
         
         # Initialize components
         self.data_loader = NetworkDataLoader(self.config['data'])
-        self.preprocessor = NetworkDataPreprocessor(self.config['data'])
+        self.preprocessor = NetworkDataPreprocessor(self.config['data'], self.config.get('drift'))
         self.metrics = DetectionMetrics()
-        self.visualizer = DetectionVisualizer()
+        self.visualizer = DetectionVisualizer(self.config.get('visualization'))
         
         # Initialize models
         self.if_detector = IsolationForestDetector(self.config['models']['isolation_forest'])
-        self.ae_detector = AutoencoderDetector(self.config['models']['autoencoder'])
+        self.ae_detector = AutoencoderDetector(
+            self.config['models']['autoencoder'], self.config['detection'].get('threshold_percentile', 95)
+        )
         self.ensemble = EnsembleDetector(self.config['detection'])
+        self.executor = ModelExecutor(self.config['models'].get('execution'))
         
         # Model states
         self.models_trained = False
         self.preprocessor_fitted = False
         self.y_train = None
         self.y_test = None
+        self.drift_decision = None
         self.timings = {
             'train': {},
-            'inference': {}
+            'inference': {},
+            'pipeline': {}
         }
         
     def _load_config(self, config_path):
@@ -166,7 +196,8 @@ class NetworkAnomalyDetectionSystem:
                 y_test = None
             self.y_test = y_test
         
-        self.logger.info(f"Training data shape: {X_train.shape}")
+        if X_train is not None:
+            self.logger.info(f"Training data shape: {X_train.shape}")
         self.logger.info(f"Testing data shape: {X_test.shape}")
         
         return X_train, X_test, self.y_train, self.y_test
@@ -178,29 +209,33 @@ class NetworkAnomalyDetectionSystem:
         Args:
             X_train (np.ndarray): Training data
         """
-        self.logger.info("Training anomaly detection models...")
-        
-        # Train Isolation Forest with timing
-        self.logger.info("Training Isolation Forest...")
-        t0 = time.perf_counter()
-        self.if_detector.train(X_train)
-        self.timings['train']['isolation_forest_sec'] = time.perf_counter() - t0
+        self.logger.info(
+            f"Training anomaly detection models ({self.executor.mode} executor, "
+            f"CPU budget {self.executor.cpu_budget})..."
+        )
         
-        # Train Autoencoder with timing
-        self.logger.info("Training Autoencoder...")
-        t0 = time.perf_counter()
-        self.ae_detector.train(X_train)
-        self.timings['train']['autoencoder_sec'] = time.perf_counter() - t0
+        # Train Isolation Forest and Autoencoder concurrently; per-model time, wall time and overlap
+        self.timings['train'] = self.executor.train(self.if_detector, self.ae_detector, X_train)
+        self.timings['train']['executor'] = self.executor.mode
+        self.logger.info(
+            f"Training took {self.timings['train']['wall_sec']:.2f}s wall "
+            f"(isolation forest {self.timings['train']['isolation_forest_sec']:.2f}s, "
+            f"autoencoder {self.timings['train']['autoencoder_sec']:.2f}s, "
+            f"overlap {self.timings['train']['overlap_sec']:.2f}s)"
+        )
         
         self.models_trained = True
         self.logger.info("All models trained successfully")
     
-    def detect_anomalies(self, X_test):
+    def detect_anomalies(self, X_test, timings=None):
         """
         Detect anomalies using trained models
         
         Args:
             X_test (np.ndarray): Test data
+            timings (dict): Receives this call's timings (default: self.timings,
+                whose 'inference' section is reset); pass a new dict when calls
+                may run concurrently, e.g. from server request threads
             
         Returns:
             dict: Detection results from all methods
@@ -210,20 +245,9 @@ class NetworkAnomalyDetectionSystem:
         
         self.logger.info("Detecting anomalies...")
         
-        # Get predictions from individual models with timing
-        t0 = time.perf_counter()
-        if_results = self.if_detector.predict(X_test)
-        self.timings['inference']['isolation_forest_sec'] = time.perf_counter() - t0
-
-        t0 = time.perf_counter()
-        ae_results = self.ae_detector.predict(X_test)
-        self.timings['inference']['autoencoder_sec'] = time.perf_counter() - t0
-        
-        # Combine using ensemble method
-        ensemble_results = self.ensemble.combine_predictions(
-            if_results['predictions'], 
-            ae_results['anomalies']
-        )
+        timings = self.timings if timings is None else timings
+        timings['inference'] = {}
+        if_results, ae_results, ensemble_results = self._predict(X_test, timings['inference'])
         
         results = {
             'isolation_forest': if_results,
@@ -235,7 +259,7 @@ class NetworkAnomalyDetectionSystem:
                 'if_anomalies': np.sum(if_results['predictions'] == -1),
                 'ae_anomalies': np.sum(ae_results['anomalies']),
                 'ensemble_anomalies': np.sum(ensemble_results),
-                'timings_sec': self.timings
+                'timings_sec': timings
             }
         }
         
@@ -243,6 +267,460 @@ class NetworkAnomalyDetectionSystem:
         
         return results
     
+    def _predict(self, X, inference=None):
+        """
+        Run both detectors and the ensemble on a feature matrix
+        
+        Per-model, wall-clock and overlap time are added to inference (default
+        timings['inference']) so repeated calls (e.g. one per chunk) accumulate.
+        
+        Returns:
+            tuple: (if_results, ae_results, ensemble_results)
+        """
+        inference = self.timings['inference'] if inference is None else inference
+        if self.ensemble.is_cascade:
+            return self._predict_cascade(X, inference)
+        
+        # Score with both models concurrently; accumulate per-model, wall and overlap time
+        if_results, ae_results, report = self.executor.predict(self.if_detector, self.ae_detector, X)
+        for key, seconds in report.items():
+            inference[key] = inference.get(key, 0.0) + seconds
+        
+        # Combine using ensemble method
+        ensemble_results = self.ensemble.combine_predictions(
+            if_results['predictions'], 
+            ae_results['anomalies']
+        )
+        return if_results, ae_results, ensemble_results
+    
+    def _predict_cascade(self, X, inference):
+        """
+        Two-stage scoring: the Isolation Forest scores every row, the autoencoder
+        only rows whose IF score falls inside the ensemble's uncertainty band
+        
+        Rows the autoencoder skipped have a NaN reconstruction error and are not
+        AE anomalies; ae_results['scored'] marks the rows it did score.
+        """
+        t_start = time.perf_counter()
+        if_results = self.if_detector.predict(X)
+        inference['isolation_forest_sec'] = inference.get('isolation_forest_sec', 0.0) + time.perf_counter() - t_start
+        
+        t0 = time.perf_counter()
+        uncertain = self.ensemble.uncertain(if_results['scores'])
+        errors = np.full(len(X), np.nan)
+        anomalies = np.zeros(len(X), dtype=bool)
+        if uncertain.any():
+            subset = self.ae_detector.predict(X[uncertain])
+            errors[uncertain] = subset['reconstruction_errors']
+            anomalies[uncertain] = subset['anomalies']
+        ae_results = {
+            'reconstruction_errors': errors,
+            'anomalies': anomalies,
+            'threshold': self.ae_detector.threshold,
+            'scored': uncertain
+        }
+        inference['autoencoder_sec'] = inference.get('autoencoder_sec', 0.0) + time.perf_counter() - t0
+        inference['wall_sec'] = inference.get('wall_sec', 0.0) + time.perf_counter() - t_start
+        inference['cascade_rows'] = inference.get('cascade_rows', 0) + len(X)
+        inference['cascade_ae_rows'] = inference.get('cascade_ae_rows', 0) + int(uncertain.sum())
+        
+        ensemble_results = self.ensemble.combine_cascade(if_results['scores'], anomalies, uncertain)
+        return if_results, ae_results, ensemble_results
+    
+    @staticmethod
+    def _result_columns(if_results, ae_results, ensemble_results, labels=None, start=0):
+        """Per-row result columns (row_index = position in the scored data, from start)"""
+        columns = {
+            'row_index': np.arange(start, start + len(ensemble_results)),
+            'if_score': if_results['scores'],
+            'if_anomaly': if_results['predictions'] == -1,
+            'ae_error': ae_results['reconstruction_errors'],
+            'ae_anomaly': ae_results['anomalies'],
+            'anomaly': ensemble_results
+        }
+        if labels is not None:
+            columns['label'] = np.asarray(labels)
+        return columns
+    
+    def save_results(self, results, output_path="results/detection_results", labels=None):
+        """
+        Save per-row detection results as a columnar result store
+        
+        Args:
+            results (dict): Output of detect_anomalies
+            output_path (str): Store directory (see utils.results_store)
+            labels (np.ndarray): Ground-truth labels of the scored rows, if known
+            
+        Returns:
+            dict: The store manifest
+        """
+        columns = self._result_columns(
+            results['isolation_forest'], results['autoencoder'], results['ensemble'], labels
+        )
+        metadata = {
+            key: _json_default(value) if isinstance(value, np.generic) else value
+            for key, value in results['metadata'].items() if key != 'timings_sec'
+        }
+        metadata['ae_threshold'] = float(results['autoencoder']['threshold'])
+        metadata['ensemble_method'] = self.ensemble.method
+        manifest = write_results(output_path, columns, metadata)
+        self.logger.info(f"Per-row results saved to {output_path}")
+        return manifest
+    
+    def detect_anomalies_chunked(self, data_path, output_file="results/detection_results", chunk_size=None,
+                                 evaluation=None, sketches=None):
+        """
+        Detect anomalies in a large file without loading it into memory
+        
+        The file is streamed in fixed-size chunks; each chunk is transformed
+        with the fitted preprocessor, scored by both models and the ensemble,
+        and its per-row results are appended to output_file, so peak memory
+        depends on chunk_size rather than on the file size.
+        
+        Args:
+            data_path (str): Path to a CSV or JSON Lines file
+            output_file (str): Result store directory receiving per-row results
+                (see utils.results_store), or a .csv file
+            chunk_size (int): Rows per chunk (default: config data.chunk_size)
+            evaluation (StreamingMetrics): Accumulator to add labelled chunks to
+                (default: a new one), e.g. to merge the metrics of several files
+            sketches (dict): Optional 'isolation_forest' / 'autoencoder' QuantileSketch
+                receiving every chunk's IF score_samples / AE errors (e.g. to merge
+                the score distributions of several files)
+            
+        Returns:
+            dict: Summary with the same counters as detect_anomalies metadata,
+            plus streamed 'metrics' if the data is labelled
+        """
+        if not self.models_trained or not self.preprocessor_fitted:
+            raise ValueError("Models not trained. Train or load models first.")
+        
+        self.logger.info(f"Detecting anomalies in {data_path} (chunked)...")
+        self.timings['inference'] = {}
+        import pandas as pd
+        
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        as_csv = str(output_file).endswith('.csv')
+        out = open(output_file, 'w', newline='') if as_csv else ResultWriter(output_file)
+        
+        summary = {
+            'total_samples': 0,
+            'if_anomalies': 0,
+            'ae_anomalies': 0,
+            'ensemble_anomalies': 0,
+            'chunks': 0
+        }
+        # Labelled data is evaluated as it streams by, in constant memory
+        labelled = False
+        label_error = None
+        t_start = time.perf_counter()
+        try:
+            for chunk in self.data_loader.iter_chunks(data_path, chunk_size):
+                t0 = time.perf_counter()
+                _, X, _, y = self.preprocessor.transform(chunk)
+                self.timings['inference']['transform_sec'] = (
+                    self.timings['inference'].get('transform_sec', 0.0) + time.perf_counter() - t0
+                )
+                if_results, ae_results, ensemble_results = self._predict(X)
+                
+                if_anomalies = if_results['predictions'] == -1
+                start = summary['total_samples']
+                rows = self._result_columns(if_results, ae_results, ensemble_results, y, start)
+                if as_csv:
+                    pd.DataFrame(rows).to_csv(out, header=(summary['chunks'] == 0), index=False)
+                else:
+                    out.append(rows)
+                
+                summary['total_samples'] += len(X)
+                summary['if_anomalies'] += int(np.sum(if_anomalies))
+                summary['ae_anomalies'] += int(np.sum(ae_results['anomalies']))
+                summary['ensemble_anomalies'] += int(np.sum(ensemble_results))
+                summary['chunks'] += 1
+                if sketches:
+                    if 'isolation_forest' in sketches:
+                        sketches['isolation_forest'].update(if_results['scores'] + self.if_detector.offset)
+                    if 'autoencoder' in sketches:
+                        sketches['autoencoder'].update(ae_results['reconstruction_errors'])
+                if y is not None and label_error is None:
+                    if evaluation is None:
+                        evaluation = StreamingMetrics(self.config.get('metrics'))
+                    try:
+                        evaluation.update(y, if_results, ae_results, ensemble_results)
+                        labelled = True
+                    except ValueError as e:
+                        # e.g. a multi-class attack-type column: score the file, skip evaluation
+                        label_error = str(e)
+                        labelled = False
+                        self.logger.warning(f"Not evaluating {data_path}: {label_error}")
+                self.logger.info(
+                    f"Chunk {summary['chunks']}: {summary['total_samples']} rows scored, "
+                    f"{summary['ensemble_anomalies']} anomalies so far"
+                )
+        except BaseException:
+            if as_csv:
+                out.close()
+            else:
+                out.abort()
+            raise
+        
+        self.timings['inference']['total_sec'] = time.perf_counter() - t_start
+        summary.update({
+            'timestamp': datetime.now().isoformat(),
+            'ae_threshold': float(self.ae_detector.threshold),
+            'output_file': str(output_file),
+            'drift': self.preprocessor.drift_status(),
+            'timings_sec': self.timings
+        })
+        if labelled:
+            summary['metrics'] = evaluation.result()
+        elif label_error is not None:
+            summary['metrics_error'] = label_error
+        if as_csv:
+            out.close()
+        else:
+            out.close(metadata=summary)
+        self.logger.info(f"Chunked detection complete. Found {summary['ensemble_anomalies']} anomalies "
+                         f"in {summary['total_samples']} rows")
+        return summary
+    
+    def calibrate_thresholds(self, data_path, chunk_size=None, reset=False):
+        """
+        Recompute the IF and AE thresholds from (new) traffic in constant memory
+        
+        The file is streamed in chunks and each chunk's IF scores and AE errors
+        are added to the detectors' quantile sketches, which are merged with
+        the training distribution unless reset. Thresholds are then the
+        sketches' contamination / threshold_percentile quantiles.
+        
+        Args:
+            data_path (str): Path to a CSV or JSON Lines file
+            chunk_size (int): Rows per chunk (default: config data.chunk_size)
+            reset (bool): Calibrate on this data only, discarding the sketched training scores
+            
+        Returns:
+            dict: Rows added and the thresholds before and after
+        """
+        if not self.models_trained or not self.preprocessor_fitted:
+            raise ValueError("Models not trained. Train or load models first.")
+        
+        self.logger.info(f"Calibrating thresholds on {data_path}...")
+        before = {'if_offset': float(self.if_detector.offset), 'ae_threshold': float(self.ae_detector.threshold)}
+        rows = 0
+        for i, chunk in enumerate(self.data_loader.iter_chunks(data_path, chunk_size)):
+            _, X, _, _ = self.preprocessor.transform(chunk)
+            self.if_detector.calibrate(X, reset=reset and i == 0)
+            self.ae_detector.calibrate(X, reset=reset and i == 0)
+            rows += len(X)
+        after = {'if_offset': float(self.if_detector.offset), 'ae_threshold': float(self.ae_detector.threshold)}
+        
+        self.logger.info(f"Thresholds calibrated on {rows} rows: {before} -> {after}")
+        return {
+            'rows': rows,
+            'sketched_rows': {'isolation_forest': self.if_detector.sketch.n, 'autoencoder': self.ae_detector.sketch.n},
+            'before': before,
+            'after': after
+        }
+    
+    def run_stream(self, source, output=None, fmt=None, emit_all=False):
+        """
+        Continuously score records from a live source and emit anomalies
+        
+        Records are micro-batched by size or latency deadline (config 'stream'
+        section: batch_size, max_delay_ms, max_queue). Each batch is scored
+        with the loaded models and anomalies are written as JSON lines as soon
+        as the batch is done. When scoring falls behind, the bounded queue
+        fills up and reading from the source pauses (backpressure).
+        
+        Args:
+            source (str): '-' for stdin, 'tcp://host:port', 'unix:///path' or a file to tail
+            output (str): File to append JSON lines to (default: stdout)
+            fmt (str): 'csv' or 'jsonl' (default: from the file extension, else jsonl)
+            emit_all (bool): Emit every scored record, not only anomalies
+            
+        Returns:
+            dict: Counters for the stream session
+        """
+        if not self.models_trained or not self.preprocessor_fitted:
+            raise ValueError("Models not trained. Train or load models first.")
+        import pandas as pd
+        from data.stream import MicroBatcher, open_source
+        
+        stream_cfg = self.config.get('stream', {})
+        producer = open_source(
+            source, fmt,
+            poll_interval=stream_cfg.get('poll_interval_ms', 200) / 1000.0,
+            from_beginning=stream_cfg.get('from_beginning', False)
+        )
+        batcher = MicroBatcher(
+            producer,
+            batch_size=stream_cfg.get('batch_size', 512),
+            max_delay=stream_cfg.get('max_delay_ms', 200) / 1000.0,
+            max_queue=stream_cfg.get('max_queue', 10000)
+        )
+        stats_every = stream_cfg.get('stats_interval_sec', 10)
+        stats = {'records': 0, 'batches': 0, 'anomalies': 0, 'max_batch_latency_sec': 0.0}
+        self.timings['inference'] = {}
+        out = open(output, 'a') if output else sys.stdout
+        self.logger.info(f"Streaming from {source} (batch_size={batcher.batch_size}, "
+                         f"max_delay={batcher.max_delay}s, max_queue={batcher.queue.maxsize})")
+        last_stats = time.monotonic()
+        try:
+            for batch in batcher.batches():
+                t0 = time.perf_counter()
+                frame = pd.DataFrame.from_records(batch)
+                _, X, _, _ = self.preprocessor.transform(frame)
+                if_results, ae_results, flags = self._predict(X)
+                
+                if_flags = if_results['predictions'] == -1
+                now = datetime.now().isoformat()
+                for i in (range(len(batch)) if emit_all else np.flatnonzero(flags)):
+                    out.write(json.dumps({
+                        'timestamp': now,
+                        'anomaly': bool(flags[i]),
+                        'if_score': float(if_results['scores'][i]),
+                        'if_anomaly': bool(if_flags[i]),
+                        'ae_error': _finite_or_none(ae_results['reconstruction_errors'][i]),
+                        'ae_anomaly': bool(ae_results['anomalies'][i]),
+                        'record': batch[i]
+                    }, default=str) + '\n')
+                out.flush()
+                
+                stats['records'] += len(batch)
+                stats['batches'] += 1
+                stats['anomalies'] += int(np.sum(flags))
+                stats['max_batch_latency_sec'] = max(stats['max_batch_latency_sec'], time.perf_counter() - t0)
+                if time.monotonic() - last_stats >= stats_every:
+                    last_stats = time.monotonic()
+                    self.logger.info(
+                        f"Stream: {stats['records']} records, {stats['anomalies']} anomalies, "
+                        f"backlog {batcher.backlog}, reader blocked {batcher.blocked_sec:.1f}s"
+                    )
+        except (KeyboardInterrupt, BrokenPipeError):
+            self.logger.info("Stream interrupted")
+        finally:
+            batcher.close()
+            if output:
+                out.close()
+        
+        stats['reader_blocked_sec'] = batcher.blocked_sec
+        self.logger.info(f"Stream finished: {stats}")
+        drift = self.preprocessor.drift_status()
+        if drift is not None:
+            stats['drift'] = drift
+            if drift['retrain_recommended']:
+                self.logger.warning(f"Feature drift detected in {drift['drifted_features']}; retraining recommended")
+        return stats
+    
+    def run_sweep(self, data_path=None, output_dir="results", workers=None):
+        """
+        Hyperparameter / ensemble sweep over the 'sweep.grid' config section
+        
+        The data is loaded and preprocessed once; see HyperparameterSweep.
+        
+        Args:
+            data_path (str): Labelled data (default: generated sample)
+            output_dir (str): Directory for sweep_results.csv
+            workers (int): Fitting processes (default: sweep.workers, else one per CPU)
+            
+        Returns:
+            pd.DataFrame: Ranked results, best first
+        """
+        from models.sweep import HyperparameterSweep
+        
+        sweep = HyperparameterSweep(self.config['models'], self.config.get('sweep'), workers,
+                                    detection_config=self.config['detection'])
+        t0 = time.perf_counter()
+        data = self.load_data(data_path, generate_sample=data_path is None)
+        X_train, X_test, _, y_test = self.preprocess_data(data)
+        del data
+        preprocess_sec = time.perf_counter() - t0
+        
+        def progress(done, total):
+            self.logger.info(f"Sweep: {done}/{total} model configurations fitted")
+        
+        t0 = time.perf_counter()
+        table = sweep.run(X_train, X_test, y_test, progress=progress)
+        self.timings['sweep'] = {
+            'preprocess_sec': preprocess_sec,
+            'fit_sec': time.perf_counter() - t0 - table.attrs['evaluate_sec'],
+            'evaluate_sec': table.attrs['evaluate_sec'],
+            'models_fitted': table.attrs['models_fitted'],
+            'combinations': len(table),
+        }
+        
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        output_file = Path(output_dir) / "sweep_results.csv"
+        table.to_csv(output_file, index=False)
+        self.logger.info(
+            f"Sweep: {len(table)} combinations from {table.attrs['models_fitted']} fitted models; "
+            f"results saved to {output_file} ({self.timings['sweep']})"
+        )
+        return table
+    
+    def detect_batch(self, inputs, output_dir="results/batch", model_dir="models/saved_models", workers=None,
+                     chunk_size=None, resume=True):
+        """
+        Score every data file in a directory or glob with saved models
+        
+        Files are sharded across worker processes that load the models once;
+        see BatchDetector. Files scored by an earlier run are skipped unless
+        resume is False.
+        
+        Args:
+            inputs (str): Directory or glob pattern (e.g. 'captures/*.csv.gz')
+            output_dir (str): Per-file results under files/, plus batch_report.json
+            model_dir (str): Saved models to score with
+            workers (int): Worker processes (default: batch.workers, else one per CPU)
+            chunk_size (int): Rows per chunk (default: config data.chunk_size)
+            resume (bool): Skip files already scored
+            
+        Returns:
+            dict: Aggregated report over all files
+        """
+        from batch import BatchDetector
+        
+        # Quantiles at which the merged score sketches give this batch's thresholds
+        quantiles = {'autoencoder': self.config['detection'].get('threshold_percentile', 95) / 100.0}
+        contamination = self.config['models']['isolation_forest'].get('contamination', 0.1)
+        if contamination != 'auto':
+            quantiles['isolation_forest'] = contamination
+        runner = BatchDetector(self.config_path, model_dir, self.config.get('batch'), workers, chunk_size,
+                               metrics_config=self.config.get('metrics'), quantiles=quantiles)
+        t0 = time.perf_counter()
+        scored = []
+        
+        def progress(done, total, path, entry):
+            scored.append(path)
+            eta = (time.perf_counter() - t0) / len(scored) * (total - done)
+            detail = entry.get('error') or 'ok'
+            self.logger.info(f"Batch: {done}/{total} files done ({path}: {entry['status']}, {detail}); "
+                             f"about {eta:.0f}s left")
+        
+        report = runner.run(inputs, output_dir, resume=resume, progress=progress)
+        self.logger.info(
+            f"Batch complete: {report['files']} files, {report['ensemble_anomalies']} anomalies in "
+            f"{report['total_samples']} rows; report saved to {Path(output_dir) / 'batch_report.json'}"
+        )
+        return report
+    
+    def score_records(self, data):
+        """
+        Score raw records with the fitted preprocessor and models (no retraining)
+        
+        Safe to call from several threads at once: each call keeps its own
+        timings, and the drift monitor's live histograms are lock-protected.
+        
+        Args:
+            data (pd.DataFrame): Raw network traffic records
+            
+        Returns:
+            dict: Detection results for every record (see detect_anomalies)
+        """
+        if not self.preprocessor_fitted:
+            raise ValueError("Preprocessor not fitted. Train or load models first.")
+        _, X, _, _ = self.preprocessor.transform(data)
+        return self.detect_anomalies(X, timings={})
+    
     def evaluate_performance(self, results, y_true=None):
         """
         Evaluate model performance
@@ -259,92 +737,219 @@ class NetworkAnomalyDetectionSystem:
         metrics = {}
         
         if y_true is not None:
-            # Calculate metrics with ground truth
-            if_pred = results['isolation_forest']['predictions'] == -1
-            ae_pred = results['autoencoder']['anomalies']
-            ensemble_pred = results['ensemble']
-            
-            metrics['isolation_forest'] = self.metrics.calculate_metrics(y_true, if_pred)
-            metrics['autoencoder'] = self.metrics.calculate_metrics(y_true, ae_pred)
-            metrics['ensemble'] = self.metrics.calculate_metrics(y_true, ensemble_pred)
+            # Calculate metrics with ground truth: P/R/F1 per method, plus
+            # ROC/PR-AUC and the best thresholds for the IF scores and AE errors
+            try:
+                metrics = StreamingMetrics(self.config.get('metrics')).update(
+                    y_true, results['isolation_forest'], results['autoencoder'], results['ensemble']
+                ).result()
+            except ValueError as e:
+                # Labels that are not binary (e.g. attack types) cannot be scored as anomaly / normal
+                self.logger.warning(f"Evaluating without labels: {e}")
+                metrics = self.metrics.calculate_unsupervised_metrics(results)
+                metrics['label_error'] = str(e)
         else:
             # Calculate metrics without ground truth
             metrics = self.metrics.calculate_unsupervised_metrics(results)
         
         return metrics
     
-    def generate_visualizations(self, results, X_test, output_dir="results"):
+    def generate_visualizations(self, results, X_test, output_dir="results", force=False):
         """
         Generate visualization plots
         
+        Plots are drawn from binned / sampled data in worker processes, and a
+        plot is only re-rendered when its inputs have changed.
+        
         Args:
             results (dict): Detection results
             X_test (np.ndarray): Test data
             output_dir (str): Output directory for plots
+            force (bool): Re-render plots even if their inputs are unchanged
         """
         self.logger.info("Generating visualizations...")
         
         Path(output_dir).mkdir(parents=True, exist_ok=True)
+        status = self.visualizer.render(results, X_test, output_dir, force=force)
         
-        # Create various plots
-        self.visualizer.plot_anomaly_scores(
-            results['isolation_forest']['scores'], 
-            save_path=f"{output_dir}/if_scores.png"
-        )
-        
-        self.visualizer.plot_reconstruction_errors(
-            results['autoencoder']['reconstruction_errors'],
-            results['autoencoder']['threshold'],
-            save_path=f"{output_dir}/ae_errors.png"
-        )
-        
-        self.visualizer.plot_detection_comparison(
-            results, X_test,
-            save_path=f"{output_dir}/detection_comparison.png"
-        )
-        
-        self.logger.info(f"Visualizations saved to {output_dir}")
+        self.logger.info(f"Visualizations saved to {output_dir} ({status})")
+        return status
     
     def save_models(self, model_dir="models/saved_models"):
         """
         Save trained models to disk
         
+        The default 'bundle' format (models.artifact_format) writes a versioned,
+        memory-mappable bundle; 'joblib' writes the legacy pickled artifacts.
+        
         Args:
             model_dir (str): Directory to save models
         """
+        if self.config['models'].get('artifact_format', 'bundle') == 'bundle':
+            self._save_bundle(model_dir)
+        else:
+            self._save_legacy(model_dir)
+        
+        self.logger.info(f"Models saved to {model_dir}")
+    
+    def _bundle_config(self):
+        """Configuration sections that determine the trained models (hashed into bundles)"""
+        # How training is scheduled does not change the models
+        models = {k: v for k, v in self.config['models'].items() if k != 'execution'}
+        return {'models': models, 'data': self.config['data']}
+    
+    def _save_bundle(self, model_dir):
+        """Write preprocessor, packed forest and autoencoder weights as one bundle"""
+        pre_meta, pre_arrays = self.preprocessor.export_state()
+        forest = self.if_detector.packed()
+        ae_meta, ae_arrays = self.ae_detector.export_state()
+        feature_names = list(self.preprocessor.feature_names)
+        sections = {
+            'preprocessor': pre_arrays,
+            'isolation_forest': forest.arrays(),
+            'autoencoder': ae_arrays
+        }
+        metadata = {
+            'preprocessor': pre_meta,
+            'isolation_forest': forest.params(),
+            'autoencoder': ae_meta
+        }
+        # Threshold sketches, so thresholds can keep being recalibrated after loading
+        for name, detector in (('isolation_forest', self.if_detector), ('autoencoder', self.ae_detector)):
+            if detector.sketch is not None:
+                sections[f'{name}_sketch'] = detector.sketch.arrays()
+                metadata[f'{name}_sketch'] = detector.sketch.params()
+        
+        write_bundle(
+            model_dir,
+            sections=sections,
+            schema={
+                'feature_names': feature_names,
+                'n_features': len(feature_names),
+                'categorical_columns': pre_meta['categorical_columns'],
+                'label_col': pre_meta['label_col']
+            },
+            metadata=metadata,
+            config=self._bundle_config()
+        )
+    
+    def _save_legacy(self, model_dir):
+        """Write the pickled Isolation Forest / preprocessor and the Keras model"""
+        import joblib
+        
         Path(model_dir).mkdir(parents=True, exist_ok=True)
         
         # Save Isolation Forest
         joblib.dump(self.if_detector.model, f"{model_dir}/isolation_forest.joblib")
         
-        # Save Autoencoder
+        # Save Autoencoder (Keras model plus TensorFlow-free inference weights)
         self.ae_detector.model.save(f"{model_dir}/autoencoder.h5")
+        self.ae_detector.export_numpy(f"{model_dir}/autoencoder_weights.npz")
         
         # Save preprocessor
         joblib.dump(self.preprocessor, f"{model_dir}/preprocessor.joblib")
         
-        self.logger.info(f"Models saved to {model_dir}")
+        # Save detector state that is not part of the model files
+        with open(f"{model_dir}/metadata.json", 'w') as f:
+            json.dump({
+                'ae_threshold': float(self.ae_detector.threshold),
+                'feature_names': list(self.preprocessor.feature_names),
+                'saved_at': datetime.now().isoformat()
+            }, f, indent=2)
     
-    def load_models(self, model_dir="models/saved_models"):
+    def load_models(self, model_dir="models/saved_models", expected_features=None):
         """
         Load trained models from disk
         
         Args:
-            model_dir (str): Directory containing saved models
+            model_dir (str): Directory containing saved models (bundle or legacy files)
+            expected_features (iterable): Columns of the data to be scored; a bundle
+                whose features are not all present is rejected (BundleSchemaError)
         """
+        if is_bundle(model_dir):
+            self._load_bundle(model_dir, expected_features)
+        else:
+            self._load_legacy(model_dir)
+        
+        self.models_trained = True
+        self.preprocessor_fitted = True
+        self.logger.info(f"Models loaded from {model_dir}")
+    
+    def _load_bundle(self, model_dir, expected_features=None):
+        """Load a bundle with its arrays memory-mapped (shared between processes)"""
+        manifest, arrays = read_bundle(model_dir, mmap=True, expected_features=expected_features)
+        schema, metadata = manifest['schema'], manifest['metadata']
+        
+        preprocessor = NetworkDataPreprocessor.from_state(
+            self.config['data'], schema['feature_names'], metadata['preprocessor'], arrays['preprocessor'],
+            drift_config=self.config.get('drift')
+        )
+        forest = PackedForest.from_arrays(
+            arrays['isolation_forest'], metadata['isolation_forest'],
+            block_size=self.config['models']['isolation_forest'].get('inference_block_size', 1024)
+        )
+        ae_detector = AutoencoderDetector(
+            self.config['models']['autoencoder'], self.config['detection'].get('threshold_percentile', 95)
+        )
+        ae_detector.load_state(metadata['autoencoder'], arrays['autoencoder'])
+        # Bundles written before thresholds were sketched have none
+        sketches = {
+            name: QuantileSketch.from_arrays(arrays[f'{name}_sketch'], metadata[f'{name}_sketch'])
+            for name in ('isolation_forest', 'autoencoder') if f'{name}_sketch' in arrays
+        }
+        
+        # All components must agree on the feature dimension
+        n_features = schema['n_features']
+        dims = {
+            'preprocessor': len(preprocessor.mean_),
+            'isolation_forest': forest.n_features,
+            'autoencoder': ae_detector.scorer.input_dim
+        }
+        mismatched = {name: dim for name, dim in dims.items() if dim != n_features}
+        if mismatched:
+            raise BundleSchemaError(f"Bundle expects {n_features} features but found {mismatched}")
+        
+        if manifest.get('config_hash') != config_hash(self._bundle_config()):
+            self.logger.warning(f"Models in {model_dir} were trained with a different configuration")
+        
+        self.preprocessor = preprocessor
+        self.if_detector.model = None
+        self.if_detector.forest = forest
+        self.if_detector.sketch = sketches.get('isolation_forest')
+        self.if_detector.is_trained = True
+        ae_detector.sketch = sketches.get('autoencoder')
+        self.ae_detector = ae_detector
+    
+    def _load_legacy(self, model_dir):
+        """Load the pickled artifacts written by _save_legacy"""
+        import joblib
+        
         # Load Isolation Forest
         self.if_detector.model = joblib.load(f"{model_dir}/isolation_forest.joblib")
+        self.if_detector.forest = None
+        self.if_detector.sketch = None
+        self.if_detector.is_trained = True
         
-        # Load Autoencoder
-        from tensorflow import keras
-        self.ae_detector.model = keras.models.load_model(f"{model_dir}/autoencoder.h5")
+        # Load Autoencoder: the NumPy engine avoids importing TensorFlow at all
+        weights_path = Path(model_dir) / "autoencoder_weights.npz"
+        engine = self.config['models']['autoencoder'].get('inference_engine', 'numpy')
+        if engine == 'numpy' and weights_path.exists():
+            self.ae_detector.load_numpy(str(weights_path))
+        else:
+            # Inference only, so skip restoring the optimizer/loss
+            from tensorflow import keras
+            self.ae_detector.model = keras.models.load_model(f"{model_dir}/autoencoder.h5", compile=False)
+            self.ae_detector.scorer = None
         
         # Load preprocessor
         self.preprocessor = joblib.load(f"{model_dir}/preprocessor.joblib")
         
-        self.models_trained = True
-        self.preprocessor_fitted = True
-        self.logger.info(f"Models loaded from {model_dir}")
+        # Restore detector state saved alongside the models
+        with open(f"{model_dir}/metadata.json", 'r') as f:
+            metadata = json.load(f)
+        self.ae_detector.threshold = metadata['ae_threshold']
+        self.ae_detector.sketch = None
+        self.ae_detector.is_trained = True
     
     def generate_report(self, results, metrics, output_file="results/detection_report.json"):
         """
@@ -371,6 +976,7 @@ class NetworkAnomalyDetectionSystem:
                 }
             },
             'performance_metrics': metrics,
+            'drift': self.drift_decision or self.preprocessor.drift_status(),
             'configuration': self.config
         }
         
@@ -383,42 +989,127 @@ class NetworkAnomalyDetectionSystem:
         
         return report
     
-    def run_full_pipeline(self, data_path=None, output_dir="results"):
+    def _run_stage(self, stage, func, *args, progress_callback=None, **kwargs):
+        """
+        Run one pipeline stage, recording its duration in timings['pipeline']
+        
+        Args:
+            stage (str): Stage name (one of PIPELINE_STAGES)
+            func (callable): Stage implementation
+            progress_callback (callable): Optional callback(stage, state) invoked
+                with state 'started' and 'completed'
+        """
+        if progress_callback is not None:
+            progress_callback(stage, 'started')
+        t0 = time.perf_counter()
+        out = func(*args, **kwargs)
+        self.timings['pipeline'][f'{stage}_sec'] = time.perf_counter() - t0
+        if progress_callback is not None:
+            progress_callback(stage, 'completed')
+        return out
+    
+    def _skip_stage(self, stage, reason, progress_callback=None):
+        """Record a pipeline stage as done without running it"""
+        self.logger.info(f"Skipping {stage}: {reason}")
+        self.timings['pipeline'][f'{stage}_sec'] = 0.0
+        if progress_callback is not None:
+            progress_callback(stage, 'skipped')
+    
+    def _check_drift(self, data, model_dir):
+        """
+        Score data against the saved models' reference histograms
+        
+        Returns:
+            tuple: (X, y) transformed with the saved preprocessor if the saved models
+                   can be reused, or None if they are missing, incompatible or drifted
+        """
+        decision = {'policy': 'on_drift', 'retrained': True, 'status': None}
+        self.drift_decision = decision
+        try:
+            self.load_models(model_dir, expected_features=data.columns)
+        except (FileNotFoundError, ValueError) as e:
+            # BundleError is a ValueError
+            decision['reason'] = f"no usable saved models ({e})"
+            return None
+        
+        _, X, _, y = self.preprocess_data(data, fit_preprocessor=False)
+        status = self.preprocessor.drift_status()
+        decision['status'] = status
+        if status is None:
+            decision['reason'] = "saved models have no drift reference"
+            return None
+        if status['retrain_recommended']:
+            decision['reason'] = f"drift in {status['drifted_features']}"
+            return None
+        decision['retrained'] = False
+        decision['reason'] = ("insufficient rows to assess drift" if not status['enough_samples']
+                              else "drift within thresholds")
+        return X, y
+    
+    def run_full_pipeline(self, data_path=None, output_dir="results", progress_callback=None,
+                          model_dir="models/saved_models", retrain=None):
         """
         Run the complete anomaly detection pipeline
         
         Args:
             data_path (str): Path to input data
             output_dir (str): Output directory for results
+            model_dir (str): Directory to save trained models
+            progress_callback (callable): Optional callback(stage, state) used to
+                report per-stage progress (see PIPELINE_STAGES)
+            retrain (str): 'always' retrains on every run; 'on_drift' reuses the models
+                in model_dir unless the data has drifted from their training data.
+                Defaults to drift.retrain_policy in the configuration.
             
         Returns:
             dict: Complete results including detection and metrics
         """
         self.logger.info("Starting full anomaly detection pipeline...")
+        self.timings['pipeline'] = {}
+        self.drift_decision = None
+        run_stage = functools.partial(self._run_stage, progress_callback=progress_callback)
+        retrain = retrain or self.config.get('drift', {}).get('retrain_policy', 'always')
         
         # Load data
-        data = self.load_data(data_path, generate_sample=(data_path is None))
+        data = run_stage('load', self.load_data, data_path, generate_sample=(data_path is None))
         
-        # Preprocess data
-        X_train, X_test, y_train, y_test = self.preprocess_data(data)
+        # Reuse the saved models unless the data has drifted
+        reused = None
+        if retrain == 'on_drift':
+            reused = run_stage('preprocess', self._check_drift, data, model_dir)
+            self.logger.info(f"Drift check: {self.drift_decision['reason']}")
         
-        # Train models
-        self.train_models(X_train)
+        if reused is None:
+            # Preprocess data
+            X_train, X_test, y_train, y_test = run_stage('preprocess', self.preprocess_data, data)
+            
+            # Train models
+            run_stage('train', self.train_models, X_train)
+        else:
+            X_test, y_test = reused
+            self._skip_stage('train', self.drift_decision['reason'], progress_callback)
         
         # Detect anomalies
-        results = self.detect_anomalies(X_test)
+        results = run_stage('detect', self.detect_anomalies, X_test)
         
         # Evaluate performance
-        metrics = self.evaluate_performance(results, y_true=y_test if y_test is not None else None)
+        metrics = run_stage('evaluate', self.evaluate_performance, results,
+                            y_true=y_test if y_test is not None else None)
         
         # Generate visualizations
-        self.generate_visualizations(results, X_test, output_dir)
+        run_stage('visualize', self.generate_visualizations, results, X_test, output_dir)
         
         # Save models
-        self.save_models()
+        if reused is None:
+            run_stage('save', self.save_models, model_dir)
+        else:
+            self._skip_stage('save', "models unchanged", progress_callback)
         
-        # Generate report
-        report = self.generate_report(results, metrics, f"{output_dir}/detection_report.json")
+        # Generate report and the per-row result store
+        def write_outputs():
+            self.save_results(results, f"{output_dir}/detection_results", labels=y_test)
+            return self.generate_report(results, metrics, f"{output_dir}/detection_report.json")
+        report = run_stage('report', write_outputs)
         
         self.logger.info("Pipeline completed successfully!")
         
@@ -436,38 +1127,119 @@ def main():
     parser.add_argument("--config", default="config/config.yaml", help="Configuration file path")
     parser.add_argument("--data", help="Input data file path")
     parser.add_argument("--output", default="results", help="Output directory")
-    parser.add_argument("--mode", choices=["train", "detect", "full"], default="full", 
+    parser.add_argument("--mode", choices=["train", "detect", "full", "stream", "sweep", "calibrate", "batch"], default="full", 
                        help="Operation mode")
     parser.add_argument("--load-models", help="Directory containing pre-trained models")
+    parser.add_argument("--chunk-size", type=int,
+                       help="Detect mode: stream --data in chunks of this many rows instead of loading it whole")
+    parser.add_argument("--reset-thresholds", action="store_true",
+                       help="Calibrate mode: fit thresholds on --data only instead of adding it to the training scores")
+    parser.add_argument("--retrain", choices=["always", "on_drift"],
+                       help="Full mode: retrain every run, or only when the data has drifted "
+                            "(default: drift.retrain_policy)")
+    parser.add_argument("--source", default="-",
+                       help="Stream mode: '-' (stdin), tcp://host:port, unix:///path or a CSV/JSONL file to tail")
+    parser.add_argument("--format", choices=["csv", "jsonl"],
+                       help="Stream mode: record format (default: from --source extension, else jsonl)")
+    parser.add_argument("--batch-size", type=int, help="Stream mode: maximum records per micro-batch")
+    parser.add_argument("--max-delay-ms", type=int, help="Stream mode: maximum queueing delay before a batch is scored")
+    parser.add_argument("--stream-output", help="Stream mode: append JSON lines here instead of stdout")
+    parser.add_argument("--emit-all", action="store_true", help="Stream mode: emit every record, not only anomalies")
+    parser.add_argument("--sweep-workers", type=int,
+                       help="Sweep mode: fitting processes (default: sweep.workers, else one per CPU)")
+    parser.add_argument("--top", type=int, default=10, help="Sweep mode: rows of the ranked table to print")
+    parser.add_argument("--batch-workers", type=int,
+                       help="Batch mode: scoring processes (default: batch.workers, else one per CPU)")
+    parser.add_argument("--no-resume", action="store_true",
+                       help="Batch mode: rescore files that an earlier run already scored")
+    parser.add_argument("--startup-profile", action="store_true",
+                       help="Print a cold-start timing report (JSON) and exit")
     
     args = parser.parse_args()
+    checkpoints = {'args_parsed': time.perf_counter()}
     
     # Initialize system
     detector = NetworkAnomalyDetectionSystem(args.config)
+    checkpoints['system_initialized'] = time.perf_counter()
+    
+    if args.startup_profile:
+        print(json.dumps(startup_report(_START_TIME, checkpoints), indent=2))
+        return
     
     if args.mode == "full":
         # Run complete pipeline
-        results = detector.run_full_pipeline(args.data, args.output)
+        results = detector.run_full_pipeline(args.data, args.output, retrain=args.retrain)
         
     elif args.mode == "train":
         # Training mode
-        data = detector.load_data(args.data)
-        X_train, _ = detector.preprocess_data(data)
+        data = detector.load_data(args.data, generate_sample=args.data is None)
+        X_train, _, _, _ = detector.preprocess_data(data)
         detector.train_models(X_train)
         detector.save_models()
         
+    elif args.mode == "sweep":
+        # Ranked grid search over hyperparameters, thresholds and ensemble methods
+        table = detector.run_sweep(args.data, args.output, workers=args.sweep_workers)
+        print(table.head(args.top).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+        
+    elif args.mode == "calibrate":
+        # Recompute thresholds from new traffic and update the saved models in place
+        if not args.data:
+            parser.error("--mode calibrate needs --data")
+        model_dir = args.load_models or "models/saved_models"
+        if not is_bundle(model_dir):
+            parser.error(f"--mode calibrate updates model bundles; {model_dir} is not one "
+                         f"(retrain with models.artifact_format: bundle)")
+        detector.load_models(model_dir)
+        summary = detector.calibrate_thresholds(args.data, args.chunk_size, reset=args.reset_thresholds)
+        detector.save_models(model_dir)
+        print(json.dumps(summary, indent=2))
+        
+    elif args.mode == "batch":
+        # Many capture files (--data is a directory or glob) across worker processes
+        if not args.data:
+            parser.error("--mode batch needs --data (a directory or glob pattern)")
+        report = detector.detect_batch(
+            args.data, args.output, args.load_models or "models/saved_models",
+            workers=args.batch_workers, chunk_size=args.chunk_size, resume=not args.no_resume
+        )
+        print(json.dumps({k: v for k, v in report.items() if k not in ('per_file', 'metrics')}, indent=2, default=str))
+        if report['files']['failed']:
+            sys.exit(1)  # failed files are listed in the report and retried on the next run
+        
+    elif args.mode == "stream":
+        # Continuous detection on live traffic (requires pre-trained models)
+        detector.load_models(args.load_models or "models/saved_models")
+        stream_cfg = detector.config.setdefault('stream', {})
+        if args.batch_size:
+            stream_cfg['batch_size'] = args.batch_size
+        if args.max_delay_ms is not None:
+            stream_cfg['max_delay_ms'] = args.max_delay_ms
+        detector.run_stream(args.source, output=args.stream_output, fmt=args.format, emit_all=args.emit_all)
+        
     elif args.mode == "detect":
         # Detection mode (requires pre-trained models)
         if args.load_models:
-            detector.load_models(args.load_models)
+            expected = detector.data_loader.peek_columns(args.data) if args.data else None
+            detector.load_models(args.load_models, expected_features=expected)
+        
+        if args.chunk_size and args.data:
+            # Out-of-core detection: per-row results are appended chunk by chunk
+            summary = detector.detect_anomalies_chunked(
+                args.data, f"{args.output}/detection_results", args.chunk_size
+            )
+            with open(f"{args.output}/detection_summary.json", 'w') as f:
+                json.dump(summary, f, indent=2, default=str)
+            return
         
-        data = detector.load_data(args.data)
-        _, X_test = detector.preprocess_data(data, fit_preprocessor=False)
+        data = detector.load_data(args.data, generate_sample=args.data is None)
+        _, X_test, _, _ = detector.preprocess_data(data, fit_preprocessor=False)
         results = detector.detect_anomalies(X_test)
         
-        # Save results
-        with open(f"{args.output}/detection_results.json", 'w') as f:
-            json.dump(results, f, indent=2, default=str)
+        # Save per-row results as a columnar store and a small JSON summary
+        detector.save_results(results, f"{args.output}/detection_results", labels=detector.y_test)
+        with open(f"{args.output}/detection_summary.json", 'w') as f:
+            json.dump(results['metadata'], f, indent=2, default=_json_default)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,22 +3,108 @@
 # FILE: src/models/autoencoder.py
 # =============================================================================
 
+import os
+
 import numpy as np
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers
+
+from .numpy_autoencoder import NumpyAutoencoderScorer
+from .quantile_sketch import QuantileSketch, DEFAULT_K
+
+# Rows scored per block when feeding the threshold sketch
+CALIBRATION_BLOCK = 65536
+
+def _open_features(X):
+    """Training input as a list of 2-D arrays: an array (possibly memory-mapped) or .npy file path(s)"""
+    if isinstance(X, (str, os.PathLike)):
+        X = [X]
+    if isinstance(X, (list, tuple)):
+        return [np.load(part, mmap_mode='r') if isinstance(part, (str, os.PathLike)) else part for part in X]
+    return [X]
+
+def _error_sketch_metric(sink):
+    """Keras metric passing every batch's per-row reconstruction errors to sink(errors) -> rows"""
+    import tensorflow as tf
+    from tensorflow import keras
+    
+    class RowErrorSketch(keras.metrics.Metric):
+        def __init__(self):
+            super().__init__(name='row_mse')
+            self.total = self.add_weight(name='total', shape=(), initializer='zeros')
+            self.count = self.add_weight(name='count', shape=(), initializer='zeros')
+        
+        def update_state(self, y_true, y_pred, sample_weight=None):
+            errors = tf.reduce_mean(tf.square(tf.cast(y_true, tf.float32) - tf.cast(y_pred, tf.float32)), axis=1)
+            rows = tf.numpy_function(sink, [errors], tf.float32, stateful=True)
+            self.total.assign_add(tf.reduce_sum(errors))
+            self.count.assign_add(tf.reshape(rows, []))
+        
+        def result(self):
+            return self.total / tf.maximum(self.count, 1.0)
+    
+    return RowErrorSketch()
+
+def _phase_callback(on_phase):
+    """Keras callback calling on_phase('train') as each epoch starts and on_phase('validation') before validating"""
+    from tensorflow import keras
+    
+    class PhaseCallback(keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            on_phase('train')
+        
+        def on_test_begin(self, logs=None):
+            on_phase('validation')
+    
+    return PhaseCallback()
+
+def _best_epoch_callback(monitor, min_delta):
+    """
+    Keras callback keeping the weights of the epoch with the lowest monitor value
+    
+    An epoch counts as the best when it improves on the previous best by more
+    than min_delta, as for EarlyStopping. The kept weights are restored when
+    training ends, whether or not it stopped early.
+    """
+    from tensorflow import keras
+    
+    class BestEpoch(keras.callbacks.Callback):
+        def __init__(self):
+            super().__init__()
+            self.best = np.inf
+            self.best_epoch = None
+            self.best_weights = None
+        
+        def on_epoch_end(self, epoch, logs=None):
+            value = (logs or {}).get(monitor)
+            if value is not None and value < self.best - min_delta:
+                self.best, self.best_epoch = value, epoch
+                self.best_weights = self.model.get_weights()
+        
+        def on_train_end(self, logs=None):
+            if self.best_weights is not None:
+                self.model.set_weights(self.best_weights)
+    
+    return BestEpoch()
 
 class AutoencoderDetector:
     """Autoencoder anomaly detector"""
     
-    def __init__(self, config):
+    def __init__(self, config, threshold_percentile=95):
         self.config = config
+        self.threshold_percentile = threshold_percentile
         self.model = None
+        self.scorer = None
         self.threshold = None
+        self.sketch = None
+        self.epochs_trained = None
         self.is_trained = False
+        self._epoch_sketch = None
     
     def _build_model(self, input_dim):
         """Build autoencoder architecture"""
+        # TensorFlow is only needed for training; scoring can use the NumPy engine
+        from tensorflow import keras
+        from tensorflow.keras import layers
+        
         encoding_dim = self.config.get('encoding_dim', 10)
         
         # Input layer
@@ -36,41 +122,219 @@ class AutoencoderDetector:
         
         # Create model
         autoencoder = keras.Model(input_layer, decoded)
-        autoencoder.compile(optimizer='adam', loss='mse', metrics=['mae'])
+        # The sketch metric is a host callback, which XLA cannot compile
+        autoencoder.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=self.config.get('learning_rate', 0.001)),
+            loss='mse', metrics=['mae', _error_sketch_metric(self._sketch_errors)], jit_compile=False
+        )
         
         return autoencoder
     
-    def train(self, X_train):
-        """Train the autoencoder"""
-        input_dim = X_train.shape[1]
-        self.model = self._build_model(input_dim)
+    @staticmethod
+    def _limit_threads(n_threads):
+        """Cap TensorFlow's op thread pools; only possible before TensorFlow starts executing"""
+        import tensorflow as tf
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+            tf.config.threading.set_inter_op_parallelism_threads(n_threads)
+        except RuntimeError:
+            pass  # already initialized in this process; keep the existing pools
+    
+    def _sketch_errors(self, errors):
+        self._epoch_sketch.update(errors)
+        return np.float32(len(errors))
+    
+    def _dataset(self, arrays, blocks, shuffle, seed):
+        """
+        tf.data pipeline over row blocks of the training arrays
+        
+        Blocks are read one at a time (from memory-mapped arrays, only the
+        block's pages), shuffled in a random block order when training, cut
+        into batches and prefetched while the previous batches train.
+        """
+        import tensorflow as tf
+        
+        batch_size = self.config.get('batch_size', 256)
+        rng = np.random.default_rng(seed)
         
-        # Train model
-        self.model.fit(
-            X_train, X_train,
+        def batches():
+            for b in (rng.permutation(len(blocks)) if shuffle else range(len(blocks))):
+                part, start, stop = blocks[b]
+                block = np.asarray(arrays[part][start:stop], dtype=np.float32)
+                if shuffle:
+                    block = block[rng.permutation(len(block))]
+                for i in range(0, len(block), batch_size):
+                    yield block[i:i + batch_size]
+        
+        dim = arrays[0].shape[1]
+        n_batches = sum(-(-(stop - start) // batch_size) for _, start, stop in blocks)
+        dataset = tf.data.Dataset.from_generator(
+            batches, output_signature=tf.TensorSpec(shape=(None, dim), dtype=tf.float32)
+        )
+        # A known length lets Keras size its epochs (and progress bar) without running out of data
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(n_batches))
+        return dataset.map(lambda x: (x, x)).prefetch(tf.data.AUTOTUNE)
+    
+    def train(self, X_train, cpu_threads=None):
+        """
+        Train the autoencoder (cpu_threads: TensorFlow thread budget, default: all CPUs)
+        
+        X_train may be an array, a memory-mapped array or one or more .npy
+        feature files (opened memory-mapped), read block by block. The last
+        validation_split of every array is held out; training stops once the
+        validation loss has not improved for early_stopping.patience epochs,
+        restoring the best epoch's weights.
+        The threshold comes from the reconstruction errors of that epoch's
+        validation pass (its training batches without a validation split),
+        sketched as they were computed, so no separate inference pass over
+        the training data is needed.
+        """
+        from tensorflow import keras
+        
+        if cpu_threads:
+            self._limit_threads(cpu_threads)
+        arrays = _open_features(X_train)
+        self.model = self._build_model(arrays[0].shape[1])
+        
+        block_rows = self.config.get('stream_block_rows', 65536)
+        split = self.config.get('validation_split', 0.1)
+        train_blocks, val_blocks = [], []
+        for part, array in enumerate(arrays):
+            n_val = int(len(array) * split)
+            for blocks, start, stop in ((train_blocks, 0, len(array) - n_val), (val_blocks, len(array) - n_val, len(array))):
+                blocks.extend((part, i, min(i + block_rows, stop)) for i in range(start, stop, block_rows))
+        
+        seed = self.config.get('random_state', 42)
+        stopping = self.config.get('early_stopping', {})
+        monitor = 'val_loss' if val_blocks else 'loss'
+        min_delta = stopping.get('min_delta', 1e-4)
+        early_stopping = keras.callbacks.EarlyStopping(
+            monitor=monitor, patience=stopping.get('patience', 3), min_delta=min_delta
+        )
+        # Tracked separately: EarlyStopping only restores (and reports) its best epoch on some Keras versions
+        best = _best_epoch_callback(monitor, min_delta)
+        # Error sketches per epoch and phase: training batches are scored by
+        # weights still moving within the epoch, validation by the epoch's final ones
+        epoch_sketches = []
+        k = self.config.get('sketch_k', DEFAULT_K)
+        
+        def start_phase(phase):
+            if phase == 'train':
+                epoch_sketches.append({})
+            self._epoch_sketch = epoch_sketches[-1][phase] = QuantileSketch(k)
+        
+        history = self.model.fit(
+            self._dataset(arrays, train_blocks, shuffle=True, seed=seed),
+            validation_data=self._dataset(arrays, val_blocks, shuffle=False, seed=seed) if val_blocks else None,
             epochs=self.config.get('epochs', 50),
-            batch_size=self.config.get('batch_size', 32),
-            validation_split=self.config.get('validation_split', 0.1),
-            verbose=1,
-            shuffle=True
+            verbose=self.config.get('verbose', 1),
+            shuffle=False,  # the dataset shuffles blocks and rows itself
+            callbacks=[_phase_callback(start_phase), early_stopping, best]
         )
+        self.epochs_trained = len(history.history['loss'])
+        # The sketch metric only works during train(); later evaluate() / fit() calls get plain metrics
+        self.model.compile(optimizer=self.model.optimizer, loss='mse', metrics=['mae'])
         
-        # Calculate threshold from training data
-        train_pred = self.model.predict(X_train)
-        train_mse = np.mean(np.power(X_train - train_pred, 2), axis=1)
-        self.threshold = np.percentile(train_mse, 95)
+        # Any previously loaded NumPy weights are stale now
+        self.scorer = None
+        if self.config.get('inference_engine', 'numpy') == 'numpy':
+            self.export_numpy()
+        
+        # Threshold from the errors of the epoch whose weights were kept
+        sketches = epoch_sketches[best.best_epoch if best.best_epoch is not None else -1]
+        self.sketch = sketches['validation'] if sketches.get('validation', QuantileSketch()).n else sketches['train']
+        self._epoch_sketch = None
+        self.threshold = self.sketch.quantile(self.threshold_percentile / 100)
         self.is_trained = True
     
+    def calibrate(self, X, reset=False):
+        """
+        Add the reconstruction errors of X to the error sketch and recompute the threshold
+        
+        The threshold is the threshold_percentile of all errors sketched so far.
+        Errors are computed block by block and never held for all of X, so X
+        may be a memory-mapped array larger than memory; successive calls
+        (e.g. one per chunk) accumulate unless reset.
+        
+        Returns:
+            float: The new threshold
+        """
+        if not self.is_trained:
+            raise ValueError("Model not trained")
+        if reset or self.sketch is None:
+            self.sketch = QuantileSketch(self.config.get('sketch_k', DEFAULT_K))
+        for start in range(0, len(X), CALIBRATION_BLOCK):
+            self.sketch.update(self.reconstruction_errors(X[start:start + CALIBRATION_BLOCK]))
+        if self.sketch.n:
+            self.threshold = self.sketch.quantile(self.threshold_percentile / 100)
+        return self.threshold
+    
+    def export_numpy(self, path=None):
+        """
+        Extract the trained weights into a NumPy scorer used for inference
+        
+        Args:
+            path (str): Optional .npz file to also save the weights to
+            
+        Returns:
+            NumpyAutoencoderScorer: The scorer (also kept as self.scorer)
+        """
+        if self.model is None:
+            raise ValueError("Model not trained")
+        self.scorer = NumpyAutoencoderScorer.from_keras(
+            self.model, block_size=self.config.get('inference_block_size', 8192)
+        )
+        if path is not None:
+            self.scorer.save(path)
+        return self.scorer
+    
+    def load_numpy(self, path):
+        """Load a NumPy scorer saved by export_numpy (no TensorFlow import)"""
+        self.scorer = NumpyAutoencoderScorer.load(
+            path, block_size=self.config.get('inference_block_size', 8192)
+        )
+        return self.scorer
+    
+    def export_state(self):
+        """Threshold/activations and weight arrays of the NumPy scorer, used to write model bundles"""
+        scorer = self.scorer or self.export_numpy()
+        arrays = {}
+        for i, (w, b) in enumerate(zip(scorer.weights, scorer.biases)):
+            arrays[f'kernel_{i}'] = w
+            arrays[f'bias_{i}'] = b
+        meta = {'threshold': float(self.threshold), 'activations': scorer.activations}
+        return meta, arrays
+    
+    def load_state(self, meta, arrays):
+        """Restore an inference-only detector from export_state() output"""
+        n_layers = len(meta['activations'])
+        self.scorer = NumpyAutoencoderScorer(
+            [arrays[f'kernel_{i}'] for i in range(n_layers)],
+            [arrays[f'bias_{i}'] for i in range(n_layers)],
+            meta['activations'],
+            block_size=self.config.get('inference_block_size', 8192)
+        )
+        self.model = None
+        self.threshold = meta['threshold']
+        self.is_trained = True
+    
+    def reconstruction_errors(self, X):
+        """Per-row MSE, using the NumPy scorer when available and Keras otherwise"""
+        if self.scorer is not None:
+            return self.scorer.reconstruction_errors(X)
+        # Large batches keep Keras' per-call overhead low
+        reconstructions = self.model.predict(
+            X, batch_size=self.config.get('predict_batch_size', 4096), verbose=0
+        )
+        return np.mean(np.power(X - reconstructions, 2), axis=1)
+    
     def predict(self, X_test):
         """Predict anomalies"""
         if not self.is_trained:
             raise ValueError("Model not trained")
         
-        # Get reconstructions
-        reconstructions = self.model.predict(X_test)
-        
         # Calculate reconstruction errors
-        mse = np.mean(np.power(X_test - reconstructions, 2), axis=1)
+        mse = self.reconstruction_errors(X_test)
         
         # Classify anomalies
         anomalies = mse > self.threshold
@@ -0,0 +1,142 @@
+# =============================================================================
+# FILE: src/models/bundle.py
+# =============================================================================
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+BUNDLE_FORMAT = 'netsec-anomaly-bundle'
+BUNDLE_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+class BundleError(ValueError):
+    """Raised when a model bundle is missing, corrupt or of an unsupported version"""
+
+class BundleSchemaError(BundleError):
+    """Raised when a bundle's feature schema does not match what the caller expects"""
+
+def config_hash(config):
+    """Stable short hash of a (JSON-serialisable) configuration dict"""
+    payload = json.dumps(config, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+def is_bundle(path):
+    return (Path(path) / MANIFEST_FILE).exists()
+
+def write_bundle(path, sections, schema, metadata=None, config=None):
+    """
+    Write a model bundle directory
+
+    Layout: ``manifest.json`` plus one raw ``.npy`` file per array under
+    ``<section>/``. The bundle is written to a temporary sibling directory
+    and renamed into place, so readers never see a half-written bundle.
+    Only a missing or empty directory, or an earlier bundle, is replaced:
+    the swap removes the old directory with everything in it.
+
+    Args:
+        path (str): Bundle directory
+        sections (dict): section name -> {array name -> np.ndarray}
+        schema (dict): Feature schema; must contain 'feature_names'
+        metadata (dict): section name -> JSON-serialisable scalars
+        config (dict): Configuration the models were trained with (hashed)
+
+    Returns:
+        dict: The manifest that was written
+
+    Raises:
+        BundleError: If path holds anything other than a bundle (e.g. legacy model files)
+    """
+    path = Path(path)
+    if path.exists() and not is_bundle(path) and (not path.is_dir() or any(path.iterdir())):
+        raise BundleError(f"{path} exists and is not a model bundle; refusing to replace it")
+    tmp = path.with_name(path.name + '.tmp')
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    arrays = {}
+    for section, section_arrays in sections.items():
+        (tmp / section).mkdir()
+        for name, array in section_arrays.items():
+            array = np.ascontiguousarray(array)
+            if array.dtype == object:
+                raise BundleError(f"{section}/{name}: object arrays cannot be memory-mapped")
+            rel = f"{section}/{name}.npy"
+            np.save(tmp / rel, array, allow_pickle=False)
+            arrays[f"{section}/{name}"] = {'file': rel, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+    manifest = {
+        'format': BUNDLE_FORMAT,
+        'version': BUNDLE_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'config_hash': config_hash(config) if config is not None else None,
+        'schema': schema,
+        'metadata': metadata or {},
+        'arrays': arrays,
+    }
+    with open(tmp / MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap in the new bundle (keep the old one only until the rename succeeds)
+    old = path.with_name(path.name + '.old')
+    if old.exists():
+        shutil.rmtree(old)
+    if path.exists():
+        os.replace(path, old)
+    os.replace(tmp, path)
+    if old.exists():
+        shutil.rmtree(old)
+    return manifest
+
+def read_bundle(path, mmap=True, expected_features=None):
+    """
+    Read a model bundle written by write_bundle
+
+    Args:
+        path (str): Bundle directory
+        mmap (bool): Memory-map arrays read-only, so processes loading the
+            same bundle share pages instead of holding private copies
+        expected_features (iterable): Columns available to score; the bundle
+            is rejected if any of its features is missing
+
+    Returns:
+        tuple: (manifest dict, section name -> {array name -> np.ndarray})
+
+    Raises:
+        BundleError: If the bundle is missing, corrupt or of another version
+        BundleSchemaError: If the feature schema does not match
+    """
+    path = Path(path)
+    try:
+        with open(path / MANIFEST_FILE, 'r') as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise BundleError(f"No model bundle at {path}")
+    except json.JSONDecodeError as e:
+        raise BundleError(f"Corrupt bundle manifest at {path}: {e}")
+
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise BundleError(f"{path} is not a model bundle")
+    if manifest.get('version') != BUNDLE_VERSION:
+        raise BundleError(f"Unsupported bundle version {manifest.get('version')} (expected {BUNDLE_VERSION})")
+
+    feature_names = manifest['schema']['feature_names']
+    if expected_features is not None:
+        missing = sorted(set(feature_names) - set(expected_features))
+        if missing:
+            raise BundleSchemaError(f"Input is missing bundle features: {missing}")
+
+    sections = {}
+    for key, info in manifest['arrays'].items():
+        section, name = key.split('/', 1)
+        array = np.load(path / info['file'], mmap_mode='r' if mmap else None, allow_pickle=False)
+        if array.dtype.str != info['dtype'] or list(array.shape) != info['shape']:
+            raise BundleError(f"{key}: expected {info['dtype']}{info['shape']}, found {array.dtype.str}{list(array.shape)}")
+        sections.setdefault(section, {})[name] = array
+    return manifest, sections
@@ -5,12 +5,44 @@
 
 import numpy as np
 
+CASCADE_RULES = ('union', 'intersection')
+
 class EnsembleDetector:
     """Ensemble method combining multiple detectors"""
     
     def __init__(self, config):
         self.config = config
         self.method = config.get('ensemble_method', 'majority_vote')
+        cascade = config.get('cascade', {})
+        self.band = (cascade.get('lower', 0.0), cascade.get('upper', 0.03))
+        self.cascade_rule = cascade.get('combine', 'union')
+        if self.is_cascade:
+            if self.cascade_rule not in CASCADE_RULES:
+                raise ValueError(f"Unknown cascade combine rule '{self.cascade_rule}' (choose from {CASCADE_RULES})")
+            # Inside a band with lower >= 0 the IF never flags a row, so intersection could never flag one either
+            if self.cascade_rule == 'intersection' and self.band[0] >= 0:
+                raise ValueError(f"cascade combine 'intersection' needs a negative lower bound (got {self.band[0]}), "
+                                 f"otherwise the autoencoder can never change a verdict")
+    
+    @property
+    def is_cascade(self):
+        """Cascade: IF scores every row, the autoencoder only the uncertain ones"""
+        return self.method == 'cascade'
+    
+    def uncertain(self, if_scores):
+        """Rows whose IF decision score lies inside the uncertainty band [lower, upper]"""
+        lower, upper = self.band
+        return (if_scores >= lower) & (if_scores <= upper)
+    
+    def combine_cascade(self, if_scores, ae_anomalies, uncertain):
+        """
+        Cascade decision: rows outside the band keep the IF verdict; rows inside
+        it combine the IF and AE flags with cascade_rule ('union' or 'intersection')
+        """
+        if_anomalies = if_scores < 0
+        if self.cascade_rule == 'intersection':
+            return np.where(uncertain, if_anomalies & ae_anomalies, if_anomalies)
+        return if_anomalies | (uncertain & ae_anomalies)
     
     def combine_predictions(self, if_predictions, ae_anomalies):
         """Combine predictions from IF and AE"""
@@ -0,0 +1,229 @@
+# =============================================================================
+# FILE: src/models/forest.py
+# =============================================================================
+
+import numpy as np
+
+EULER_GAMMA = 0.5772156649015329
+
+def average_path_length(n_samples):
+    """Average path length of an unsuccessful BST search over n samples (c(n) in the iForest paper)"""
+    n = np.asarray(n_samples, dtype=np.float64)
+    out = np.zeros_like(n)
+    out[n == 2] = 1.0
+    big = n > 2
+    out[big] = 2.0 * (np.log(n[big] - 1.0) + EULER_GAMMA) - 2.0 * (n[big] - 1.0) / n[big]
+    return out
+
+def _floor_float32(values):
+    """Largest float32 <= each float64 value, so that for float32 x: x <= t  <=>  x <= floor32(t)"""
+    out = values.astype(np.float32)
+    over = out.astype(np.float64) > values
+    out[over] = np.nextafter(out[over], np.float32(-np.inf))
+    return out
+
+class PackedForest:
+    """
+    Isolation Forest packed into flat NumPy arrays
+
+    All trees' nodes are concatenated; ``roots`` holds each tree's root
+    index, ``left``/``right`` are absolute node indices (leaves point to
+    themselves), ``feature`` is the global column index (-1 at leaves) and
+    ``value`` is, at leaves, the path length contributed by ending there
+    (node depth plus c(n_node_samples)). Scores follow scikit-learn's
+    ``score_samples`` / ``decision_function`` conventions.
+
+    For scoring, the trees are compiled into complete binary trees of the
+    forest's maximum depth (children of slot i at 2i+1 / 2i+2, shallow
+    leaves padded with always-left splits). Every row then walks all trees
+    together, one level per step, with no per-tree Python loop. Forests
+    too deep for that layout fall back to following the node pointers.
+    """
+
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+    # Largest complete-tree layout (in nodes across all trees) worth compiling
+    MAX_COMPILED_NODES = 1 << 23
+
+    def __init__(self, feature, threshold, left, right, value, roots, offset, max_samples, n_features,
+                 block_size=1024):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.offset = float(offset)
+        self.max_samples = int(max_samples)
+        self.n_features = int(n_features)
+        self.block_size = int(block_size)
+        self.denominator = len(roots) * float(average_path_length([self.max_samples])[0])
+        self._compiled = None
+
+    @staticmethod
+    def _node_depths(left, right, roots):
+        """Depth of every node (root = 0) and its slot in a complete binary tree, level by level"""
+        depth = np.zeros(len(left), dtype=np.int64)
+        slot = np.zeros(len(left), dtype=np.int64)
+        frontier = np.asarray(roots, dtype=np.int64)
+        while frontier.size:
+            frontier = frontier[left[frontier] != frontier]
+            lc, rc = left[frontier], right[frontier]
+            depth[lc] = depth[rc] = depth[frontier] + 1
+            slot[lc] = 2 * slot[frontier] + 1
+            slot[rc] = 2 * slot[frontier] + 2
+            frontier = np.concatenate([lc, rc])
+        return depth, slot
+
+    @classmethod
+    def from_sklearn(cls, model, block_size=1024):
+        """Pack a fitted sklearn.ensemble.IsolationForest"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        base = 0
+        n_features = model.n_features_in_
+        for estimator, est_features in zip(model.estimators_, model.estimators_features_):
+            tree = estimator.tree_
+            idx = np.arange(tree.node_count, dtype=np.int64)
+            is_leaf = tree.children_left < 0
+            left = np.where(is_leaf, idx, tree.children_left)
+            right = np.where(is_leaf, idx, tree.children_right)
+            depth, _ = cls._node_depths(left, right, [0])
+
+            # Trees see a feature subset only when max_features < n_features
+            local = tree.feature.astype(np.int64)
+            if len(est_features) != n_features:
+                local = np.asarray(est_features)[np.maximum(local, 0)]
+
+            features.append(np.where(is_leaf, -1, local).astype(np.int32))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append((left + base).astype(np.int32))
+            rights.append((right + base).astype(np.int32))
+            values.append(np.where(is_leaf, depth + average_path_length(tree.n_node_samples), 0.0))
+            roots.append(base)
+            base += tree.node_count
+
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+            np.concatenate(rights), np.concatenate(values), np.asarray(roots, dtype=np.int32),
+            offset=model.offset_, max_samples=model.max_samples_, n_features=n_features,
+            block_size=block_size
+        )
+
+    def arrays(self):
+        """Node arrays by name (see ARRAYS)"""
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    def params(self):
+        """Scalar parameters needed to rebuild the forest with from_arrays"""
+        return {'offset': self.offset, 'max_samples': self.max_samples, 'n_features': self.n_features}
+
+    @classmethod
+    def from_arrays(cls, arrays, params, block_size=1024):
+        """Rebuild from arrays() and params() output (arrays may be memory-mapped)"""
+        return cls(*(arrays[name] for name in cls.ARRAYS), **params, block_size=block_size)
+
+    def _compile(self):
+        """Build (once) the complete-tree layout used by path_lengths; None if too large"""
+        if self._compiled is not None:
+            return self._compiled or None
+        left = np.asarray(self.left, dtype=np.int64)
+        right = np.asarray(self.right, dtype=np.int64)
+        roots = np.asarray(self.roots, dtype=np.int64)
+        depth, slot = self._node_depths(left, right, roots)
+        max_depth = int(depth.max()) if len(depth) else 0
+        n_trees = len(roots)
+        n_inner, n_leaf = (1 << max_depth) - 1, 1 << max_depth
+        if n_trees * (n_inner + n_leaf) > self.MAX_COMPILED_NODES:
+            self._compiled = False
+            return None
+
+        # Owning tree of every node (nodes of one tree are contiguous, starting at its root)
+        tree_of = np.repeat(np.arange(n_trees), np.diff(np.append(roots, len(left))))
+        inner = np.asarray(self.feature) >= 0
+
+        # Unused slots split on feature 0 with threshold +inf, i.e. always go left
+        feature = np.zeros(n_trees * n_inner, dtype=np.intp)
+        threshold = np.full(n_trees * n_inner, np.inf, dtype=np.float32)
+        pos = tree_of[inner] * n_inner + slot[inner]
+        feature[pos] = np.asarray(self.feature)[inner]
+        threshold[pos] = _floor_float32(np.asarray(self.threshold)[inner])
+
+        # A leaf at depth d ends on the leftmost bottom slot of its padded subtree
+        leaves = ~inner
+        shift = max_depth - depth[leaves]
+        bottom = ((slot[leaves] + 1) << shift) - 1 - n_inner
+        value = np.zeros(n_trees * n_leaf, dtype=np.float64)
+        value[tree_of[leaves] * n_leaf + bottom] = np.asarray(self.value)[leaves]
+
+        self._compiled = (max_depth, feature, threshold, value, n_inner, n_leaf)
+        return self._compiled
+
+    @property
+    def compiled(self):
+        """True if scoring uses the complete-tree layout rather than the pointer fallback"""
+        return self._compile() is not None
+
+    def _path_lengths_compiled(self, X, compiled):
+        max_depth, feature, threshold, value, n_inner, n_leaf = compiled
+        n_trees = len(self.roots)
+        tree_base = np.arange(n_trees, dtype=np.intp) * n_inner
+        # Absolute slot s of tree t has its left child at 2*s + 1 - tree_base[t]
+        child_offset = 1 - tree_base
+        leaf_offset = np.arange(n_trees, dtype=np.intp) * n_leaf - tree_base - n_inner
+        n_cols = X.shape[1]
+
+        depths = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.block_size):
+            block = X[start:start + self.block_size]
+            flat = block.ravel()
+            row_offset = (np.arange(len(block), dtype=np.intp) * n_cols)[:, None]
+            node = np.broadcast_to(tree_base, (len(block), n_trees)).copy()
+            for _ in range(max_depth):
+                go_right = flat.take(row_offset + feature.take(node)) > threshold.take(node)
+                node *= 2
+                node += child_offset
+                node += go_right
+            depths[start:start + len(block)] = value.take(node + leaf_offset).sum(axis=1)
+        return depths
+
+    def _path_lengths_pointers(self, X):
+        feature = np.asarray(self.feature, dtype=np.intp)
+        safe_feature = np.maximum(feature, 0)
+        left = np.asarray(self.left, dtype=np.intp)
+        right = np.asarray(self.right, dtype=np.intp)
+        threshold = np.asarray(self.threshold)
+        n_cols = X.shape[1]
+
+        depths = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.block_size):
+            block = X[start:start + self.block_size]
+            flat = block.ravel()
+            row_offset = (np.arange(len(block), dtype=np.intp) * n_cols)[:, None]
+            node = np.broadcast_to(np.asarray(self.roots, dtype=np.intp), (len(block), len(self.roots))).copy()
+            while (feature.take(node) >= 0).any():
+                go_left = flat.take(row_offset + safe_feature.take(node)) <= threshold.take(node)
+                node = np.where(go_left, left.take(node), right.take(node))
+            depths[start:start + len(block)] = np.asarray(self.value).take(node).sum(axis=1)
+        return depths
+
+    def path_lengths(self, X):
+        """Summed path length over all trees for each row, scored in row blocks"""
+        # Trees split on float32 features, as in scikit-learn
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got array of shape {X.shape}")
+        compiled = self._compile()
+        if compiled is None:
+            return self._path_lengths_pointers(X)
+        return self._path_lengths_compiled(X, compiled)
+
+    def score_samples(self, X):
+        """Opposite of the anomaly score (lower is more abnormal), as sklearn's score_samples"""
+        depths = self.path_lengths(X)
+        if self.denominator == 0:
+            return -np.ones(len(depths))
+        return -(2.0 ** (-depths / self.denominator))
+
+    def decision_function(self, X):
+        """score_samples shifted by the fitted offset; negative values are anomalies"""
+        return self.score_samples(X) - self.offset
@@ -4,8 +4,12 @@
 # =============================================================================
 
 import numpy as np
-from sklearn.ensemble import IsolationForest
-import joblib
+
+from .forest import PackedForest
+from .quantile_sketch import QuantileSketch, DEFAULT_K
+
+# Rows scored per block when feeding threshold sketches
+CALIBRATION_BLOCK = 65536
 
 class IsolationForestDetector:
     """Isolation Forest anomaly detector"""
@@ -13,26 +17,107 @@ class IsolationForestDetector:
     def __init__(self, config):
         self.config = config
         self.model = None
+        self.forest = None
+        self.sketch = None
         self.is_trained = False
     
-    def train(self, X_train):
-        """Train the Isolation Forest model"""
+    def train(self, X_train, n_jobs=None):
+        """
+        Train the Isolation Forest model (n_jobs: worker threads, default config 'n_jobs' or all CPUs)
+        
+        The training rows are scored once: the scores seed the threshold sketch
+        and give the exact contamination percentile as the offset, as sklearn
+        computes it. (sklearn's own fit would score the training set again just
+        for the offset, so the forest is fitted with contamination='auto'.)
+        """
+        from sklearn.ensemble import IsolationForest
+        
+        contamination = self.config.get('contamination', 0.1)
         self.model = IsolationForest(
-            contamination=self.config.get('contamination', 0.1),
+            contamination='auto',
             n_estimators=self.config.get('n_estimators', 100),
             random_state=self.config.get('random_state', 42),
-            n_jobs=-1
+            n_jobs=n_jobs or self.config.get('n_jobs', -1)
         )
         self.model.fit(X_train)
+        self.model.contamination = contamination
+        self.forest = None
         self.is_trained = True
+        
+        self.sketch = QuantileSketch(self.config.get('sketch_k', DEFAULT_K))
+        scores = np.empty(len(X_train))
+        for start in range(0, len(X_train), CALIBRATION_BLOCK):
+            block = self._score_samples(X_train[start:start + CALIBRATION_BLOCK])
+            scores[start:start + len(block)] = block
+            self.sketch.update(block)
+        if contamination != 'auto':
+            self._set_offset(np.percentile(scores, 100.0 * contamination))
+    
+    def _score_samples(self, X):
+        engine = self.config.get('scoring_engine', 'packed')
+        if self.model is None or (engine == 'packed' and self.packed().compiled):
+            return self.packed().score_samples(X)
+        return self.model.score_samples(X)
+    
+    def _set_offset(self, offset):
+        if self.model is not None:
+            self.model.offset_ = offset
+        if self.forest is not None:
+            self.forest.offset = offset
+    
+    def calibrate(self, X, reset=False):
+        """
+        Add X to the score sketch and move the decision threshold to its contamination quantile
+        
+        Scores are sketched block by block, so X may be a memory-mapped array
+        larger than memory; successive calls (e.g. one per chunk) accumulate
+        unless reset. With contamination 'auto' the offset stays at sklearn's.
+        
+        Returns:
+            float: The offset subtracted from score_samples (decision scores below 0 are anomalies)
+        """
+        if not self.is_trained:
+            raise ValueError("Model not trained")
+        if reset or self.sketch is None:
+            self.sketch = QuantileSketch(self.config.get('sketch_k', DEFAULT_K))
+        for start in range(0, len(X), CALIBRATION_BLOCK):
+            self.sketch.update(self._score_samples(X[start:start + CALIBRATION_BLOCK]))
+        
+        contamination = self.config.get('contamination', 0.1)
+        if contamination != 'auto' and self.sketch.n:
+            self._set_offset(self.sketch.quantile(contamination))
+        return self.offset
+    
+    @property
+    def offset(self):
+        """Offset subtracted from score_samples to give decision scores (below 0 are anomalies)"""
+        return self.model.offset_ if self.model is not None else self.packed().offset
+    
+    def packed(self):
+        """PackedForest view of the trained model (built once, then cached)"""
+        if self.forest is None:
+            if self.model is None:
+                raise ValueError("Model not trained")
+            self.forest = PackedForest.from_sklearn(
+                self.model, block_size=self.config.get('inference_block_size', 1024)
+            )
+        return self.forest
     
     def predict(self, X_test):
         """Predict anomalies"""
         if not self.is_trained:
             raise ValueError("Model not trained")
         
-        scores = self.model.decision_function(X_test)
-        predictions = self.model.predict(X_test)  # -1 for anomaly, 1 for normal
+        engine = self.config.get('scoring_engine', 'packed')
+        if self.model is None or (engine == 'packed' and self.packed().compiled):
+            # All trees traversed together in one vectorized pass (also used for bundles)
+            scores = self.packed().decision_function(X_test)
+        else:
+            # sklearn also beats the packed pointer fallback on very deep forests
+            scores = self.model.decision_function(X_test)
+        
+        # Labels come from the same scores (sklearn's predict would traverse the trees again)
+        predictions = np.where(scores < 0, -1, 1)  # -1 for anomaly, 1 for normal
         
         return {
             'scores': scores,
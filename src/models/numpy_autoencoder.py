@@ -0,0 +1,101 @@
+# =============================================================================
+# FILE: src/models/numpy_autoencoder.py
+# =============================================================================
+
+import numpy as np
+
+def _sigmoid(h):
+    np.negative(h, out=h)
+    np.exp(h, out=h)
+    h += 1.0
+    np.reciprocal(h, out=h)
+
+# In-place activation functions keyed by Keras activation name
+_ACTIVATIONS = {
+    'linear': None,
+    'relu': lambda h: np.maximum(h, 0.0, out=h),
+    'tanh': lambda h: np.tanh(h, out=h),
+    'sigmoid': _sigmoid,
+}
+
+class NumpyAutoencoderScorer:
+    """
+    TensorFlow-free float32 forward pass of a trained dense autoencoder
+
+    Rows are scored in blocks of ``block_size``, so memory stays bounded by
+    one block's activations regardless of the input size.
+    """
+
+    def __init__(self, weights, biases, activations, block_size=8192):
+        if not (len(weights) == len(biases) == len(activations)):
+            raise ValueError("weights, biases and activations must have the same length")
+        for act in activations:
+            if act not in _ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {act}")
+        self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.activations = list(activations)
+        self.block_size = int(block_size)
+
+    @property
+    def input_dim(self):
+        return self.weights[0].shape[0]
+
+    @classmethod
+    def from_keras(cls, model, block_size=8192):
+        """Extract Dense layer kernels, biases and activations from a Keras model"""
+        weights, biases, activations = [], [], []
+        for layer in model.layers:
+            params = layer.get_weights()
+            if not params:
+                continue  # Input layer
+            kernel, bias = params
+            weights.append(kernel)
+            biases.append(bias)
+            activations.append(layer.get_config().get('activation', 'linear'))
+        return cls(weights, biases, activations, block_size=block_size)
+
+    def save(self, path):
+        """Save weights to a compact .npz file"""
+        arrays = {}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'kernel_{i}'] = w
+            arrays[f'bias_{i}'] = b
+        np.savez(path, activations=np.array(self.activations), **arrays)
+
+    @classmethod
+    def load(cls, path, block_size=8192):
+        """Load weights saved by save()"""
+        with np.load(path) as data:
+            activations = [str(a) for a in data['activations']]
+            weights = [data[f'kernel_{i}'] for i in range(len(activations))]
+            biases = [data[f'bias_{i}'] for i in range(len(activations))]
+        return cls(weights, biases, activations, block_size=block_size)
+
+    def _forward(self, block):
+        h = block
+        for w, b, act in zip(self.weights, self.biases, self.activations):
+            h = h @ w
+            h += b
+            if _ACTIVATIONS[act] is not None:
+                _ACTIVATIONS[act](h)
+        return h
+
+    def reconstruct(self, X):
+        """Full reconstruction of X (allocates an output of X's shape)"""
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty_like(X)
+        for start in range(0, len(X), self.block_size):
+            out[start:start + self.block_size] = self._forward(X[start:start + self.block_size])
+        return out
+
+    def reconstruction_errors(self, X):
+        """Per-row mean squared reconstruction error, computed block by block"""
+        X = np.asarray(X)
+        errors = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.block_size):
+            block = np.asarray(X[start:start + self.block_size], dtype=np.float32)
+            diff = self._forward(block)
+            diff -= block
+            errors[start:start + len(block)] = np.einsum('ij,ij->i', diff, diff) / block.shape[1]
+        return errors
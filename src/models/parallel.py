@@ -0,0 +1,216 @@
+# =============================================================================
+# FILE: src/models/parallel.py
+# =============================================================================
+
+import os
+import threading
+from contextlib import contextmanager
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+MODELS = ('isolation_forest', 'autoencoder')
+
+class SharedArray:
+    """
+    A read-only NumPy array in shared memory, passed to worker processes by name
+
+    The array is copied into the segment once; workers attach to it without
+    pickling or copying the data.
+    """
+
+    def __init__(self, array: np.ndarray):
+        array = np.ascontiguousarray(array)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)[...] = array
+        self.spec = (self._shm.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def attach(spec) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+        """Open a segment in a worker; returns (handle to close when done, read-only view)"""
+        name, shape, dtype = spec
+        # Workers are children of the creating process and share its resource
+        # tracker, so the segment is released once, by SharedArray.close()
+        shm = shared_memory.SharedMemory(name=name)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        view.flags.writeable = False
+        return shm, view
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+def _fit_isolation_forest(config: dict, spec, n_jobs: int):
+    """Worker process body: fit an Isolation Forest on a shared array; returns the sklearn model and score sketch"""
+    from .isolation_forest import IsolationForestDetector
+
+    shm, X = SharedArray.attach(spec)
+    try:
+        detector = IsolationForestDetector(config)
+        detector.train(X, n_jobs=n_jobs)
+        return detector.model, detector.sketch
+    finally:
+        del X
+        shm.close()
+
+class ModelExecutor:
+    """
+    Run the Isolation Forest and autoencoder side by side
+
+    ``executor`` (config 'models.execution') selects how:
+
+    - 'serial': one after the other in the calling thread
+    - 'thread': each model on its own thread, reading the same input array;
+      scikit-learn tree building, TensorFlow and NumPy kernels release the GIL
+    - 'process': the Isolation Forest is trained in a worker process that
+      reads the input from shared memory, while the autoencoder trains in
+      this process; scoring uses threads, as both scorers are NumPy kernels
+      that release the GIL and a process round trip would cost more than it saves
+
+    Each model gets a CPU budget (``cpu_budget``: n_jobs for the forest, the
+    TensorFlow / BLAS thread count for the autoencoder); by default the
+    machine's CPUs are split between the two, or given whole to each when
+    serial. Every run reports per-model
+    time, wall-clock time and how long the two actually overlapped.
+    """
+
+    MODES = ('serial', 'thread', 'process')
+
+    def __init__(self, config: dict = None):
+        config = config or {}
+        self.mode = config.get('executor', 'thread')
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unknown executor '{self.mode}' (choose from {self.MODES})")
+        cpus = os.cpu_count() or 1
+        budget = config.get('cpu_budget') or {}
+        # Run one after the other, each model may use the whole machine
+        if_cpus = budget.get('isolation_forest') or (cpus if self.mode == 'serial' else max(1, cpus // 2))
+        ae_cpus = budget.get('autoencoder') or (cpus if self.mode == 'serial' else max(1, cpus - if_cpus))
+        self.cpu_budget = {'isolation_forest': int(if_cpus), 'autoencoder': int(ae_cpus)}
+        self._threads = None
+        self._processes = None
+        self._blas = None
+        self._blas_users = 0
+        self._blas_limiter = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _limit_blas(self):
+        """
+        Cap BLAS threads at the autoencoder's budget while both models score
+
+        BLAS limits are process wide, so the cap is applied by the first
+        concurrent caller and lifted when the last one leaves; other BLAS work
+        in the process (e.g. server requests) is capped only meanwhile.
+        """
+        if self.cpu_budget['autoencoder'] >= (os.cpu_count() or 1):
+            yield
+            return
+        with self._lock:
+            if self._blas is None:
+                try:
+                    from threadpoolctl import ThreadpoolController
+                    # Discovering the loaded libraries is the slow part; do it once
+                    self._blas = ThreadpoolController()
+                except ImportError:
+                    self._blas = False
+            if self._blas and self._blas_users == 0:
+                self._blas_limiter = self._blas.limit(limits=self.cpu_budget['autoencoder'], user_api='blas')
+            self._blas_users += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._blas_users -= 1
+                if self._blas_users == 0 and self._blas_limiter is not None:
+                    self._blas_limiter.restore_original_limits()
+                    self._blas_limiter = None
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=len(MODELS), thread_name_prefix='model')
+            return self._threads
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._processes is None:
+                # spawn: never fork a process that may already be running TensorFlow threads
+                self._processes = ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn'))
+            return self._processes
+
+    def _run(self, jobs: Dict[str, Callable[[], object]]) -> Tuple[Dict[str, object], Dict[str, float]]:
+        """Run named jobs (concurrently unless serial); return results and a timing report"""
+        spans = {}
+
+        def timed(name, func):
+            start = time.perf_counter()
+            try:
+                return func()
+            finally:
+                spans[name] = (start, time.perf_counter())
+
+        t0 = time.perf_counter()
+        if self.mode == 'serial':
+            results = {name: timed(name, func) for name, func in jobs.items()}
+        else:
+            pool = self._thread_pool()
+            futures = {name: pool.submit(timed, name, func) for name, func in jobs.items()}
+            results = {name: future.result() for name, future in futures.items()}
+        wall = time.perf_counter() - t0
+
+        report = {f'{name}_sec': spans[name][1] - spans[name][0] for name in jobs}
+        starts, ends = zip(*spans.values())
+        report['wall_sec'] = wall
+        report['overlap_sec'] = max(0.0, min(ends) - max(starts)) if len(spans) > 1 else 0.0
+        return results, report
+
+    def train(self, if_detector, ae_detector, X_train: np.ndarray) -> Dict[str, float]:
+        """Train both detectors on X_train; returns the timing report"""
+        budget = self.cpu_budget
+
+        def train_forest():
+            if self.mode != 'process':
+                if_detector.train(X_train, n_jobs=budget['isolation_forest'])
+                return
+            shared = SharedArray(X_train)
+            try:
+                model, sketch = self._process_pool().submit(
+                    _fit_isolation_forest, if_detector.config, shared.spec, budget['isolation_forest']
+                ).result()
+            finally:
+                shared.close()
+            if_detector.model = model
+            if_detector.sketch = sketch
+            if_detector.forest = None
+            if_detector.is_trained = True
+
+        def train_autoencoder():
+            ae_detector.train(X_train, cpu_threads=budget['autoencoder'])
+
+        _, report = self._run({'isolation_forest': train_forest, 'autoencoder': train_autoencoder})
+        return report
+
+    def predict(self, if_detector, ae_detector, X: np.ndarray) -> Tuple[dict, dict, Dict[str, float]]:
+        """Score X with both detectors; returns (if_results, ae_results, timing report)"""
+        jobs = {
+            'isolation_forest': lambda: if_detector.predict(X),
+            'autoencoder': lambda: ae_detector.predict(X),
+        }
+        if self.mode == 'serial':
+            results, report = self._run(jobs)
+        else:
+            with self._limit_blas():
+                results, report = self._run(jobs)
+        return results['isolation_forest'], results['autoencoder'], report
+
+    def shutdown(self):
+        with self._lock:
+            for pool in (self._threads, self._processes):
+                if pool is not None:
+                    pool.shutdown(wait=True)
+            self._threads = self._processes = None
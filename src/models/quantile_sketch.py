@@ -0,0 +1,102 @@
+# =============================================================================
+# FILE: src/models/quantile_sketch.py
+# =============================================================================
+
+import numpy as np
+
+DEFAULT_K = 2000
+
+class QuantileSketch:
+    """
+    Mergeable streaming quantile sketch (KLL)
+
+    Values are kept in levels of compactors: level h holds items of weight
+    2**h. When a level exceeds its capacity it is sorted and every other item
+    (random offset) is promoted to the next level, so memory stays below
+    about 3 * k items however many values are added; with k = 2000 quantile()
+    is typically within 0.05% of the exact rank. Sketches built on separate
+    chunks or processes can be merged (batch mode merges each file's, from
+    every worker), and they are written to model bundles with
+    arrays()/params() like the packed forest.
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=0):
+        self.k = int(k)
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        # Lower levels (lighter items) get geometrically smaller compactors
+        return max(2, int(self.k * (2 / 3) ** (len(self.levels) - level - 1)))
+
+    def update(self, values):
+        """Add a batch of values (non-finite values are ignored)"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if len(values):
+            self.n += len(values)
+            self.levels[0] = np.concatenate((self.levels[0], values))
+            self._compress()
+        return self
+
+    def merge(self, other):
+        """Add all values summarized by another sketch (same k)"""
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with k={self.k} and k={other.k}")
+        self.levels.extend(np.empty(0) for _ in range(len(other.levels) - len(self.levels)))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        while True:
+            full = [h for h, items in enumerate(self.levels) if len(items) > self._capacity(h)]
+            if not full:
+                return
+            level = full[0]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # With an odd count one item stays behind, so the total weight is exactly n
+            keep = len(items) % 2
+            self.levels[level] = items[:keep]
+            promoted = items[keep + self._rng.integers(2)::2]
+            self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+
+    def quantile(self, q):
+        """Value at quantile q (scalar or array, 0..1) of all values added so far"""
+        if self.n == 0:
+            raise ValueError("Quantile of an empty sketch")
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items_h), 2 ** h) for h, items_h in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        ranks = np.cumsum(weights[order])
+        index = np.searchsorted(ranks, np.asarray(q, dtype=np.float64) * self.n, side='left')
+        result = items[order][np.clip(index, 0, len(items) - 1)]
+        return float(result) if np.ndim(result) == 0 else result
+
+    def __len__(self):
+        """Items retained (not values added; see n)"""
+        return sum(len(items) for items in self.levels)
+
+    def arrays(self):
+        """Retained items and level sizes, for model bundles"""
+        return {
+            'items': np.concatenate(self.levels),
+            'level_sizes': np.array([len(items) for items in self.levels], dtype=np.int64)
+        }
+
+    def params(self):
+        return {'k': self.k, 'n': self.n}
+
+    @classmethod
+    def from_arrays(cls, arrays, params):
+        sketch = cls(params['k'])
+        sketch.n = int(params['n'])
+        # Copy out of the (memory-mapped, read-only) bundle arrays
+        items = np.array(arrays['items'], dtype=np.float64)
+        sketch.levels = np.split(items, np.cumsum(arrays['level_sizes'])[:-1])
+        return sketch
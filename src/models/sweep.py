@@ -0,0 +1,206 @@
+# =============================================================================
+# FILE: src/models/sweep.py
+# =============================================================================
+
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .parallel import SharedArray
+
+# Parameters that only move a threshold or the combination rule: changing them
+# reuses the scores of an already fitted model
+THRESHOLD_PARAMS = {
+    'isolation_forest': {'contamination'},
+    'autoencoder': set(),
+}
+DETECTION_PARAMS = ('threshold_percentile', 'ensemble_method')
+ENSEMBLE_METHODS = ('majority_vote', 'intersection', 'union')
+# Offset of sklearn's IsolationForest with contamination='auto'
+AUTO_OFFSET = -0.5
+
+# Shared-memory inputs attached once per worker process
+_WORKER_ARRAYS = {}
+
+def _init_worker(specs: dict):
+    for name, spec in specs.items():
+        _WORKER_ARRAYS[name] = SharedArray.attach(spec)
+
+def _fit_unit(model: str, params: dict, n_threads: int):
+    """
+    Worker process body: fit one model configuration on the shared X_train
+    and return the score sketch its threshold is set from and its raw
+    scores on X_test
+    """
+    X_train = _WORKER_ARRAYS['X_train'][1]
+    X_test = _WORKER_ARRAYS['X_test'][1]
+    t0 = time.perf_counter()
+    if model == 'isolation_forest':
+        from .isolation_forest import IsolationForestDetector
+        detector = IsolationForestDetector(params)
+        detector.train(X_train, n_jobs=n_threads)
+        fit_sec = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        test_scores = detector.packed().score_samples(X_test)
+    else:
+        from .autoencoder import AutoencoderDetector
+        detector = AutoencoderDetector({**params, 'inference_engine': 'numpy', 'verbose': 0})
+        detector.train(X_train, cpu_threads=n_threads)
+        fit_sec = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        test_scores = detector.reconstruction_errors(X_test)
+    # IF: score_samples of the training set; AE: validation errors of the kept epoch
+    return detector.sketch, test_scores, fit_sec, time.perf_counter() - t0
+
+def _grid(values: dict) -> List[dict]:
+    """Cartesian product of {param: value or [values]}"""
+    keys = list(values)
+    choices = [v if isinstance(v, (list, tuple)) else [v] for v in values.values()]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*choices)]
+
+class HyperparameterSweep:
+    """
+    Grid search over model hyperparameters, thresholds and ensemble methods
+
+    The grid ('sweep.grid' in the config) lists candidate values per section::
+
+        isolation_forest: {n_estimators: [100, 200], contamination: [0.05, 0.1]}
+        autoencoder: {encoding_dim: [6, 10]}
+        detection: {threshold_percentile: [90, 95], ensemble_method: [majority_vote, intersection]}
+
+    Unlisted parameters keep their config values ('models' sections and
+    detection_config, i.e. the run's 'detection' section). Every distinct
+    model configuration (ignoring threshold-only parameters) is fitted once,
+    in a process pool whose workers read X_train / X_test from shared memory.
+    All combinations are then evaluated in this process from the cached
+    scores: contamination and threshold_percentile only move the threshold
+    along the score sketch each model calibrates from (the forest's training
+    scores, the autoencoder's validation errors of its kept epoch), and the
+    ensemble method only changes how the two flags are combined.
+    """
+
+    def __init__(self, models_config: dict, sweep_config: Optional[dict] = None, workers: Optional[int] = None,
+                 detection_config: Optional[dict] = None):
+        sweep_config = sweep_config or {}
+        grid = sweep_config.get('grid') or {}
+        self.base = {name: dict(models_config.get(name, {})) for name in THRESHOLD_PARAMS}
+        self.grid = {name: grid.get(name) or {} for name in (*THRESHOLD_PARAMS, 'detection')}
+        unknown = sorted(set(self.grid['detection']) - set(DETECTION_PARAMS))
+        if unknown:
+            raise ValueError(f"Unknown detection sweep parameters: {unknown} (choose from {list(DETECTION_PARAMS)})")
+        # Detection parameters the grid does not list keep the run's values
+        detection_config = detection_config or {}
+        self.grid['detection'] = {
+            **{k: detection_config[k] for k in DETECTION_PARAMS if k in detection_config},
+            **self.grid['detection']
+        }
+        methods = self.grid['detection'].get('ensemble_method', [])
+        bad = sorted(set(methods if isinstance(methods, list) else [methods]) - set(ENSEMBLE_METHODS))
+        if bad:
+            raise ValueError(f"Cannot sweep ensemble methods {bad} (choose from {list(ENSEMBLE_METHODS)}; "
+                             f"unlisted in sweep.grid.detection, the configured detection.ensemble_method is used)")
+        self.workers = workers or sweep_config.get('workers') or os.cpu_count() or 1
+        self.rank_by = sweep_config.get('rank_by', 'f1_score')
+
+    def _units(self, model: str):
+        """(fit params, threshold-only grid) pairs for one model"""
+        fit_grid = {k: v for k, v in self.grid[model].items() if k not in THRESHOLD_PARAMS[model]}
+        threshold_grid = {k: v for k, v in self.grid[model].items() if k in THRESHOLD_PARAMS[model]}
+        return [({**self.base[model], **params}, params) for params in _grid(fit_grid)], _grid(threshold_grid)
+
+    def _fit_all(self, X_train, X_test, progress=None) -> Dict[tuple, tuple]:
+        """Fit every model configuration in the pool; returns {(model, unit index): sketch, scores and timings}"""
+        jobs = [(model, i, params) for model in ('autoencoder', 'isolation_forest')  # slowest first
+                for i, (params, _) in enumerate(self._units(model)[0])]
+        workers = max(1, min(self.workers, len(jobs)))
+        n_threads = max(1, (os.cpu_count() or 1) // workers)
+        shared = {'X_train': SharedArray(X_train), 'X_test': SharedArray(X_test)}
+        fitted = {}
+        try:
+            # spawn: workers start clean rather than inheriting TensorFlow / OpenMP thread state
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                                     initializer=_init_worker,
+                                     initargs=({k: v.spec for k, v in shared.items()},)) as pool:
+                futures = {pool.submit(_fit_unit, model, params, n_threads): (model, i)
+                           for model, i, params in jobs}
+                for future in as_completed(futures):
+                    fitted[futures[future]] = future.result()
+                    if progress is not None:
+                        progress(len(fitted), len(jobs))
+        finally:
+            for array in shared.values():
+                array.close()
+        return fitted
+
+    def run(self, X_train, X_test, y_test, progress=None):
+        """
+        Fit and evaluate the whole grid
+
+        Args:
+            X_train, X_test (np.ndarray): Preprocessed features (shared with the workers)
+            y_test (np.ndarray): Ground-truth labels of X_test (1 = anomaly)
+            progress (callable): Optional callback(models_fitted, models_total)
+
+        Returns:
+            pd.DataFrame: One row per combination, best first by rank_by
+        """
+        import pandas as pd
+        from utils.metrics import DetectionMetrics, binary_labels
+
+        if y_test is None:
+            raise ValueError("A sweep needs labelled data to rank configurations")
+        y_true = binary_labels(y_test)
+        fitted = self._fit_all(X_train, X_test, progress)
+        metrics = DetectionMetrics()
+
+        # Flags per (model, unit, threshold setting), computed once and shared by all combinations
+        flags = {}
+        if_units, if_thresholds = self._units('isolation_forest')
+        for i, (params, _) in enumerate(if_units):
+            sketch, test_scores = fitted['isolation_forest', i][:2]
+            for j, setting in enumerate(if_thresholds):
+                contamination = {**params, **setting}.get('contamination', 0.1)
+                # The offset IsolationForestDetector would use: sklearn's fixed one for 'auto'
+                offset = AUTO_OFFSET if contamination == 'auto' else sketch.quantile(contamination)
+                flags['isolation_forest', i, j] = test_scores < offset
+        ae_units, _ = self._units('autoencoder')
+        detection = _grid(self.grid['detection'])
+
+        rows, single_f1 = [], {}
+        t0 = time.perf_counter()
+        for (i, (_, if_params)), (j, if_setting), (k, (_, ae_params)), setting in itertools.product(
+                enumerate(if_units), enumerate(if_thresholds), enumerate(ae_units), detection):
+            percentile = setting.get('threshold_percentile', 95)
+            key = ('autoencoder', k, percentile)
+            if key not in flags:
+                sketch, test_errors = fitted['autoencoder', k][:2]
+                flags[key] = test_errors > sketch.quantile(percentile / 100)
+            if_flags, ae_flags = flags['isolation_forest', i, j], flags[key]
+            method = setting.get('ensemble_method', 'majority_vote')
+            combined = if_flags & ae_flags if method == 'intersection' else if_flags | ae_flags
+
+            row = {f'if_{p}': v for p, v in {**if_params, **if_setting}.items()}
+            row.update({f'ae_{p}': v for p, v in ae_params.items()})
+            row.update({'threshold_percentile': percentile, 'ensemble_method': method})
+            row.update(metrics.calculate_metrics(y_true, combined))
+            for name, flag_key in (('if', ('isolation_forest', i, j)), ('ae', key)):
+                if flag_key not in single_f1:
+                    single_f1[flag_key] = metrics.calculate_metrics(y_true, flags[flag_key])['f1_score']
+                row[f'{name}_f1_score'] = single_f1[flag_key]
+            row['anomaly_rate'] = float(combined.mean())
+            if_fit, if_score = fitted['isolation_forest', i][2:]
+            ae_fit, ae_score = fitted['autoencoder', k][2:]
+            row.update({'if_fit_sec': if_fit, 'ae_fit_sec': ae_fit, 'score_sec': if_score + ae_score})
+            rows.append(row)
+
+        table = pd.DataFrame(rows)
+        table = table.sort_values([self.rank_by, 'if_fit_sec'], ascending=[False, True], kind='stable')
+        table.insert(0, 'rank', np.arange(1, len(table) + 1))
+        table.attrs['evaluate_sec'] = time.perf_counter() - t0
+        table.attrs['models_fitted'] = len(fitted)
+        return table.reset_index(drop=True)
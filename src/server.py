@@ -3,23 +3,55 @@
 Simple Flask server to expose detection results and images for the frontend,
 and handle dataset uploads to run the detection pipeline.
 """
-from flask import Flask, jsonify, send_from_directory, abort, request
+import time
+_START_TIME = time.perf_counter()
+
+from flask import Flask, Response, jsonify, send_from_directory, abort, request
+import functools
+import gzip
+import hashlib
 import os
 from pathlib import Path
+import io
 import json
+import math
+import sys
+import threading
+import uuid
 from werkzeug.utils import secure_filename
 
-# Import the pipeline orchestrator robustly (supports `python src/server.py` and `python -m src.server`)
+# Import lightweight helpers robustly (supports `python src/server.py` and `python -m src.server`)
 try:  # when running as a package module
-    from .main import NetworkAnomalyDetectionSystem  # type: ignore
+    from .jobs import JobManager, JobQueueFull  # type: ignore
+    from .utils.logtail import follow, read_from, tail_lines  # type: ignore
+    from .utils.startup import startup_report  # type: ignore
 except Exception:  # when running as a script
     try:
-        from src.main import NetworkAnomalyDetectionSystem  # type: ignore
+        from src.jobs import JobManager, JobQueueFull  # type: ignore
+        from src.utils.logtail import follow, read_from, tail_lines  # type: ignore
+        from src.utils.startup import startup_report  # type: ignore
     except Exception:
         # Fallback: modify sys.path to include project root
-        import sys as _sys
-        _sys.path.append(str(Path(__file__).resolve().parent.parent))
-        from src.main import NetworkAnomalyDetectionSystem  # type: ignore
+        sys.path.append(str(Path(__file__).resolve().parent.parent))
+        from src.jobs import JobManager, JobQueueFull  # type: ignore
+        from src.utils.logtail import follow, read_from, tail_lines  # type: ignore
+        from src.utils.startup import startup_report  # type: ignore
+
+
+@functools.lru_cache(maxsize=None)
+def _pipeline():
+    """Import the pipeline orchestrator on first use, so endpoints such as
+    /api/health never pay for pandas, scikit-learn or TensorFlow."""
+    try:  # when running as a package module
+        from . import main as pipeline  # type: ignore
+    except Exception:  # when running as a script
+        try:
+            from src import main as pipeline  # type: ignore
+        except Exception:
+            # Fallback: modify sys.path to include project root
+            sys.path.append(str(Path(__file__).resolve().parent.parent))
+            from src import main as pipeline  # type: ignore
+    return pipeline
 
 app = Flask(__name__)
 try:
@@ -33,8 +65,141 @@ except Exception:
 BASE_DIR = Path(__file__).resolve().parent.parent
 RESULTS_DIR = BASE_DIR / "results"
 UPLOADS_DIR = RESULTS_DIR / "uploads"
-ALLOWED_EXT = {"csv", "json"}
+ALLOWED_EXT = {"csv", "json", "jsonl", "ndjson", "parquet", "feather", "arrow"}
+COMPRESSED_EXT = {"gz", "bz2", "xz", "zst", "zip"}  # only for csv/json/jsonl/ndjson
 LOG_FILE = BASE_DIR / "logs" / "detector.log"
+MODEL_DIR = Path(os.getenv("MODEL_DIR", str(BASE_DIR / "models" / "saved_models")))
+IMAGE_EXT = {".png", ".jpg", ".jpeg", ".webp"}
+RESULTS_STORE = RESULTS_DIR / "detection_results"
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+# Pipeline runs share RESULTS_DIR, so by default only one runs at a time and the rest wait in the queue
+JOBS = JobManager(
+    max_workers=_env_int("JOB_WORKERS", 1),
+    max_pending=_env_int("JOB_MAX_PENDING", 8),
+)
+SCORE_MAX_ROWS = _env_int("SCORE_MAX_ROWS", 100_000)
+RESULTS_MAX_ROWS = _env_int("RESULTS_MAX_ROWS", 10_000)
+RESULTS_MAX_AGE = _env_int("RESULTS_MAX_AGE", 0)  # seconds /results files may be reused without revalidating
+GZIP_MIN_BYTES = 1024
+# Each SSE log stream occupies a server thread for up to LOG_STREAM_MAX_SEC
+LOG_STREAM_MAX_SEC = _env_int("LOG_STREAM_MAX_SEC", 300)
+_log_streams = threading.BoundedSemaphore(_env_int("LOG_STREAM_MAX", 2))
+
+# Warm scoring system, loaded once per process from MODEL_DIR and reset after each retrain
+_scorer = None
+_scorer_lock = threading.Lock()
+
+
+def _get_scorer():
+    global _scorer
+    with _scorer_lock:
+        if _scorer is None:
+            system = _pipeline().NetworkAnomalyDetectionSystem()
+            system.load_models(str(MODEL_DIR))
+            _scorer = system
+        return _scorer
+
+
+def _reset_scorer():
+    global _scorer
+    with _scorer_lock:
+        _scorer = None
+
+
+def _read_report() -> dict:
+    report_path = RESULTS_DIR / "detection_report.json"
+    if not report_path.exists():
+        return {}
+    with open(report_path, "r") as f:
+        return json.load(f)
+
+
+def _list_images() -> list:
+    if not RESULTS_DIR.exists():
+        return []
+    return [p.name for p in RESULTS_DIR.iterdir() if p.suffix.lower() in IMAGE_EXT]
+
+
+class _Payload:
+    """A pre-rendered response body with its gzip variant and validators"""
+
+    def __init__(self, body: bytes, last_modified: float):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.last_modified = last_modified
+
+
+class _MtimeCache:
+    """Payload built from a file or directory, rebuilt only when its mtime, size or inode changes"""
+
+    def __init__(self, build):
+        self._build = build
+        self._lock = threading.Lock()
+        self._key = None
+        self._payload = None
+
+    def get(self, path: Path) -> _Payload:
+        st = path.stat()  # FileNotFoundError if missing
+        key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            if key != self._key:
+                self._payload = self._build(path, st)
+                self._key = key
+            return self._payload
+
+
+def _build_report(path: Path, st) -> _Payload:
+    body = path.read_bytes()
+    json.loads(body)  # ValueError while the pipeline is still writing it; not cached then
+    return _Payload(body, st.st_mtime)
+
+
+def _build_image_list(path: Path, st) -> _Payload:
+    # Plots are rewritten in place, which does not change the listing; adding or removing one
+    # updates the directory's mtime
+    return _Payload(json.dumps(sorted(_list_images())).encode("utf-8"), st.st_mtime)
+
+
+_report_cache = _MtimeCache(_build_report)
+_images_cache = _MtimeCache(_build_image_list)
+
+
+def _cached_response(payload: _Payload, mimetype: str = "application/json"):
+    """200 with ETag / Last-Modified (gzip if accepted), or 304 if the client's copy is current"""
+    use_gzip = payload.gzipped is not None and "gzip" in request.headers.get("Accept-Encoding", "")
+    response = Response(payload.gzipped if use_gzip else payload.body, mimetype=mimetype)
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    # Each encoding is a distinct representation, so it gets its own entity tag
+    response.set_etag(payload.etag + ("-gz" if use_gzip else ""))
+    response.last_modified = payload.last_modified
+    response.cache_control.no_cache = True  # clients may keep it but must revalidate (cheap 304)
+    return response.make_conditional(request)
+
+
+@app.after_request
+def _compress(response):
+    """gzip larger JSON responses (e.g. /api/results pages) for clients that accept it"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype != "application/json" or "Content-Encoding" in response.headers
+            or "gzip" not in request.headers.get("Accept-Encoding", "")):
+        return response
+    body = response.get_data()
+    if len(body) >= GZIP_MIN_BYTES:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers["Content-Encoding"] = "gzip"
+        response.vary.add("Accept-Encoding")
+    return response
 
 
 @app.get("/api/health")
@@ -45,47 +210,111 @@ def health():
 @app.get("/api/report")
 def get_report():
     report_path = RESULTS_DIR / "detection_report.json"
-    if not report_path.exists():
+    try:
+        return _cached_response(_report_cache.get(report_path))
+    except FileNotFoundError:
         return jsonify({"error": "detection_report.json not found", "path": str(report_path)}), 404
-    with open(report_path, "r") as f:
-        data = json.load(f)
-    return jsonify(data)
+    except ValueError:
+        return jsonify({"error": "detection_report.json is being written; retry shortly"}), 503
 
 
 @app.get("/api/images")
 def list_images():
-    if not RESULTS_DIR.exists():
+    try:
+        return _cached_response(_images_cache.get(RESULTS_DIR))
+    except FileNotFoundError:
         return jsonify([])
-    files = []
-    for p in RESULTS_DIR.iterdir():
-        if p.suffix.lower() in {".png", ".jpg", ".jpeg", ".webp"}:
-            files.append(p.name)
-    return jsonify(files)
 
 
 @app.get("/api/logs")
 def get_logs():
-    """Return recent log lines from logs/detector.log. Query params: tail (int)."""
+    """Recent lines of logs/detector.log. Query params: tail (int, last N lines) or cursor (byte offset
+    from a previous response: only the lines appended since). Every response carries the next cursor."""
     tail = request.args.get("tail", default=200, type=int)
     tail = max(1, min(tail, 5000))  # clamp
+    cursor = request.args.get("cursor", type=int)
     if not LOG_FILE.exists():
-        return jsonify({"lines": [], "message": f"Log file not found at {str(LOG_FILE)}"})
+        return jsonify({"lines": [], "cursor": 0, "message": f"Log file not found at {str(LOG_FILE)}"})
     try:
-        # Read last N lines efficiently
-        lines = LOG_FILE.read_text(encoding="utf-8", errors="ignore").splitlines()
-        lines = lines[-tail:]
+        reset = False
+        if cursor is None:
+            # Reads only the last lines' worth of bytes, however large the log is
+            lines, cursor = tail_lines(LOG_FILE, tail)
+        else:
+            lines, cursor, reset = read_from(LOG_FILE, cursor)
         return jsonify({
             "lines": lines,
             "path": str(LOG_FILE),
-            "count": len(lines)
+            "count": len(lines),
+            "cursor": cursor,
+            "reset": reset
         })
     except Exception as e:
         return jsonify({"error": f"Failed to read logs: {e}"}), 500
 
 
+@app.get("/api/logs/stream")
+def stream_logs():
+    """Server-Sent Events: the last `tail` lines (unless resuming from `cursor` or Last-Event-ID), then
+    new lines as they are appended. Each event's id is the cursor to resume from; the stream ends after
+    LOG_STREAM_MAX_SEC and EventSource clients reconnect transparently."""
+    cursor = request.headers.get("Last-Event-ID", request.args.get("cursor"))
+    try:
+        cursor = int(cursor) if cursor is not None else None
+    except ValueError:
+        cursor = None
+    tail = max(0, min(request.args.get("tail", default=200, type=int), 5000))
+    if not _log_streams.acquire(blocking=False):
+        # Each stream holds a server thread; clients fall back to polling with ?cursor=
+        return jsonify({"error": "Too many log streams; poll /api/logs?cursor= instead"}), 503
+
+    def events():
+        start = cursor
+        if start is None:
+            lines, start = tail_lines(LOG_FILE, tail) if LOG_FILE.exists() else ([], 0)
+            yield _sse_event(start, {"lines": lines, "reset": True})
+        for lines, position, reset in follow(LOG_FILE, start, max_duration=LOG_STREAM_MAX_SEC):
+            if lines or reset:
+                yield _sse_event(position, {"lines": lines, "reset": reset})
+            else:
+                yield ": keepalive\n\n"  # also detects disconnected clients
+
+    response = Response(events(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # Called by the WSGI server when the stream ends or the client goes away
+    response.call_on_close(_log_streams.release)
+    return response
+
+
+def _sse_event(event_id: int, payload: dict) -> str:
+    return f"id: {event_id}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _pipeline_job(job, data_path: str, filename: str) -> dict:
+    """Background job body: run the full pipeline and collect the report & images."""
+    system = _pipeline().NetworkAnomalyDetectionSystem()
+
+    def progress(stage, state):
+        # Job progress follows the pipeline's own bookkeeping; the snapshot is taken on this
+        # (the pipeline's) thread, so status requests never read the dict while it changes
+        job.set_timings(system.timings)
+        job.set_stage(stage, state)
+
+    system.run_full_pipeline(data_path=data_path, output_dir=str(RESULTS_DIR),
+                             progress_callback=progress, model_dir=str(MODEL_DIR))
+    job.set_timings(system.timings)
+    # Newly saved models replace the warm ones on the next /api/score call
+    _reset_scorer()
+    return {
+        "filename": filename,
+        "report": _read_report(),
+        "images": _list_images(),
+    }
+
+
 @app.post("/api/upload")
 def upload_and_run():
-    """Accept a dataset file, run the pipeline, and return the latest report & images."""
+    """Accept a dataset file and queue a pipeline run; returns the job id immediately."""
     if "file" not in request.files:
         return jsonify({"error": "No file part in request. Use form field 'file'."}), 400
 
@@ -94,7 +323,10 @@ def upload_and_run():
         return jsonify({"error": "No selected file."}), 400
 
     filename = secure_filename(file.filename)
-    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    parts = filename.lower().split('.')[1:]
+    if len(parts) > 1 and parts[-1] in COMPRESSED_EXT and parts[-2] in {"csv", "json", "jsonl", "ndjson"}:
+        parts.pop()
+    ext = parts[-1] if parts else ''
     if ext not in ALLOWED_EXT:
         return jsonify({"error": f"Unsupported file type: .{ext}. Allowed: {sorted(ALLOWED_EXT)}"}), 400
 
@@ -102,46 +334,180 @@ def upload_and_run():
     RESULTS_DIR.mkdir(parents=True, exist_ok=True)
     UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
-    save_path = UPLOADS_DIR / filename
+    # Unique per upload, so queued jobs for files with the same name keep their own input
+    save_path = UPLOADS_DIR / f"{uuid.uuid4().hex}_{filename}"
     file.save(save_path)
 
-    # Run the pipeline on the uploaded file, writing outputs into RESULTS_DIR
-    system = NetworkAnomalyDetectionSystem()
+    # Run the pipeline on the uploaded file in the background, writing outputs into RESULTS_DIR
     try:
-        outcome = system.run_full_pipeline(data_path=str(save_path), output_dir=str(RESULTS_DIR))
+        job = JOBS.submit("pipeline", _pipeline_job, str(save_path), filename, stages=_pipeline().PIPELINE_STAGES)
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+
+    return jsonify({
+        "message": "Upload accepted; pipeline queued",
+        "filename": filename,
+        "job_id": job.id,
+        "status_url": f"/api/jobs/{job.id}",
+    }), 202
+
+
+@app.get("/api/jobs")
+def list_jobs():
+    return jsonify([job.to_dict(include_result=False) for job in JOBS.list()])
+
+
+@app.get("/api/jobs/<job_id>")
+def get_job(job_id: str):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job.to_dict())
+
+
+def _records_from_request():
+    """Parse scoring input: a JSON list of records (or {"records": [...]}), a CSV body, or a CSV/JSON upload."""
+    import pandas as pd
+
+    if "file" in request.files:
+        upload = request.files["file"]
+        if upload.filename.lower().endswith(".json"):
+            return pd.read_json(upload.stream)
+        return pd.read_csv(upload.stream)
+    if request.is_json:
+        payload = request.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = payload.get("records")
+        if not isinstance(payload, list):
+            raise ValueError("Expected a JSON list of records or an object with a 'records' list")
+        return pd.DataFrame.from_records(payload)
+    body = request.get_data(as_text=True)
+    if not body.strip():
+        raise ValueError("Empty request body")
+    return pd.read_csv(io.StringIO(body))
+
+
+@app.post("/api/score")
+def score_records():
+    """Score records with the already-trained models; never retrains."""
+    try:
+        data = _records_from_request()
     except Exception as e:
-        return jsonify({"error": f"Pipeline failed: {e}"}), 500
+        return jsonify({"error": f"Could not parse records: {e}"}), 400
+    if len(data) == 0:
+        return jsonify({"error": "No records to score"}), 400
+    if len(data) > SCORE_MAX_ROWS:
+        return jsonify({"error": f"Too many records ({len(data)}); limit is {SCORE_MAX_ROWS}"}), 413
 
-    # Compose response: report JSON and images list
-    report_path = RESULTS_DIR / "detection_report.json"
-    report = {}
-    if report_path.exists():
-        with open(report_path, "r") as f:
-            report = json.load(f)
+    try:
+        scorer = _get_scorer()
+    except FileNotFoundError:
+        return jsonify({"error": f"No trained models found in {MODEL_DIR}. Run the pipeline first."}), 503
+    except ValueError as e:  # e.g. corrupt or incompatible model bundle
+        return jsonify({"error": f"Could not load models from {MODEL_DIR}: {e}"}), 503
 
-    images = []
-    for p in RESULTS_DIR.iterdir():
-        if p.suffix.lower() in {".png", ".jpg", ".jpeg", ".webp"}:
-            images.append(p.name)
+    try:
+        results = scorer.score_records(data)
+    except Exception as e:
+        return jsonify({"error": f"Scoring failed: {e}"}), 400
 
+    if_scores = results["isolation_forest"]["scores"]
+    if_flags = results["isolation_forest"]["predictions"] == -1
+    ae_errors = results["autoencoder"]["reconstruction_errors"]
+    ae_flags = results["autoencoder"]["anomalies"]
+    flags = results["ensemble"]
+    rows = [
+        {
+            "row": i,
+            "if_score": float(if_scores[i]),
+            "if_anomaly": bool(if_flags[i]),
+            # None where the cascade ensemble did not run the autoencoder on the row
+            "ae_error": float(ae_errors[i]) if math.isfinite(ae_errors[i]) else None,
+            "ae_anomaly": bool(ae_flags[i]),
+            "anomaly": bool(flags[i]),
+        }
+        for i in range(len(flags))
+    ]
     return jsonify({
-        "message": "Upload processed successfully",
-        "filename": filename,
-        "report": report,
-        "images": images,
+        "count": len(rows),
+        "anomalies": int(flags.sum()),
+        "ae_threshold": float(results["autoencoder"]["threshold"]),
+        "ensemble_method": scorer.ensemble.method,
+        "rows": rows,
     })
 
 
+@app.get("/api/drift")
+def get_drift():
+    """Drift of the records scored by /api/score since the models were (re)loaded."""
+    try:
+        scorer = _get_scorer()
+    except FileNotFoundError:
+        return jsonify({"error": f"No trained models found in {MODEL_DIR}. Run the pipeline first."}), 503
+    except ValueError as e:
+        return jsonify({"error": f"Could not load models from {MODEL_DIR}: {e}"}), 503
+    status = scorer.preprocessor.drift_status()
+    if status is None:
+        return jsonify({"error": "The saved models have no drift reference; retrain to enable monitoring"}), 404
+    return jsonify(status)
+
+
+def _result_store():
+    """Per-row results of the last pipeline run (memory-mapped; cheap to open per request)"""
+    try:  # when running as a package module
+        from .utils.results_store import ResultStore  # type: ignore
+    except Exception:  # when running as a script
+        from src.utils.results_store import ResultStore  # type: ignore
+    return ResultStore(RESULTS_STORE)
+
+
+@app.get("/api/results")
+def query_results():
+    """Page through per-row results. Query params: offset, limit, sort (if_score|ae_error|row_index),
+    order (asc|desc; default most anomalous first), anomalies (1 = ensemble anomalies only), top (k)."""
+    try:
+        store = _result_store()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    anomalies_only = request.args.get("anomalies", "0").lower() in ("1", "true", "yes")
+    sort = request.args.get("sort") or None
+    order = request.args.get("order")
+    descending = None if order is None else order.lower() == "desc"
+    top = request.args.get("top", type=int)
+    if top is not None:
+        offset, limit, sort = 0, top, sort or "if_score"
+    else:
+        offset = request.args.get("offset", default=0, type=int)
+        limit = request.args.get("limit", default=100, type=int)
+    limit = max(0, min(limit, RESULTS_MAX_ROWS))  # clamp
+    try:
+        page = store.query(offset, limit, sort=sort, descending=descending, anomalies_only=anomalies_only)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    page["sort"] = sort
+    page["metadata"] = store.metadata
+    return jsonify(page)
+
+
 @app.get("/results/<path:filename>")
 def serve_result_file(filename: str):
     safe_path = RESULTS_DIR / filename
     if not safe_path.exists():
         abort(404)
-    # Serve images (and allow other static assets if needed)
-    return send_from_directory(RESULTS_DIR, filename)
+    # Serve images (and allow other static assets if needed). send_file answers conditional
+    # requests (ETag / Last-Modified) with 304; plots are overwritten by each run, so clients revalidate.
+    response = send_from_directory(RESULTS_DIR, filename, max_age=RESULTS_MAX_AGE)
+    if not RESULTS_MAX_AGE:
+        response.cache_control.no_cache = True
+    return response
 
 
 if __name__ == "__main__":
+    if "--startup-profile" in sys.argv[1:]:
+        # Cold-start report: time to a ready app, then the cost of each lazy dependency
+        print(json.dumps(startup_report(_START_TIME, {"app_ready": time.perf_counter()}), indent=2))
+        sys.exit(0)
+
     # Determine host/port from environment (Render and similar use $PORT)
     HOST = os.getenv("HOST", "0.0.0.0")
     try:
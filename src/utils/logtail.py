@@ -0,0 +1,77 @@
+# =============================================================================
+# FILE: src/utils/logtail.py
+# =============================================================================
+
+import os
+import time
+
+BLOCK_SIZE = 8192
+
+def tail_lines(path, n, block_size=BLOCK_SIZE):
+    """
+    Last n lines of a text file, reading backwards from the end in blocks
+
+    Only the bytes of those lines (plus at most one block) are read,
+    whatever the size of the file.
+
+    Returns:
+        tuple: (lines, cursor) where cursor is the byte offset just past the
+        last complete line, to pass to read_from for the lines that follow
+    """
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        blocks, newlines = [], 0
+        # n lines need n + 1 newlines: their terminators and the one before the first
+        while pos > 0 and newlines <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            blocks.append(f.read(step))
+            newlines += blocks[-1].count(b'\n')
+    data = b''.join(reversed(blocks))
+    # A trailing partial line (still being written) is left for read_from
+    cut = data.rfind(b'\n') + 1
+    lines = data[:cut].decode('utf-8', errors='ignore').splitlines()
+    return lines[-n:] if n > 0 else [], pos + cut
+
+def read_from(path, cursor, max_bytes=1 << 20):
+    """
+    Complete lines appended since byte offset cursor
+
+    If the file is now shorter than cursor it was truncated or rotated, and
+    reading restarts from the beginning.
+
+    Returns:
+        tuple: (lines, new cursor, reset) - reset is True if the file was
+        truncated since cursor was issued
+    """
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        reset = cursor > size
+        cursor = 0 if reset or cursor < 0 else cursor
+        f.seek(cursor)
+        data = f.read(min(max_bytes, size - cursor))
+    cut = data.rfind(b'\n') + 1
+    if cut == 0 and len(data) == max_bytes:
+        cut = len(data)  # a single line longer than max_bytes: pass it on in pieces
+    return data[:cut].decode('utf-8', errors='ignore').splitlines(), cursor + cut, reset
+
+def follow(path, cursor, poll_interval=0.5, heartbeat=15.0, max_duration=None):
+    """
+    Yield (lines, cursor, reset) whenever lines are appended after cursor
+
+    Yields ([], cursor, False) every `heartbeat` seconds without new lines, so
+    callers can keep connections alive, and stops after max_duration seconds.
+    """
+    started = last = time.monotonic()
+    while max_duration is None or time.monotonic() - started < max_duration:
+        try:
+            lines, cursor, reset = read_from(path, cursor)
+        except FileNotFoundError:
+            lines, reset = [], False
+        now = time.monotonic()
+        if lines or reset or now - last >= heartbeat:
+            last = now
+            yield lines, cursor, reset
+        if not lines:
+            time.sleep(poll_interval)
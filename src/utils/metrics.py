@@ -1,27 +1,272 @@
-
 # =============================================================================
 # FILE: src/utils/metrics.py
 # =============================================================================
 
 import numpy as np
-from sklearn.metrics import precision_score, recall_score, f1_score, roc_auc_score
+
+# Text labels recognised as normal / anomalous traffic (compared case-insensitively)
+NORMAL_LABELS = frozenset({'0', 'normal', 'benign', 'false'})
+ANOMALY_LABELS = frozenset({'1', 'anomaly', 'anomalous', 'attack', 'malicious', 'true'})
+
+def binary_labels(y_true):
+    """
+    Ground-truth labels as a boolean mask (True = anomaly)
+
+    Accepts booleans, numbers 0 / 1 (1 = anomaly) and the text labels in
+    NORMAL_LABELS / ANOMALY_LABELS. Anything else (e.g. -1/1, attack names
+    of a multi-class label column, missing labels) is ambiguous for binary
+    evaluation and rejected rather than guessed.
+
+    Raises:
+        ValueError: If any label is not one of the above
+    """
+    y = np.asarray(y_true)
+    if y.dtype == bool:
+        return y
+    if y.dtype.kind in 'iuf':
+        binary = (y == 0) | (y == 1)
+        if not binary.all():
+            raise ValueError(f"Labels must be 0 (normal) or 1 (anomaly); found {np.unique(y[~binary])[:5].tolist()}")
+        return y == 1
+    # Text (or mixed object) labels: classify each distinct value once
+    values, inverse = np.unique(y.astype(str), return_inverse=True)
+    codes = np.empty(len(values), dtype=bool)
+    invalid = []
+    for i, value in enumerate(values):
+        key = value.strip().lower()
+        if key in NORMAL_LABELS or key in ANOMALY_LABELS:
+            codes[i] = key in ANOMALY_LABELS
+            continue
+        try:
+            number = float(key)
+        except ValueError:
+            number = None
+        if number in (0.0, 1.0):
+            codes[i] = number == 1.0
+        else:
+            invalid.append(value)
+    if invalid:
+        raise ValueError(f"Labels are not binary (expected 0/1, normal/anomaly, benign/attack); "
+                         f"found {invalid[:5]}")
+    return codes[inverse.ravel()]
+
+def _ratio(numerator, denominator):
+    """numerator / denominator, 0.0 where the denominator is 0 (sklearn's zero_division=0)"""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape),
+                     where=denominator > 0)
+
+class ConfusionCounts:
+    """Running confusion matrix of binary predictions (positive = anomaly)"""
+
+    def __init__(self):
+        self.tp = self.fp = self.tn = self.fn = 0
+
+    def update(self, y_true, y_pred):
+        y_true = binary_labels(y_true)
+        y_pred = np.asarray(y_pred).astype(bool, copy=False)
+        # One pass: code each row as 2 * truth + prediction
+        tn, fp, fn, tp = np.bincount(2 * y_true + y_pred, minlength=4)
+        self.tp += int(tp)
+        self.fp += int(fp)
+        self.tn += int(tn)
+        self.fn += int(fn)
+        return self
+
+    def merge(self, other):
+        self.tp += other.tp
+        self.fp += other.fp
+        self.tn += other.tn
+        self.fn += other.fn
+        return self
+
+    @property
+    def total(self):
+        return self.tp + self.fp + self.tn + self.fn
+
+    def metrics(self):
+        precision = float(_ratio(self.tp, self.tp + self.fp))
+        recall = float(_ratio(self.tp, self.tp + self.fn))
+        return {
+            'precision': precision,
+            'recall': recall,
+            'f1_score': float(_ratio(2 * self.tp, 2 * self.tp + self.fp + self.fn)),
+            'accuracy': float(_ratio(self.tp + self.tn, self.total)),
+            'confusion': {'tp': self.tp, 'fp': self.fp, 'tn': self.tn, 'fn': self.fn}
+        }
+
+class ScoreHistogram:
+    """
+    Fixed-bin histogram of scores, split by true label
+
+    Memory is two counters per bin whatever the number of rows. Scores
+    outside [low, high] are counted in the first/last bin, so thresholds are
+    resolved to one bin width inside the range. Non-finite scores (e.g. rows
+    a cascade ensemble never sent to the autoencoder) are counted as missing.
+    """
+
+    def __init__(self, low, high, bins=2000, log=False, higher_is_anomalous=True):
+        self.edges = np.geomspace(low, high, bins + 1) if log else np.linspace(low, high, bins + 1)
+        self.higher_is_anomalous = higher_is_anomalous
+        self.counts = np.zeros((2, bins), dtype=np.int64)  # [normal, anomaly] x bins
+        self.missing = 0
+
+    @property
+    def bins(self):
+        return self.counts.shape[1]
+
+    def update(self, scores, y_true):
+        scores = np.asarray(scores, dtype=np.float64)
+        y_true = binary_labels(y_true)
+        finite = np.isfinite(scores)
+        if not finite.all():
+            self.missing += int(np.count_nonzero(~finite))
+            scores, y_true = scores[finite], y_true[finite]
+        index = np.clip(np.searchsorted(self.edges, scores, side='right') - 1, 0, self.bins - 1)
+        self.counts += np.bincount(index + self.bins * y_true, minlength=2 * self.bins).reshape(2, self.bins)
+        return self
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge score histograms with different bins")
+        self.counts += other.counts
+        self.missing += other.missing
+        return self
+
+    def curve(self):
+        """
+        Cumulative counts from the most anomalous bin down (one pass over the bins)
+
+        Returns:
+            tuple: (thresholds, tp, fp) - flagging every score beyond thresholds[k]
+            (above it if higher_is_anomalous, else below it) gives tp[k]/fp[k]
+        """
+        if self.higher_is_anomalous:
+            negatives, positives = self.counts[:, ::-1]
+            thresholds = self.edges[-2::-1]
+        else:
+            negatives, positives = self.counts
+            thresholds = self.edges[1:]
+        return thresholds, np.cumsum(positives), np.cumsum(negatives)
+
+    def summary(self, table_size=10):
+        """ROC-AUC, PR-AUC (average precision) and the best thresholds by F1"""
+        thresholds, tp, fp = self.curve()
+        positives, negatives = int(self.counts[1].sum()), int(self.counts[0].sum())
+        result = {'roc_auc': None, 'pr_auc': None, 'best_thresholds': [], 'missing_scores': self.missing}
+        if positives == 0 or negatives == 0:
+            return result
+
+        tpr = np.concatenate(([0.0], tp / positives))
+        fpr = np.concatenate(([0.0], fp / negatives))
+        precision = _ratio(tp, tp + fp)
+        f1 = _ratio(2 * tp, tp + fp + positives)
+        result['roc_auc'] = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1])) / 2)
+        result['pr_auc'] = float(np.sum(np.diff(tpr) * precision))
+
+        best = np.argsort(-f1, kind='stable')[:table_size]
+        result['best_thresholds'] = [
+            {
+                'threshold': float(thresholds[k]),
+                'precision': float(precision[k]),
+                'recall': float(tpr[k + 1]),
+                'f1_score': float(f1[k]),
+                'flagged': int(tp[k] + fp[k])
+            }
+            for k in best
+        ]
+        return result
+
+class StreamingMetrics:
+    """
+    Constant-memory evaluation of detection results, updated batch by batch
+
+    Keeps confusion counts of the predictions of each method and label-split
+    histograms of the IF decision scores and AE reconstruction errors, from
+    which result() derives precision/recall/F1, ROC-AUC, PR-AUC and a
+    best-threshold table. Accumulators of separate runs can be merged.
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+        bins = config.get('bins', 2000)
+        if_low, if_high = config.get('if_score_range', (-1.0, 1.0))
+        ae_low, ae_high = config.get('ae_error_range', (1e-6, 1e4))
+        self.table_size = config.get('threshold_table_size', 10)
+        self.confusion = {name: ConfusionCounts() for name in ('isolation_forest', 'autoencoder', 'ensemble')}
+        self.histograms = {
+            # IF decision scores below the threshold are anomalies
+            'isolation_forest': ScoreHistogram(if_low, if_high, bins, higher_is_anomalous=False),
+            'autoencoder': ScoreHistogram(ae_low, ae_high, bins, log=True),
+        }
+
+    def update(self, y_true, if_results, ae_results, ensemble_pred):
+        """
+        Add one batch: its labels and the outputs of the detectors / ensemble for it
+
+        Raises:
+            ValueError: If the labels are not binary (see binary_labels); nothing is added then
+        """
+        y_true = binary_labels(y_true)
+        self.confusion['isolation_forest'].update(y_true, if_results['predictions'] == -1)
+        self.confusion['autoencoder'].update(y_true, ae_results['anomalies'])
+        self.confusion['ensemble'].update(y_true, ensemble_pred)
+        self.histograms['isolation_forest'].update(if_results['scores'], y_true)
+        self.histograms['autoencoder'].update(ae_results['reconstruction_errors'], y_true)
+        return self
+
+    def merge(self, other):
+        for name, counts in self.confusion.items():
+            counts.merge(other.confusion[name])
+        for name, histogram in self.histograms.items():
+            histogram.merge(other.histograms[name])
+        return self
+
+    def arrays(self):
+        """Counts and bin edges as arrays (e.g. for np.savez), to merge with runs evaluated elsewhere"""
+        arrays = {}
+        for name, counts in self.confusion.items():
+            arrays[f'{name}_confusion'] = np.array([counts.tp, counts.fp, counts.tn, counts.fn], dtype=np.int64)
+        for name, histogram in self.histograms.items():
+            arrays[f'{name}_edges'] = histogram.edges
+            arrays[f'{name}_counts'] = histogram.counts
+            arrays[f'{name}_missing'] = np.array(histogram.missing, dtype=np.int64)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, config=None):
+        """Rebuild an accumulator from arrays() output"""
+        metrics = cls(config)
+        for name, counts in metrics.confusion.items():
+            counts.tp, counts.fp, counts.tn, counts.fn = (int(v) for v in arrays[f'{name}_confusion'])
+        for name, histogram in metrics.histograms.items():
+            histogram.edges = np.array(arrays[f'{name}_edges'])
+            histogram.counts = np.array(arrays[f'{name}_counts'], dtype=np.int64)
+            histogram.missing = int(arrays[f'{name}_missing'])
+        return metrics
+
+    def result(self):
+        metrics = {}
+        for name, counts in self.confusion.items():
+            metrics[name] = counts.metrics()
+            if name in self.histograms:
+                metrics[name].update(self.histograms[name].summary(self.table_size))
+        return metrics
 
 class DetectionMetrics:
     """Calculate performance metrics for anomaly detection"""
-    
+
     def calculate_metrics(self, y_true, y_pred):
         """Calculate supervised metrics"""
-        return {
-            'precision': precision_score(y_true, y_pred),
-            'recall': recall_score(y_true, y_pred),
-            'f1_score': f1_score(y_true, y_pred),
-            'accuracy': np.mean(y_true == y_pred)
-        }
-    
+        metrics = ConfusionCounts().update(y_true, y_pred).metrics()
+        del metrics['confusion']
+        return metrics
+
     def calculate_unsupervised_metrics(self, results):
         """Calculate unsupervised metrics"""
         total_samples = results['metadata']['total_samples']
-        
+
         return {
             'detection_rates': {
                 'isolation_forest': results['metadata']['if_anomalies'] / total_samples,
@@ -31,11 +276,10 @@ class DetectionMetrics:
             'method_agreement': self._calculate_agreement(results),
             'total_samples': total_samples
         }
-    
+
     def _calculate_agreement(self, results):
         """Calculate agreement between methods"""
         if_anomalies = results['isolation_forest']['predictions'] == -1
         ae_anomalies = results['autoencoder']['anomalies']
         agreement = np.mean(if_anomalies == ae_anomalies)
         return agreement
-
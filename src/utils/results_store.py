@@ -0,0 +1,249 @@
+# =============================================================================
+# FILE: src/utils/results_store.py
+# =============================================================================
+
+import json
+import os
+import shutil
+import struct
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+RESULTS_FORMAT = 'netsec-anomaly-results'
+RESULTS_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+# Column dtypes; other columns keep the dtype of the first chunk, except text columns
+# (e.g. string labels), which are stored as int32 category codes (see ResultWriter)
+COLUMN_DTYPES = {
+    'row_index': np.dtype('<i8'),
+    'if_score': np.dtype('<f8'),
+    'if_anomaly': np.dtype('|b1'),
+    'ae_error': np.dtype('<f8'),
+    'ae_anomaly': np.dtype('|b1'),
+    'anomaly': np.dtype('|b1'),
+}
+
+# Sortable columns and their "most anomalous first" direction
+SORT_DESCENDING = {
+    'if_score': False,  # lower IF decision scores are more anomalous
+    'ae_error': True,
+    'row_index': False,
+}
+
+CATEGORY_DTYPE = np.dtype('<i4')
+MISSING_CODE = -1
+
+# Fixed .npy header size, so the row count can be filled in once all chunks are written
+_HEADER_BYTES = 128
+
+class ResultStoreError(ValueError):
+    """Raised when a result store is missing, corrupt or of an unsupported version"""
+
+def _npy_header(dtype, rows):
+    """A version 1.0 .npy header for a 1-D array, padded to _HEADER_BYTES"""
+    header = repr({'descr': dtype.str, 'fortran_order': False, 'shape': (rows,)}).encode('latin1')
+    padding = _HEADER_BYTES - 10 - len(header) - 1
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', _HEADER_BYTES - 10) + header + b' ' * padding + b'\n'
+
+class ResultWriter:
+    """
+    Write per-row detection results as a directory of ``.npy`` columns
+
+    Chunks are appended column by column, so chunked detection never holds
+    more than one chunk of results. The store is written to a temporary
+    sibling directory and renamed into place by close(), so readers (e.g. the
+    API server) never see a half-written store.
+
+    Text columns (object or string dtype, e.g. labels such as 'normal' /
+    'dos') are stored as category codes, numbered in order of first
+    appearance across chunks; the manifest's 'categories' maps each code
+    back to its value, and missing values are MISSING_CODE.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp = self.path.with_name(self.path.name + '.tmp')
+        if self.tmp.exists():
+            shutil.rmtree(self.tmp)
+        self.tmp.mkdir(parents=True)
+        self.rows = 0
+        self._files = {}
+        self._dtypes = {}
+        self._categories = {}  # column -> {value: code}
+
+    def append(self, columns):
+        """Append one chunk: {column name -> 1-D array}, all of the same length"""
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) != 1:
+            raise ResultStoreError(f"Columns of a chunk differ in length: {sorted(lengths)}")
+        if not self._files:
+            for name, values in columns.items():
+                dtype = COLUMN_DTYPES.get(name, np.asarray(values).dtype)
+                if dtype == object or dtype.kind in 'US':
+                    self._categories[name] = {}
+                    dtype = CATEGORY_DTYPE
+                self._dtypes[name] = np.dtype(dtype)
+                self._files[name] = open(self.tmp / f"{name}.npy", 'wb')
+                self._files[name].write(_npy_header(self._dtypes[name], 0))
+        elif set(columns) != set(self._files):
+            raise ResultStoreError(f"Chunk columns {sorted(columns)} differ from {sorted(self._files)}")
+        for name, values in columns.items():
+            if name in self._categories:
+                values = self._encode(name, values)
+            self._files[name].write(np.ascontiguousarray(values, dtype=self._dtypes[name]).tobytes())
+        self.rows += lengths.pop()
+
+    def _encode(self, name, values):
+        """Category codes of a text column, adding values not seen in earlier chunks"""
+        import pandas as pd
+
+        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        lookup = self._categories[name]
+        mapping = np.array([lookup.setdefault(_json_value(u), len(lookup)) for u in uniques] + [MISSING_CODE],
+                           dtype=CATEGORY_DTYPE)
+        # factorize marks missing values -1, which picks the last slot of the mapping
+        return mapping[codes]
+
+    def close(self, metadata=None):
+        """Finish the column headers, write the manifest and publish the store"""
+        for name, f in self._files.items():
+            f.seek(0)
+            f.write(_npy_header(self._dtypes[name], self.rows))
+            f.close()
+        manifest = {
+            'format': RESULTS_FORMAT,
+            'version': RESULTS_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'rows': self.rows,
+            'columns': {name: dtype.str for name, dtype in self._dtypes.items()},
+            'categories': {name: list(lookup) for name, lookup in self._categories.items()},
+            'metadata': metadata or {},
+        }
+        with open(self.tmp / MANIFEST_FILE, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+
+        old = self.path.with_name(self.path.name + '.old')
+        if old.exists():
+            shutil.rmtree(old)
+        if self.path.exists():
+            os.replace(self.path, old)
+        os.replace(self.tmp, self.path)
+        if old.exists():
+            shutil.rmtree(old)
+        return manifest
+
+    def abort(self):
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+def _json_value(value):
+    """A category value as stored in the manifest (NumPy scalars as Python values)"""
+    return value.item() if isinstance(value, np.generic) else value
+
+def write_results(path, columns, metadata=None):
+    """Write a result store from whole columns in one go"""
+    writer = ResultWriter(path)
+    try:
+        writer.append(columns)
+    except Exception:
+        writer.abort()
+        raise
+    return writer.close(metadata)
+
+class ResultStore:
+    """
+    Read-only, memory-mapped view of a result store
+
+    Pages are only read for the rows a query touches, except for sorting,
+    which scans the sort column once (O(rows), no full sort).
+    """
+
+    def __init__(self, path):
+        path = Path(path)
+        try:
+            with open(path / MANIFEST_FILE, 'r') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise ResultStoreError(f"No result store at {path}")
+        except json.JSONDecodeError as e:
+            raise ResultStoreError(f"Corrupt result manifest at {path}: {e}")
+        if manifest.get('format') != RESULTS_FORMAT:
+            raise ResultStoreError(f"{path} is not a result store")
+        if manifest.get('version') != RESULTS_VERSION:
+            raise ResultStoreError(f"Unsupported result store version {manifest.get('version')} "
+                                   f"(expected {RESULTS_VERSION})")
+        self.path = path
+        self.manifest = manifest
+        self.rows = manifest['rows']
+        # Stores written before text columns were supported have no categories
+        self.categories = {name: np.array(values + [None], dtype=object)
+                           for name, values in manifest.get('categories', {}).items()}
+        self.columns = {}
+        for name, dtype in manifest['columns'].items():
+            column = np.load(path / f"{name}.npy", mmap_mode='r', allow_pickle=False)
+            if column.dtype.str != dtype or column.shape != (self.rows,):
+                raise ResultStoreError(f"{name}: expected {dtype}[{self.rows}], found {column.dtype.str}{list(column.shape)}")
+            self.columns[name] = column
+
+    @property
+    def metadata(self):
+        return self.manifest['metadata']
+
+    def _order(self, index, sort, descending, stop):
+        """Positions (into index, or all rows) of the first `stop` rows in sort order"""
+        key = np.asarray(self.columns[sort][index] if index is not None else self.columns[sort], dtype=np.float64)
+        # Ascending key with NaN (e.g. rows the cascade's autoencoder skipped) last
+        key = -key if descending else key.copy()
+        key[np.isnan(key)] = np.inf
+        if stop < len(key):
+            top = np.argpartition(key, stop - 1)[:stop]
+            return top[np.lexsort((top, key[top]))]
+        return np.lexsort((np.arange(len(key)), key))
+
+    def query(self, offset=0, limit=100, sort=None, descending=None, anomalies_only=False):
+        """
+        A page of rows
+
+        Args:
+            offset (int): Rows to skip
+            limit (int): Maximum rows to return
+            sort (str): Column to sort by (see SORT_DESCENDING); None keeps row order
+            descending (bool): Sort direction (default: most anomalous first)
+            anomalies_only (bool): Only rows flagged by the ensemble
+
+        Returns:
+            dict: total (matching rows), offset, limit and rows (list of dicts)
+        """
+        offset, limit = max(0, int(offset)), max(0, int(limit))
+        index = np.flatnonzero(self.columns['anomaly']) if anomalies_only else None
+        total = len(index) if index is not None else self.rows
+        stop = min(offset + limit, total)
+
+        if sort is not None:
+            if sort not in SORT_DESCENDING or sort not in self.columns:
+                raise ResultStoreError(f"Cannot sort by {sort!r} (choose from {sorted(SORT_DESCENDING)})")
+            if descending is None:
+                descending = SORT_DESCENDING[sort]
+            positions = self._order(index, sort, descending, stop)[offset:stop] if stop > offset else np.empty(0, int)
+        else:
+            positions = np.arange(offset, max(offset, stop))
+        rows = index[positions] if index is not None else positions
+
+        page = {name: column[rows].tolist() for name, column in self.columns.items()}
+        for name, values in self.categories.items():
+            # Code MISSING_CODE (-1) picks the trailing None
+            page[name] = values[self.columns[name][rows]].tolist()
+        records = [dict(zip(page, values)) for values in zip(*page.values())]
+        for record in records:
+            for name, value in record.items():
+                if isinstance(value, float) and value != value:
+                    record[name] = None  # NaN is not valid JSON
+        return {'total': total, 'offset': offset, 'limit': limit, 'rows': records}
+
+    def top_k(self, k=100, by='if_score', anomalies_only=False):
+        """The k most anomalous rows by one score"""
+        return self.query(0, k, sort=by, anomalies_only=anomalies_only)
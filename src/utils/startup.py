@@ -0,0 +1,68 @@
+# =============================================================================
+# FILE: src/utils/startup.py
+# =============================================================================
+
+import importlib
+import sys
+import time
+
+# Dependencies that are imported lazily, in the order a full pipeline needs them
+HEAVY_MODULES = (
+    'pandas',
+    'sklearn.preprocessing',
+    'sklearn.ensemble',
+    'sklearn.metrics',
+    'matplotlib.pyplot',
+    'tensorflow',
+)
+
+def loaded_heavy_modules():
+    """Heavy dependencies already present in sys.modules"""
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+def time_imports(modules=HEAVY_MODULES):
+    """
+    Import each module in turn and record how long it took
+
+    Modules that were already imported report 0.0 and preloaded=True, so the
+    numbers show what each lazy stage would add to a cold process.
+    """
+    timings = {}
+    for name in modules:
+        preloaded = name in sys.modules
+        t0 = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            error = None
+        except ImportError as e:
+            error = str(e)
+        timings[name] = {
+            'import_sec': round(time.perf_counter() - t0, 4),
+            'preloaded': preloaded
+        }
+        if error:
+            timings[name]['error'] = error
+    return timings
+
+def startup_report(start_time, checkpoints, import_heavy=True):
+    """
+    Build a cold-start report
+
+    Args:
+        start_time (float): time.perf_counter() taken as early as possible at process start
+        checkpoints (dict): Ordered name -> time.perf_counter() marks reached during startup
+        import_heavy (bool): Also time importing each lazily loaded dependency
+
+    Returns:
+        dict: Seconds from start_time to each checkpoint, modules loaded at startup
+              and, optionally, per-dependency import costs
+    """
+    report = {
+        'checkpoints_sec': {name: round(t - start_time, 4) for name, t in checkpoints.items()},
+        'heavy_modules_loaded_at_startup': loaded_heavy_modules(),
+        'python': sys.version.split()[0]
+    }
+    if import_heavy:
+        report['lazy_imports'] = time_imports()
+        report['total_with_all_imports_sec'] = round(time.perf_counter() - start_time, 4)
+    return report
@@ -1,75 +1,237 @@
-
 # =============================================================================
 # FILE: src/utils/visualization.py
 # =============================================================================
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
 import numpy as np
 
-class DetectionVisualizer:
-    """Visualization utilities for anomaly detection"""
-    
-    def plot_anomaly_scores(self, scores, save_path=None):
-        """Plot anomaly scores distribution"""
-        plt.figure(figsize=(10, 6))
-        plt.hist(scores, bins=50, alpha=0.7, edgecolor='black')
-        plt.title('Isolation Forest Anomaly Scores')
-        plt.xlabel('Anomaly Score')
-        plt.ylabel('Frequency')
-        
-        if save_path:
-            plt.savefig(save_path)
-            plt.close()
+# Plot name -> file written by DetectionVisualizer.render
+PLOT_FILES = {
+    'if_scores': 'if_scores.png',
+    'ae_errors': 'ae_errors.png',
+    'detection_comparison': 'detection_comparison.png',
+}
+HASH_FILE = '.plot_hashes.json'
+
+# (label, colour, alpha, marker size) of the anomaly groups in the comparison plot
+_GROUPS = (
+    ('IF Only', 'orange', 0.8, 30),
+    ('AE Only', 'green', 0.8, 30),
+    ('Both Methods', 'red', 0.9, 40),
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _render_pool(workers):
+    """Process pool shared by all visualizers of this process (created once, on first use)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the parent may run TensorFlow / OpenMP threads that must not be forked
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+        return _pool
+
+def _draw(spec):
+    """Draw a plot spec on a new Figure (object-oriented API: no pyplot global state)"""
+    from matplotlib.colors import LogNorm
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Patch
+
+    fig = Figure(figsize=spec['figsize'])
+    ax = fig.add_subplot()
+    if spec['kind'] == 'histogram':
+        edges = spec['edges']
+        ax.hist(edges[:-1], bins=edges, weights=spec['counts'], alpha=0.7, edgecolor='black')
+        if spec.get('threshold') is not None:
+            ax.axvline(spec['threshold'], color='red', linestyle='--', label=f"Threshold: {spec['threshold']:.6f}")
+            ax.legend()
+    else:
+        handles = []
+        density = spec.get('density')
+        if density is not None:
+            masked = np.ma.masked_equal(density.T, 0)
+            if masked.count():
+                ax.pcolormesh(spec['xedges'], spec['yedges'], masked, cmap='Blues', norm=LogNorm(), alpha=0.8)
+            handles.append(Patch(color='tab:blue', alpha=0.6, label=f"Normal (density of {spec['normal_total']:,})"))
         else:
-            plt.show()
-    
-    def plot_reconstruction_errors(self, errors, threshold, save_path=None):
-        """Plot reconstruction errors"""
-        plt.figure(figsize=(10, 6))
-        plt.hist(errors, bins=50, alpha=0.7, edgecolor='black')
-        plt.axvline(threshold, color='red', linestyle='--', 
-                   label=f'Threshold: {threshold:.6f}')
-        plt.title('Autoencoder Reconstruction Errors')
-        plt.xlabel('Mean Squared Error')
-        plt.ylabel('Frequency')
-        plt.legend()
-        
-        if save_path:
-            plt.savefig(save_path)
-            plt.close()
+            handles.append(ax.scatter(spec['normal_x'], spec['normal_y'], c='blue', alpha=0.6, s=20,
+                                      label=_sample_label('Normal', len(spec['normal_x']), spec['normal_total'])))
+        for (label, color, alpha, size), (x, y, total) in zip(_GROUPS, spec['groups']):
+            handles.append(ax.scatter(x, y, c=color, alpha=alpha, s=size, label=_sample_label(label, len(x), total)))
+        ax.legend(handles=handles)
+    ax.set_title(spec['title'])
+    ax.set_xlabel(spec['xlabel'])
+    ax.set_ylabel(spec['ylabel'])
+    return fig
+
+def _render(spec, path):
+    """Render a spec to an image file (runs in a worker process)"""
+    _draw(spec).savefig(path)
+    return path
+
+def _sample_label(label, shown, total):
+    return label if shown == total else f"{label} ({shown:,} of {total:,})"
+
+def _spec_hash(spec):
+    """Digest of everything a plot depends on"""
+    digest = hashlib.sha1()
+    for key in sorted(spec):
+        value = spec[key]
+        digest.update(key.encode())
+        if isinstance(value, np.ndarray):
+            digest.update(np.ascontiguousarray(value).tobytes())
+        elif key == 'groups':
+            for x, y, total in value:
+                digest.update(np.ascontiguousarray(x).tobytes() + np.ascontiguousarray(y).tobytes())
+                digest.update(str(total).encode())
         else:
-            plt.show()
-    
-    def plot_detection_comparison(self, results, X_test, save_path=None):
-        """Plot detection comparison"""
-        plt.figure(figsize=(12, 8))
-        
+            digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+class DetectionVisualizer:
+    """
+    Visualization utilities for anomaly detection
+
+    Plots are drawn from pre-aggregated data, so rendering cost does not grow
+    with the number of rows: histograms are binned with NumPy, and the
+    comparison plot shows normal rows as 2-D density bins (or a uniform
+    sample) with every anomaly on top, up to max_anomaly_points per group.
+    render() draws with the Figure API in a process pool and skips plots
+    whose input hash matches the one recorded when the file was last written.
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+        self.mode = config.get('mode', 'density')  # or 'sample'
+        self.bins = config.get('histogram_bins', 50)
+        self.density_bins = config.get('density_bins', 200)
+        self.max_normal_points = config.get('max_normal_points', 20000)
+        self.max_anomaly_points = config.get('max_anomaly_points', 50000)
+        self.workers = config.get('workers', 2)
+        self.seed = config.get('random_state', 0)
+
+    def _histogram_spec(self, values, title, xlabel, threshold=None):
+        values = np.asarray(values, dtype=np.float64)
+        # NaN marks rows a cascade ensemble never sent to the autoencoder
+        counts, edges = np.histogram(values[np.isfinite(values)], bins=self.bins)
+        return {
+            'kind': 'histogram', 'figsize': (10, 6), 'counts': counts, 'edges': edges,
+            'threshold': None if threshold is None else float(threshold),
+            'title': title, 'xlabel': xlabel, 'ylabel': 'Frequency'
+        }
+
+    def _sample(self, rng, index, limit):
+        """All of index if it fits in limit, else a uniform sample of limit rows (in row order)"""
+        if len(index) <= limit:
+            return index
+        return np.sort(rng.choice(index, limit, replace=False))
+
+    def _comparison_spec(self, results, X_test):
         if_anomalies = results['isolation_forest']['predictions'] == -1
-        ae_anomalies = results['autoencoder']['anomalies']
-        
-        normal_mask = ~(if_anomalies | ae_anomalies)
-        if_only = if_anomalies & ~ae_anomalies
-        ae_only = ae_anomalies & ~if_anomalies
-        both = if_anomalies & ae_anomalies
-        
-        plt.scatter(X_test[normal_mask, 0], X_test[normal_mask, 1], 
-                   c='blue', alpha=0.6, label='Normal', s=20)
-        plt.scatter(X_test[if_only, 0], X_test[if_only, 1], 
-                   c='orange', alpha=0.8, label='IF Only', s=30)
-        plt.scatter(X_test[ae_only, 0], X_test[ae_only, 1], 
-                   c='green', alpha=0.8, label='AE Only', s=30)
-        plt.scatter(X_test[both, 0], X_test[both, 1], 
-                   c='red', alpha=0.9, label='Both Methods', s=40)
-        
-        plt.title('Anomaly Detection Comparison')
-        plt.xlabel('Feature 1 (Normalized)')
-        plt.ylabel('Feature 2 (Normalized)')
-        plt.legend()
-        
-        if save_path:
-            plt.savefig(save_path)
-            plt.close()
+        ae_anomalies = np.asarray(results['autoencoder']['anomalies'])
+        x, y = X_test[:, 0], X_test[:, 1]
+        rng = np.random.default_rng(self.seed)
+
+        normal = np.flatnonzero(~(if_anomalies | ae_anomalies))
+        spec = {
+            'kind': 'comparison', 'figsize': (12, 8), 'normal_total': len(normal),
+            'title': 'Anomaly Detection Comparison',
+            'xlabel': 'Feature 1 (Normalized)', 'ylabel': 'Feature 2 (Normalized)'
+        }
+        if self.mode == 'density' and len(normal):
+            spec['density'], spec['xedges'], spec['yedges'] = np.histogram2d(
+                x[normal], y[normal], bins=self.density_bins
+            )
+        else:
+            shown = self._sample(rng, normal, self.max_normal_points)
+            spec['normal_x'], spec['normal_y'] = x[shown], y[shown]
+
+        spec['groups'] = []
+        for mask in (if_anomalies & ~ae_anomalies, ae_anomalies & ~if_anomalies, if_anomalies & ae_anomalies):
+            rows = np.flatnonzero(mask)
+            shown = self._sample(rng, rows, self.max_anomaly_points)
+            spec['groups'].append((x[shown], y[shown], len(rows)))
+        return spec
+
+    def specs(self, results, X_test):
+        """Aggregated plot inputs, keyed by plot name (see PLOT_FILES)"""
+        return {
+            'if_scores': self._histogram_spec(
+                results['isolation_forest']['scores'], 'Isolation Forest Anomaly Scores', 'Anomaly Score'
+            ),
+            'ae_errors': self._histogram_spec(
+                results['autoencoder']['reconstruction_errors'], 'Autoencoder Reconstruction Errors',
+                'Mean Squared Error', threshold=results['autoencoder']['threshold']
+            ),
+            'detection_comparison': self._comparison_spec(results, X_test),
+        }
+
+    def render(self, results, X_test, output_dir, force=False):
+        """
+        Write all plots to output_dir, skipping those whose inputs are unchanged
+
+        Args:
+            results (dict): Detection results
+            X_test (np.ndarray): Scored features (the first two are plotted)
+            output_dir (str): Directory for the PNG files
+            force (bool): Re-render even if the inputs are unchanged
+
+        Returns:
+            dict: plot name -> 'rendered' or 'unchanged'
+        """
+        output_dir = Path(output_dir)
+        hash_path = output_dir / HASH_FILE
+        try:
+            with open(hash_path) as f:
+                previous = json.load(f)
+        except (FileNotFoundError, ValueError):
+            previous = {}
+
+        hashes, status, pending = {}, {}, {}
+        for name, spec in self.specs(results, X_test).items():
+            path = output_dir / PLOT_FILES[name]
+            hashes[name] = _spec_hash(spec)
+            if not force and path.exists() and previous.get(name) == hashes[name]:
+                status[name] = 'unchanged'
+            else:
+                pending[name] = (spec, str(path))
+
+        if self.workers and len(pending) > 1:
+            pool = _render_pool(min(self.workers, os.cpu_count() or 1, len(PLOT_FILES)))
+            futures = {name: pool.submit(_render, spec, path) for name, (spec, path) in pending.items()}
+            for name, future in futures.items():
+                future.result()
+                status[name] = 'rendered'
         else:
-            plt.show()
+            for name, (spec, path) in pending.items():
+                _render(spec, path)
+                status[name] = 'rendered'
+
+        with open(hash_path, 'w') as f:
+            json.dump(hashes, f, indent=2)
+        return status
+
+    def plot_anomaly_scores(self, scores, save_path=None):
+        """Plot anomaly scores distribution (returns the Figure if no save_path)"""
+        fig = _draw(self._histogram_spec(scores, 'Isolation Forest Anomaly Scores', 'Anomaly Score'))
+        return fig.savefig(save_path) if save_path else fig
+
+    def plot_reconstruction_errors(self, errors, threshold, save_path=None):
+        """Plot reconstruction errors (returns the Figure if no save_path)"""
+        fig = _draw(self._histogram_spec(
+            errors, 'Autoencoder Reconstruction Errors', 'Mean Squared Error', threshold=threshold
+        ))
+        return fig.savefig(save_path) if save_path else fig
+
+    def plot_detection_comparison(self, results, X_test, save_path=None):
+        """Plot detection comparison (returns the Figure if no save_path)"""
+        fig = _draw(self._comparison_spec(results, X_test))
+        return fig.savefig(save_path) if save_path else fig
@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+ROOT = Path(__file__).resolve().parent.parent
+# Modules import each other as top-level packages (data, models, utils), as when run as src/main.py
+sys.path.insert(0, str(ROOT / 'src'))
+
+
+@pytest.fixture(scope='session')
+def config_path(tmp_path_factory):
+    """The shipped configuration, scaled down so the pipeline trains in seconds"""
+    with open(ROOT / 'config' / 'config.yaml') as f:
+        config = yaml.safe_load(f)
+    tmp = tmp_path_factory.mktemp('config')
+    config['models']['execution']['executor'] = 'serial'
+    config['models']['isolation_forest']['n_estimators'] = 20
+    config['models']['autoencoder']['epochs'] = 2
+    config['data']['sample_size'] = 3000
+    config['visualization']['workers'] = 0
+    config['logging']['file'] = str(tmp / 'detector.log')
+    path = tmp / 'config.yaml'
+    with open(path, 'w') as f:
+        yaml.safe_dump(config, f)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def trained(config_path, tmp_path_factory):
+    """A system trained on generated sample data, with its models saved as a bundle"""
+    from main import NetworkAnomalyDetectionSystem
+
+    system = NetworkAnomalyDetectionSystem(config_path)
+    data = system.load_data(generate_sample=True)
+    X_train, X_test, _, y_test = system.preprocess_data(data)
+    system.train_models(X_train)
+    model_dir = tmp_path_factory.mktemp('models') / 'saved_models'
+    system.save_models(str(model_dir))
+    return {'system': system, 'data': data, 'X_test': X_test, 'y_test': y_test, 'model_dir': str(model_dir)}
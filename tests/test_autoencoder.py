@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from models.autoencoder import AutoencoderDetector
+
+CONFIG = {'epochs': 6, 'batch_size': 64, 'validation_split': 0.2, 'verbose': 0, 'stream_block_rows': 500,
+          'early_stopping': {'patience': 2, 'min_delta': 0.0}}
+
+
+def _features(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    latent = rng.normal(size=(rows, 3))
+    return (latent @ rng.normal(size=(3, 8)) + 0.1 * rng.normal(size=(rows, 8))).astype(np.float32)
+
+
+def test_threshold_comes_from_the_kept_epochs_validation_errors():
+    X = _features(2500)
+    detector = AutoencoderDetector(CONFIG, threshold_percentile=90)
+    detector.train(X, cpu_threads=2)
+    assert 1 <= detector.epochs_trained <= CONFIG['epochs']
+
+    # The kept (restored) weights reproduce the errors sketched during that epoch's validation pass
+    validation = X[-int(len(X) * CONFIG['validation_split']):]
+    errors = detector.reconstruction_errors(validation)
+    assert detector.sketch.n == len(validation)
+    assert np.mean(errors <= detector.threshold) == pytest.approx(0.9, abs=0.01)
+
+
+def test_model_stays_usable_after_training():
+    X = _features(600)
+    detector = AutoencoderDetector({**CONFIG, 'epochs': 1})
+    detector.train(X, cpu_threads=2)
+    sketch = detector.sketch
+    # The per-row error sketch is gone from the compiled model: evaluate() and fit() still work
+    loss, mae = detector.model.evaluate(X, X, verbose=0)
+    assert np.isfinite(loss) and np.isfinite(mae)
+    detector.model.fit(X, X, epochs=1, verbose=0)
+    assert detector.sketch is sketch and sketch.n == int(600 * CONFIG['validation_split'])
+
+
+def test_trains_from_npy_files(tmp_path):
+    paths = []
+    for i in range(2):
+        paths.append(tmp_path / f'part{i}.npy')
+        np.save(paths[-1], _features(1200, seed=i))
+    detector = AutoencoderDetector({**CONFIG, 'epochs': 2})
+    detector.train([str(p) for p in paths], cpu_threads=2)
+    # Each file holds out its own last validation_split rows
+    assert detector.sketch.n == 2 * int(1200 * CONFIG['validation_split'])
+    assert detector.predict(_features(100))['anomalies'].shape == (100,)
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from batch import REPORT_FILE, SKETCH_FILE, SUMMARY_FILE, _load_sketches
+from models.bundle import MANIFEST_FILE
+
+
+@pytest.fixture(scope='module')
+def captures(trained, tmp_path_factory):
+    """Two labelled capture files cut from the generated sample"""
+    directory = tmp_path_factory.mktemp('captures')
+    data = trained['data']
+    half = len(data) // 2
+    data.iloc[:half].to_csv(directory / 'a.csv', index=False)
+    data.iloc[half:].to_csv(directory / 'b.csv', index=False)
+    return directory
+
+
+@pytest.fixture(scope='module')
+def batch(trained, captures, tmp_path_factory):
+    output_dir = tmp_path_factory.mktemp('batch')
+    report = trained['system'].detect_batch(str(captures), str(output_dir), trained['model_dir'], workers=1,
+                                            chunk_size=400)
+    return {'report': report, 'output_dir': output_dir}
+
+
+def test_thresholds_merge_every_files_sketch(trained, batch):
+    report = batch['report']
+    assert report['files']['scored'] == 2
+    thresholds = report['thresholds']
+    assert thresholds['isolation_forest']['rows'] == report['total_samples'] == len(trained['data'])
+
+    files = sorted((batch['output_dir'] / 'files').iterdir())
+    sketches = [_load_sketches(f / SKETCH_FILE) for f in files]
+    assert sum(s['isolation_forest'].n for s in sketches) == report['total_samples']
+    # Every score went into a sketch, so the merged quantile sits within a small rank error of the true one
+    detector = trained['system'].if_detector
+    scores = detector.predict(trained['system'].preprocessor.transform(trained['data'])[1])['scores'] + detector.offset
+    q = thresholds['isolation_forest']['quantile']
+    rank = np.mean(scores <= thresholds['isolation_forest']['offset'])
+    assert rank == pytest.approx(q, abs=0.01)
+
+    with open(batch['output_dir'] / REPORT_FILE) as f:
+        assert json.load(f)['thresholds'] == thresholds
+
+
+def test_resume_skips_files_scored_with_the_same_models(trained, captures, batch):
+    system, output_dir = trained['system'], str(batch['output_dir'])
+    report = system.detect_batch(str(captures), output_dir, trained['model_dir'], workers=1)
+    assert report['files'] == {'scored': 0, 'resumed': 2, 'failed': 0, 'total': 2}
+    assert report['total_samples'] == batch['report']['total_samples']
+    assert report['thresholds'] == batch['report']['thresholds']
+
+
+def test_resume_rescores_changed_files_and_models(trained, captures, tmp_path):
+    system = trained['system']
+    report = system.detect_batch(str(captures), str(tmp_path), trained['model_dir'], workers=1, chunk_size=400)
+    assert report['files']['scored'] == 2
+
+    # Same size, newer modification time
+    path = captures / 'a.csv'
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    report = system.detect_batch(str(captures), str(tmp_path), trained['model_dir'], workers=1)
+    assert {e['file']: e['status'] for e in report['per_file']} == {str(path): 'scored',
+                                                                    str(captures / 'b.csv'): 'resumed'}
+
+    # Retrained (here: re-saved) models invalidate every summary
+    model_dir = tmp_path / 'models'
+    shutil.copytree(trained['model_dir'], model_dir)
+    report = system.detect_batch(str(captures), str(tmp_path), str(model_dir), workers=1)
+    assert report['files']['resumed'] == 2  # an identical copy is the same bundle
+    manifest = model_dir / MANIFEST_FILE
+    meta = json.loads(manifest.read_text())
+    meta['created_at'] = '2000-01-01T00:00:00'
+    manifest.write_text(json.dumps(meta))
+    report = system.detect_batch(str(captures), str(tmp_path), str(model_dir), workers=1)
+    assert report['files']['scored'] == 2
+
+
+def test_drift_is_per_file(batch):
+    # One worker scored both files, yet each summary's drift counts only that file's rows
+    for entry in batch['report']['per_file']:
+        with open(os.path.join(entry['output'], SUMMARY_FILE)) as f:
+            summary = json.load(f)
+        assert summary['drift']['rows_observed'] == summary['total_samples'] == entry['rows']
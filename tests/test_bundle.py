@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pytest
+
+from models.bundle import (
+    BundleError, BundleSchemaError, MANIFEST_FILE, config_hash, is_bundle, read_bundle, write_bundle
+)
+
+
+def _write(path, **kwargs):
+    sections = {'model': {'weights': np.arange(12, dtype=np.float32).reshape(3, 4), 'bias': np.ones(4)}}
+    return write_bundle(path, sections, schema={'feature_names': ['a', 'b', 'c']}, metadata={'model': {'k': 3}},
+                        **kwargs)
+
+
+def test_round_trip_memory_maps_arrays(tmp_path):
+    path = tmp_path / 'bundle'
+    manifest = _write(path, config={'epochs': 2})
+    assert is_bundle(path)
+    assert manifest['config_hash'] == config_hash({'epochs': 2})
+
+    read_manifest, sections = read_bundle(path, expected_features=['c', 'b', 'a', 'extra'])
+    assert read_manifest['metadata'] == {'model': {'k': 3}}
+    weights = sections['model']['weights']
+    assert isinstance(weights, np.memmap) and not weights.flags.writeable
+    np.testing.assert_array_equal(weights, np.arange(12, dtype=np.float32).reshape(3, 4))
+    assert not isinstance(read_bundle(path, mmap=False)[1]['model']['bias'], np.memmap)
+
+
+def test_rewrite_replaces_bundle_atomically(tmp_path):
+    path = tmp_path / 'bundle'
+    _write(path)
+    _write(path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['bundle']
+
+
+def test_refuses_to_replace_other_directories(tmp_path):
+    path = tmp_path / 'models'
+    path.mkdir()
+    _write(path)  # an empty directory is fine
+    legacy = tmp_path / 'legacy'
+    legacy.mkdir()
+    (legacy / 'isolation_forest.joblib').write_bytes(b'model')
+    (legacy / 'notes.txt').write_text('keep me')
+    with pytest.raises(BundleError, match='not a model bundle'):
+        _write(legacy)
+    assert sorted(p.name for p in legacy.iterdir()) == ['isolation_forest.joblib', 'notes.txt']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['legacy', 'models']
+
+
+def test_missing_features_are_rejected(tmp_path):
+    _write(tmp_path / 'bundle')
+    with pytest.raises(BundleSchemaError, match="'c'"):
+        read_bundle(tmp_path / 'bundle', expected_features=['a', 'b'])
+
+
+def test_unsupported_version_and_missing_bundle(tmp_path):
+    path = tmp_path / 'bundle'
+    _write(path)
+    manifest = json.loads((path / MANIFEST_FILE).read_text())
+    manifest['version'] = 99
+    (path / MANIFEST_FILE).write_text(json.dumps(manifest))
+    with pytest.raises(BundleError, match='version'):
+        read_bundle(path)
+    with pytest.raises(BundleError):
+        read_bundle(tmp_path / 'missing')
+
+
+def test_object_arrays_are_rejected(tmp_path):
+    with pytest.raises(BundleError, match='object'):
+        write_bundle(tmp_path / 'bundle', {'s': {'x': np.array(['a', None], dtype=object)}},
+                     schema={'feature_names': []})
+
+
+def test_system_round_trip_gives_identical_predictions(trained, config_path):
+    from main import NetworkAnomalyDetectionSystem
+
+    loaded = NetworkAnomalyDetectionSystem(config_path)
+    loaded.load_models(trained['model_dir'])
+    data = trained['data'].head(500)
+    _, X, _, _ = trained['system'].preprocessor.transform(data)
+    _, X_loaded, _, _ = loaded.preprocessor.transform(data)
+    np.testing.assert_array_equal(X, X_loaded)
+
+    expected, actual = trained['system'].detect_anomalies(X), loaded.detect_anomalies(X_loaded)
+    np.testing.assert_allclose(actual['isolation_forest']['scores'], expected['isolation_forest']['scores'],
+                               atol=1e-12)
+    np.testing.assert_allclose(actual['autoencoder']['reconstruction_errors'],
+                               expected['autoencoder']['reconstruction_errors'], rtol=1e-5)
+    np.testing.assert_array_equal(actual['ensemble'], expected['ensemble'])
+    assert actual['autoencoder']['threshold'] == pytest.approx(expected['autoencoder']['threshold'])
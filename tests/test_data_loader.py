@@ -0,0 +1,84 @@
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.data_loader import NetworkDataLoader, file_format
+
+FRAME = pd.DataFrame({
+    'duration': [1.5, 2.0, 0.25, 4.0],
+    'protocol': ['tcp', 'udp', None, 'tcp'],
+    'count': [3, 4, 5, 6],
+    'ignored': [9, 9, 9, 9],
+    'label': [0, 1, 0, 0],
+})
+CONFIG = {'features': ['duration', 'protocol', 'count'], 'chunk_size': 2}
+
+
+def _write_zip(path, text):
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(path.name[:-len('.zip')], text)
+
+
+@pytest.mark.parametrize('name', ['data.csv', 'data.CSV.GZ', 'data.jsonl.bz2', 'data.json.zip', 'data.parquet'])
+def test_file_format(name):
+    assert file_format(name) in ('csv', 'jsonl', 'json', 'parquet')
+
+
+def test_file_format_rejects_compressed_columnar():
+    with pytest.raises(ValueError):
+        file_format('data.parquet.gz')
+
+
+@pytest.mark.parametrize('lines', [False, True])
+def test_zipped_json_is_sniffed_after_decompression(tmp_path, lines):
+    path = tmp_path / ('data.jsonl.zip' if lines else 'data.json.zip')
+    _write_zip(path, FRAME.to_json(orient='records', lines=lines))
+    loaded = NetworkDataLoader(CONFIG).load_from_file(str(path))
+    assert list(loaded.columns) == ['duration', 'protocol', 'count', 'label']
+    assert loaded['label'].tolist() == [0, 1, 0, 0]
+
+
+def test_gzipped_json_array(tmp_path):
+    path = tmp_path / 'data.json.gz'
+    FRAME.to_json(path, orient='records')
+    chunks = list(NetworkDataLoader(CONFIG).iter_chunks(str(path)))
+    assert [len(c) for c in chunks] == [2, 2]
+
+
+def test_projection_and_downcast(tmp_path):
+    path = tmp_path / 'data.csv'
+    FRAME.to_csv(path, index=False)
+    loaded = NetworkDataLoader(CONFIG).load_from_file(str(path))
+    assert 'ignored' not in loaded.columns
+    assert loaded['duration'].dtype == np.float32
+    assert isinstance(loaded['protocol'].dtype, pd.CategoricalDtype)
+    assert loaded['label'].dtype == np.int64
+
+
+def test_chunks_keep_schema_and_missing_values(tmp_path):
+    path = tmp_path / 'data.jsonl'
+    frame = FRAME.copy()
+    # Text in the first chunk fixes the column as str; the second has none (parsed as all-NaN floats)
+    frame['protocol'] = ['tcp', 'udp', None, None]
+    frame.to_json(path, orient='records', lines=True)
+    loader = NetworkDataLoader({**CONFIG, 'chunk_size': 2})
+    chunks = list(loader.iter_chunks(str(path)))
+    assert [c['duration'].dtype for c in chunks] == [np.float32, np.float32]
+    assert chunks[0]['protocol'].tolist() == ['tcp', 'udp']
+    assert chunks[1]['protocol'].dtype == object
+    assert chunks[1]['protocol'].isna().all()
+
+
+def test_stabilize_dtypes_keeps_nan():
+    chunk = pd.DataFrame({'service': pd.Series([1.0, np.nan]), 'flag': pd.Categorical(['SF', None])})
+    out = NetworkDataLoader._stabilize_dtypes(chunk, {'service': object, 'flag': object})
+    assert out['service'].tolist()[0] == '1.0' and pd.isna(out['service'].tolist()[1])
+    assert out['flag'].tolist()[0] == 'SF' and pd.isna(out['flag'].tolist()[1])
+
+
+def test_peek_columns(tmp_path):
+    path = tmp_path / 'data.csv.gz'
+    FRAME.to_csv(path, index=False)
+    assert NetworkDataLoader(CONFIG).peek_columns(str(path)) == list(FRAME.columns)
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from data.encoding import CategoricalEncoder
+
+
+def _fitted():
+    df = pd.DataFrame({'protocol': ['tcp', 'udp', 'icmp', 'tcp']})
+    return CategoricalEncoder().fit(df, ['protocol'])
+
+
+def test_known_values_get_sorted_table_codes():
+    encoder = _fitted()
+    codes = encoder.transform_column('protocol', pd.Series(['udp', 'tcp', 'icmp']))
+    assert codes.tolist() == [2, 1, 0]
+    assert codes.dtype == np.int64
+
+
+def test_unseen_and_missing_values_go_to_reserved_bucket():
+    encoder = _fitted()
+    codes = encoder.transform_column('protocol', pd.Series(['gre', None, 'tcp']))
+    assert encoder.unseen_code('protocol') == 3
+    assert codes.tolist() == [3, 3, 1]
+
+
+def test_missing_values_seen_at_fit_get_their_own_code():
+    df = pd.DataFrame({'service': ['http', None, 'dns']})
+    encoder = CategoricalEncoder().fit(df, ['service'])
+    codes = encoder.transform_column('service', pd.Series([None, 'http', 'smtp']))
+    assert codes[0] == encoder.tables['service'].get_loc(CategoricalEncoder.MISSING)
+    assert codes[2] == encoder.unseen_code('service')
+
+
+def test_from_tables_round_trip():
+    encoder = _fitted()
+    rebuilt = CategoricalEncoder.from_tables({'protocol': encoder.categories('protocol').astype(str)})
+    series = pd.Series(['icmp', 'gre', 'udp', 'tcp'])
+    np.testing.assert_array_equal(rebuilt.transform_column('protocol', series),
+                                  encoder.transform_column('protocol', series))
+    assert 'protocol' in rebuilt and 'service' not in rebuilt
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from models.ensemble import EnsembleDetector
+
+
+def _cascade(**cascade):
+    return EnsembleDetector({'ensemble_method': 'cascade', 'cascade': cascade})
+
+
+def test_cascade_rules():
+    scores = np.array([-0.2, -0.01, 0.01, 0.2])
+    ae = np.array([False, False, True, True])
+    union = _cascade(lower=0.0, upper=0.03)
+    assert union.combine_cascade(scores, ae, union.uncertain(scores)).tolist() == [True, True, True, False]
+    # Intersection lets the autoencoder clear IF anomalies near the boundary
+    both = _cascade(lower=-0.05, upper=0.03, combine='intersection')
+    assert both.combine_cascade(scores, ae, both.uncertain(scores)).tolist() == [True, False, False, False]
+
+
+def test_rejects_cascade_settings_that_cannot_work():
+    with pytest.raises(ValueError, match="combine rule 'unoin'"):
+        _cascade(combine='unoin')
+    with pytest.raises(ValueError, match='negative lower bound'):
+        _cascade(lower=0.0, combine='intersection')
+    # Only checked when the cascade is used
+    EnsembleDetector({'ensemble_method': 'union', 'cascade': {'combine': 'intersection'}})
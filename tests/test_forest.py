@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from models.forest import PackedForest, average_path_length
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 6))
+    X[:50] *= 8  # a few outliers
+    return X
+
+
+@pytest.mark.parametrize('max_features', [1.0, 0.5])
+def test_packed_scores_match_sklearn(data, max_features):
+    model = IsolationForest(n_estimators=30, max_features=max_features, random_state=0).fit(data)
+    forest = PackedForest.from_sklearn(model, block_size=256)
+    assert forest.compiled
+    X = np.random.default_rng(1).normal(scale=3, size=(1000, 6))
+    np.testing.assert_allclose(forest.score_samples(X), model.score_samples(X), rtol=0, atol=1e-12)
+    np.testing.assert_allclose(forest.decision_function(X), model.decision_function(X), rtol=0, atol=1e-12)
+
+
+def test_pointer_fallback_matches_compiled(data, monkeypatch):
+    model = IsolationForest(n_estimators=10, random_state=0).fit(data)
+    compiled = PackedForest.from_sklearn(model).score_samples(data)
+    monkeypatch.setattr(PackedForest, 'MAX_COMPILED_NODES', 0)
+    forest = PackedForest.from_sklearn(model)
+    assert not forest.compiled
+    np.testing.assert_allclose(forest.score_samples(data), compiled, rtol=0, atol=1e-12)
+
+
+def test_float32_thresholds_route_like_sklearn():
+    # Feature values just either side of a split must go the same way in both implementations
+    X = np.linspace(0, 1, 257).reshape(-1, 1).astype(np.float32)
+    model = IsolationForest(n_estimators=5, random_state=0).fit(X)
+    forest = PackedForest.from_sklearn(model)
+    probe = np.nextafter(X, np.float32(2)).astype(np.float64)
+    np.testing.assert_allclose(forest.score_samples(probe), model.score_samples(probe), rtol=0, atol=1e-12)
+
+
+def test_arrays_round_trip(data):
+    model = IsolationForest(n_estimators=10, random_state=0).fit(data)
+    forest = PackedForest.from_sklearn(model)
+    rebuilt = PackedForest.from_arrays(forest.arrays(), forest.params())
+    np.testing.assert_array_equal(rebuilt.score_samples(data), forest.score_samples(data))
+
+
+def test_rejects_wrong_feature_count(data):
+    forest = PackedForest.from_sklearn(IsolationForest(n_estimators=2, random_state=0).fit(data))
+    with pytest.raises(ValueError, match='6 features'):
+        forest.score_samples(data[:, :5])
+
+
+def test_average_path_length():
+    np.testing.assert_allclose(average_path_length([0, 1, 2]), [0.0, 0.0, 1.0])
+    assert average_path_length([256])[0] == pytest.approx(10.2448, abs=1e-4)
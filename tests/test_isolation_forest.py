@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+
+from models.isolation_forest import IsolationForestDetector
+
+CONFIG = {'contamination': 0.1, 'n_estimators': 25, 'random_state': 0, 'n_jobs': 1}
+
+
+@pytest.fixture(scope='module')
+def X():
+    return np.random.default_rng(0).normal(size=(3000, 5))
+
+
+def test_offset_is_sklearns_exact_percentile(X):
+    detector = IsolationForestDetector(CONFIG)
+    detector.train(X)
+    reference = IsolationForest(contamination=0.1, n_estimators=25, random_state=0).fit(X)
+    assert detector.offset == pytest.approx(reference.offset_, abs=1e-12)
+    assert detector.sketch.n == len(X)
+    np.testing.assert_allclose(detector.predict(X)['scores'], reference.decision_function(X), atol=1e-12)
+    assert np.mean(detector.predict(X)['predictions'] == -1) == pytest.approx(0.1, abs=1e-3)
+
+
+def test_training_scores_each_row_once(X, monkeypatch):
+    calls = []
+    original = IsolationForestDetector._score_samples
+
+    def counting(self, rows):
+        calls.append(len(rows))
+        return original(self, rows)
+
+    monkeypatch.setattr(IsolationForestDetector, '_score_samples', counting)
+    monkeypatch.setattr(IsolationForest, 'score_samples', lambda self, rows: pytest.fail('scored outside the single pass'))
+    monkeypatch.setattr(IsolationForest, 'decision_function', lambda self, rows: pytest.fail('scored outside the single pass'))
+    IsolationForestDetector(CONFIG).train(X)
+    assert sum(calls) == len(X)
+
+
+def test_calibrate_moves_offset_to_new_traffic(X):
+    detector = IsolationForestDetector(CONFIG)
+    detector.train(X)
+    shifted = X + 1.5
+    offset = detector.calibrate(shifted, reset=True)
+    assert offset == detector.offset
+    assert np.mean(detector.predict(shifted)['predictions'] == -1) == pytest.approx(0.1, abs=0.01)
+
+
+def test_auto_contamination_keeps_sklearn_offset(X):
+    detector = IsolationForestDetector({**CONFIG, 'contamination': 'auto'})
+    detector.train(X)
+    assert detector.offset == -0.5
+    assert detector.sketch.n == len(X)
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from jobs import Job, JobManager, JobQueueFull
+
+
+def test_job_runs_in_background_and_reports_result():
+    manager = JobManager(max_workers=1)
+    job = manager.submit('demo', lambda job, x: x * 2, 21)
+    manager.shutdown(wait=True)
+    assert job.status == 'succeeded'
+    assert job.to_dict()['result'] == 42
+    assert job.progress == 1.0
+
+
+def test_failed_job_records_error_and_logs(caplog):
+    def fail(job):
+        raise RuntimeError("boom")
+
+    manager = JobManager(max_workers=1)
+    job = manager.submit('demo', fail)
+    manager.shutdown(wait=True)
+    assert job.status == 'failed'
+    assert job.error == 'RuntimeError: boom'
+    assert any(record.exc_info for record in caplog.records)
+
+
+def test_queue_rejects_when_full():
+    release = threading.Event()
+    manager = JobManager(max_workers=1, max_pending=1)
+    manager.submit('demo', lambda job: release.wait())
+    while manager.list()[0].status != 'running':
+        pass
+    manager.submit('demo', lambda job: None)
+    with pytest.raises(JobQueueFull):
+        manager.submit('demo', lambda job: None)
+    release.set()
+    manager.shutdown(wait=True)
+
+
+def test_timings_are_snapshots():
+    job = Job('pipeline', stages=('load', 'train'))
+    timings = {'pipeline': {'load_sec': 1.0}}
+    job.set_timings(timings)
+    timings['pipeline']['train_sec'] = 2.0
+    data = job.to_dict()
+    assert data['timings'] == {'pipeline': {'load_sec': 1.0}}
+    assert data['progress'] == 0.5
@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    accuracy_score, average_precision_score, f1_score, precision_score, recall_score, roc_auc_score
+)
+
+from utils.metrics import ConfusionCounts, DetectionMetrics, ScoreHistogram, StreamingMetrics, binary_labels
+
+
+def _batch(rng, n):
+    y = rng.random(n) < 0.1
+    if_scores = rng.normal(0.05, 0.05, n) - 0.15 * y
+    errors = np.exp(rng.normal(-3, 0.5, n) + 1.5 * y)
+    return y.astype(int), {
+        'isolation_forest': {'scores': if_scores, 'predictions': np.where(if_scores < 0, -1, 1)},
+        'autoencoder': {'reconstruction_errors': errors, 'anomalies': errors > 0.1},
+    }
+
+
+def test_confusion_counts_match_sklearn():
+    rng = np.random.default_rng(0)
+    y, pred = rng.integers(0, 2, 1000), rng.integers(0, 2, 1000)
+    metrics = ConfusionCounts().update(y[:400], pred[:400]).merge(ConfusionCounts().update(y[400:], pred[400:])).metrics()
+    assert metrics['precision'] == pytest.approx(precision_score(y, pred))
+    assert metrics['recall'] == pytest.approx(recall_score(y, pred))
+    assert metrics['f1_score'] == pytest.approx(f1_score(y, pred))
+    assert metrics['accuracy'] == pytest.approx(accuracy_score(y, pred))
+    assert sum(metrics['confusion'].values()) == 1000
+
+
+def test_no_positives_gives_zero_not_nan():
+    metrics = DetectionMetrics().calculate_metrics(np.zeros(5), np.zeros(5))
+    assert metrics == {'precision': 0.0, 'recall': 0.0, 'f1_score': 0.0, 'accuracy': 1.0}
+
+
+def test_streaming_metrics_match_sklearn_in_batches():
+    rng = np.random.default_rng(1)
+    streaming = StreamingMetrics({'bins': 4000})
+    ys, batches = [], []
+    for _ in range(5):
+        y, results = _batch(rng, 20000)
+        ensemble = (results['isolation_forest']['predictions'] == -1) & results['autoencoder']['anomalies']
+        streaming.update(y, results['isolation_forest'], results['autoencoder'], ensemble)
+        ys.append(y)
+        batches.append((results, ensemble))
+    y = np.concatenate(ys)
+    if_scores = np.concatenate([r['isolation_forest']['scores'] for r, _ in batches])
+    errors = np.concatenate([r['autoencoder']['reconstruction_errors'] for r, _ in batches])
+    ensemble = np.concatenate([e for _, e in batches])
+    result = streaming.result()
+
+    assert result['ensemble']['f1_score'] == pytest.approx(f1_score(y, ensemble))
+    # Binned curves: AUCs agree with the exact ones to the bin resolution
+    assert result['isolation_forest']['roc_auc'] == pytest.approx(roc_auc_score(y, -if_scores), abs=2e-3)
+    assert result['autoencoder']['roc_auc'] == pytest.approx(roc_auc_score(y, errors), abs=2e-3)
+    assert result['autoencoder']['pr_auc'] == pytest.approx(average_precision_score(y, errors), abs=1e-2)
+    best = result['autoencoder']['best_thresholds'][0]
+    assert best['f1_score'] == pytest.approx(f1_score(y, errors > best['threshold']), abs=1e-3)
+
+
+def test_merge_and_array_round_trip_equal_one_pass():
+    rng = np.random.default_rng(2)
+    y1, r1 = _batch(rng, 5000)
+    y2, r2 = _batch(rng, 5000)
+    ens1, ens2 = r1['autoencoder']['anomalies'], r2['autoencoder']['anomalies']
+    one = StreamingMetrics().update(y1, r1['isolation_forest'], r1['autoencoder'], ens1)
+    one.update(y2, r2['isolation_forest'], r2['autoencoder'], ens2)
+    a = StreamingMetrics().update(y1, r1['isolation_forest'], r1['autoencoder'], ens1)
+    b = StreamingMetrics().update(y2, r2['isolation_forest'], r2['autoencoder'], ens2)
+    merged = StreamingMetrics.from_arrays(a.arrays()).merge(StreamingMetrics.from_arrays(b.arrays()))
+    assert merged.result() == one.result()
+
+
+def test_histogram_counts_missing_scores_and_rejects_other_bins():
+    histogram = ScoreHistogram(0, 1, bins=10).update([0.5, np.nan, 2.0], [1, 0, 0])
+    assert histogram.missing == 1
+    assert histogram.counts.sum() == 2  # out-of-range scores go to the edge bins
+    with pytest.raises(ValueError, match='different bins'):
+        histogram.merge(ScoreHistogram(0, 1, bins=20))
+
+
+@pytest.mark.parametrize('labels, expected', [
+    ([0, 1, 1], [False, True, True]),
+    ([0.0, 1.0], [False, True]),
+    ([True, False], [True, False]),
+    (np.array(['normal', 'Attack', 'BENIGN', 'anomaly'], dtype=object), [False, True, False, True]),
+    (np.array(['0', '1', '1.0']), [False, True, True]),
+])
+def test_binary_labels(labels, expected):
+    assert binary_labels(labels).tolist() == expected
+
+
+@pytest.mark.parametrize('labels', [[-1, 1, 1], [0, 2], np.array(['normal', 'dos', 'scan'], dtype=object),
+                                    np.array(['normal', None], dtype=object)])
+def test_non_binary_labels_are_rejected(labels):
+    with pytest.raises(ValueError, match='binary|0 \\(normal\\)'):
+        binary_labels(labels)
+    with pytest.raises(ValueError):
+        ConfusionCounts().update(labels, np.zeros(len(labels), dtype=bool))
+
+
+def test_rejected_batch_leaves_accumulator_unchanged():
+    rng = np.random.default_rng(3)
+    y, results = _batch(rng, 10)
+    metrics = StreamingMetrics()
+    with pytest.raises(ValueError):
+        metrics.update(np.where(y == 1, 'dos', 'normal').astype(object), results['isolation_forest'],
+                       results['autoencoder'], np.zeros(10, dtype=bool))
+    assert metrics.confusion['ensemble'].total == 0
+    assert metrics.histograms['autoencoder'].counts.sum() == 0
+
+
+def test_evaluate_performance_falls_back_for_attack_types(trained):
+    system = trained['system']
+    X = trained['X_test'][:50]
+    results = system.detect_anomalies(X)
+    labels = np.array(['normal', 'dos'] * 25, dtype=object)
+    metrics = system.evaluate_performance(results, labels)
+    assert 'label_error' in metrics and 'detection_rates' in metrics
+    supervised = system.evaluate_performance(results, np.array(['normal', 'attack'] * 25, dtype=object))
+    assert set(supervised) == {'isolation_forest', 'autoencoder', 'ensemble'}
+
+
+def test_chunked_detection_with_attack_type_labels(trained, tmp_path):
+    from utils.results_store import ResultStore
+
+    data = trained['data'].head(300).copy()
+    data['label'] = np.where(data['label'] == 1, 'dos', 'normal')
+    path = tmp_path / 'attacks.csv'
+    data.to_csv(path, index=False)
+    summary = trained['system'].detect_anomalies_chunked(str(path), str(tmp_path / 'store'), chunk_size=100)
+    assert summary['total_samples'] == 300
+    assert 'metrics' not in summary and 'binary' in summary['metrics_error']
+    rows = ResultStore(tmp_path / 'store').query(0, 300)['rows']
+    assert [r['label'] for r in rows] == data['label'].tolist()
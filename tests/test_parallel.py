@@ -0,0 +1,60 @@
+import threading
+
+import numpy as np
+import pytest
+from threadpoolctl import threadpool_info, threadpool_limits
+
+from models import parallel
+from models.parallel import ModelExecutor
+
+
+def _blas_threads():
+    return {info['num_threads'] for info in threadpool_info() if info['user_api'] == 'blas'}
+
+
+@pytest.fixture
+def eight_cpus(monkeypatch):
+    monkeypatch.setattr(parallel.os, 'cpu_count', lambda: 8)
+
+
+def test_serial_gives_each_model_every_cpu(eight_cpus):
+    assert ModelExecutor({'executor': 'serial'}).cpu_budget == {'isolation_forest': 8, 'autoencoder': 8}
+    assert ModelExecutor({'executor': 'thread'}).cpu_budget == {'isolation_forest': 4, 'autoencoder': 4}
+    budget = {'isolation_forest': 2, 'autoencoder': 3}
+    assert ModelExecutor({'executor': 'serial', 'cpu_budget': budget}).cpu_budget == budget
+
+
+class _Detector:
+    """Stand-in detector reporting the BLAS thread count it scored under"""
+
+    def __init__(self, entered=None, release=None):
+        self.entered, self.release = entered, release
+
+    def predict(self, X):
+        if self.entered is not None:
+            self.entered.set()
+            self.release.wait(5)
+        return _blas_threads()
+
+
+def test_blas_cap_is_lifted_after_scoring(eight_cpus):
+    if not _blas_threads():
+        pytest.skip("no BLAS library loaded")
+    executor = ModelExecutor({'executor': 'thread', 'cpu_budget': {'autoencoder': 1}})
+    with threadpool_limits(limits=3, user_api='blas'):
+        if_threads, ae_threads, _ = executor.predict(_Detector(), _Detector(), np.zeros((2, 2)))
+        assert if_threads == ae_threads == {1}
+        assert _blas_threads() == {3}
+
+        # Overlapping callers: the cap holds until the last one finishes
+        entered, release = threading.Event(), threading.Event()
+        slow = threading.Thread(target=executor.predict,
+                                args=(_Detector(entered, release), _Detector(), np.zeros((2, 2))))
+        slow.start()
+        entered.wait(5)
+        executor.predict(_Detector(), _Detector(), np.zeros((2, 2)))
+        assert _blas_threads() == {1}
+        release.set()
+        slow.join()
+        assert _blas_threads() == {3}
+    executor.shutdown()
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from models.quantile_sketch import QuantileSketch
+
+QS = np.array([0.001, 0.01, 0.05, 0.1, 0.5, 0.9, 0.95, 0.99, 0.999])
+
+
+def _rank_error(values, sketch):
+    """Largest gap between the requested quantile and the true rank of the sketch's answer"""
+    ranks = np.searchsorted(np.sort(values), sketch.quantile(QS), side='right') / len(values)
+    return np.max(np.abs(ranks - QS))
+
+
+@pytest.mark.parametrize('distribution', ['normal', 'lognormal', 'discrete'])
+def test_rank_error_within_bound(distribution):
+    rng = np.random.default_rng(0)
+    values = {
+        'normal': lambda: rng.normal(size=300_000),
+        'lognormal': lambda: rng.lognormal(0, 2, 300_000),
+        'discrete': lambda: rng.integers(0, 50, 300_000).astype(float),
+    }[distribution]()
+    sketch = QuantileSketch(k=2000)
+    for chunk in np.array_split(values, 37):
+        sketch.update(chunk)
+    assert sketch.n == len(values)
+    assert len(sketch) < 3 * 2000  # memory bound, whatever n is
+    tolerance = 0.025 if distribution == 'discrete' else 0.002  # ties: a rank step is 2% wide
+    assert _rank_error(values, sketch) < tolerance
+
+
+def test_merge_matches_one_sketch():
+    rng = np.random.default_rng(1)
+    parts = [rng.normal(loc, 1, 50_000) for loc in (0, 1, 5)]  # e.g. one sketch per worker
+    merged = QuantileSketch(seed=1)
+    for i, part in enumerate(parts):
+        merged.merge(QuantileSketch(seed=i).update(part))
+    values = np.concatenate(parts)
+    assert merged.n == len(values)
+    assert _rank_error(values, merged) < 0.002
+
+
+def test_small_inputs_are_exact():
+    sketch = QuantileSketch().update([5.0, 1.0, 3.0, np.nan, np.inf])
+    assert sketch.n == 3  # non-finite values are ignored
+    assert sketch.quantile(0.0) == 1.0 and sketch.quantile(0.5) == 3.0 and sketch.quantile(1.0) == 5.0
+    np.testing.assert_array_equal(sketch.quantile([0.0, 1.0]), [1.0, 5.0])
+
+
+def test_errors():
+    with pytest.raises(ValueError, match='empty'):
+        QuantileSketch().quantile(0.5)
+    with pytest.raises(ValueError, match='k='):
+        QuantileSketch(k=100).merge(QuantileSketch(k=200))
+
+
+def test_arrays_round_trip():
+    sketch = QuantileSketch(k=200).update(np.random.default_rng(2).normal(size=10_000))
+    arrays = {name: np.array(value) for name, value in sketch.arrays().items()}
+    for value in arrays.values():
+        value.flags.writeable = False  # as memory-mapped from a bundle
+    rebuilt = QuantileSketch.from_arrays(arrays, sketch.params())
+    assert rebuilt.n == sketch.n and len(rebuilt) == len(sketch)
+    np.testing.assert_array_equal(rebuilt.quantile(QS), sketch.quantile(QS))
+    rebuilt.update(np.zeros(10))  # the copy is writable
+    assert rebuilt.n == sketch.n + 10
@@ -0,0 +1,106 @@
+import json
+
+import numpy as np
+import pytest
+
+from utils.results_store import MANIFEST_FILE, ResultStore, ResultStoreError, ResultWriter, write_results
+
+
+def _columns(n=10, start=0):
+    rng = np.random.default_rng(start)
+    if_score = rng.uniform(-0.2, 0.2, n)
+    ae_error = rng.uniform(0, 1, n)
+    ae_error[::4] = np.nan  # rows the cascade did not send to the autoencoder
+    return {
+        'row_index': np.arange(start, start + n),
+        'if_score': if_score,
+        'if_anomaly': if_score < 0,
+        'ae_error': ae_error,
+        'ae_anomaly': ae_error > 0.8,
+        'anomaly': if_score < 0,
+    }
+
+
+def test_chunked_write_and_paged_query(tmp_path):
+    writer = ResultWriter(tmp_path / 'store')
+    first, second = _columns(6, 0), _columns(4, 6)
+    writer.append(first)
+    writer.append(second)
+    manifest = writer.close({'ensemble_method': 'union'})
+    assert manifest['rows'] == 10
+    assert not (tmp_path / 'store.tmp').exists()
+
+    store = ResultStore(tmp_path / 'store')
+    page = store.query(offset=3, limit=4)
+    assert page['total'] == 10
+    assert [r['row_index'] for r in page['rows']] == [3, 4, 5, 6]
+    assert page['rows'][1]['ae_error'] is None  # NaN -> null
+    assert store.metadata == {'ensemble_method': 'union'}
+
+
+def test_sorting_and_filters(tmp_path):
+    columns = _columns(50)
+    write_results(tmp_path / 'store', columns)
+    store = ResultStore(tmp_path / 'store')
+
+    top = store.top_k(5, by='if_score')['rows']
+    assert [r['row_index'] for r in top] == np.argsort(columns['if_score'])[:5].tolist()
+
+    by_error = store.query(0, 50, sort='ae_error')['rows']
+    errors = [r['ae_error'] for r in by_error]
+    n_scored = int(np.isfinite(columns['ae_error']).sum())
+    assert errors[:n_scored] == sorted(errors[:n_scored], reverse=True)
+    assert errors[n_scored:] == [None] * (50 - n_scored)  # unscored rows last
+
+    flagged = store.query(0, 100, anomalies_only=True)
+    assert flagged['total'] == int(columns['anomaly'].sum())
+    assert all(r['anomaly'] for r in flagged['rows'])
+    with pytest.raises(ResultStoreError, match='Cannot sort'):
+        store.query(sort='anomaly')
+
+
+def test_string_labels_are_stored_as_categories(tmp_path):
+    writer = ResultWriter(tmp_path / 'store')
+    writer.append({**_columns(3, 0), 'label': np.array(['normal', 'dos', 'normal'], dtype=object)})
+    writer.append({**_columns(3, 3), 'label': np.array(['scan', None, 'dos'], dtype=object)})
+    manifest = writer.close()
+    assert manifest['categories'] == {'label': ['normal', 'dos', 'scan']}
+    assert manifest['columns']['label'] == '<i4'
+
+    store = ResultStore(tmp_path / 'store')
+    labels = [r['label'] for r in store.query(0, 10)['rows']]
+    assert labels == ['normal', 'dos', 'normal', 'scan', None, 'dos']
+    json.dumps(store.query(0, 10))
+
+
+def test_numeric_labels_keep_their_dtype(tmp_path):
+    manifest = write_results(tmp_path / 'store', {**_columns(3), 'label': np.array([0, 1, 0])})
+    assert manifest['categories'] == {}
+    assert [r['label'] for r in ResultStore(tmp_path / 'store').query()['rows']] == [0, 1, 0]
+
+
+def test_save_results_with_string_labels(trained, tmp_path):
+    system = trained['system']
+    X = trained['X_test'][:4]
+    results = system.detect_anomalies(X)
+    manifest = system.save_results(results, str(tmp_path / 'store'),
+                                   labels=np.array(['normal', 'dos', 'normal', 'scan'], dtype=object))
+    assert manifest['categories']['label'] == ['normal', 'dos', 'scan']
+
+
+def test_mismatched_chunks_and_bad_stores(tmp_path):
+    writer = ResultWriter(tmp_path / 'store')
+    writer.append(_columns(3))
+    with pytest.raises(ResultStoreError, match='differ'):
+        writer.append({'row_index': np.arange(3)})
+    writer.abort()
+    assert not (tmp_path / 'store.tmp').exists()
+
+    with pytest.raises(ResultStoreError):
+        ResultStore(tmp_path / 'missing')
+    write_results(tmp_path / 'store', _columns(3))
+    manifest = json.loads((tmp_path / 'store' / MANIFEST_FILE).read_text())
+    manifest['version'] = 99
+    (tmp_path / 'store' / MANIFEST_FILE).write_text(json.dumps(manifest))
+    with pytest.raises(ResultStoreError, match='version'):
+        ResultStore(tmp_path / 'store')
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from data.stream import file_source
+
+
+def _tail(path, **kwargs):
+    """Run a file source on a thread; returns (records list, stop event, thread)"""
+    records, stop = [], threading.Event()
+    thread = threading.Thread(target=file_source(str(path), 'csv', poll_interval=0.01, **kwargs),
+                              args=(records.append, stop), daemon=True)
+    thread.start()
+    return records, stop, thread
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_truncation_before_the_header_is_rewritten(tmp_path):
+    path = tmp_path / 'flows.csv'
+    path.write_text('src,bytes\na,1\n')
+    records, stop, thread = _tail(path, from_beginning=True)
+    _wait_for(lambda: len(records) == 1)
+
+    # Rotated in place; the writer takes a moment to put the header back
+    path.write_text('')
+    time.sleep(0.1)
+    with open(path, 'a') as f:
+        f.write('src,bytes\n')
+        f.flush()
+        time.sleep(0.1)
+        f.write('b,2\nc,3\n')
+    _wait_for(lambda: len(records) == 3)
+    stop.set()
+    thread.join(2)
+    assert records == [{'src': 'a', 'bytes': '1'}, {'src': 'b', 'bytes': '2'}, {'src': 'c', 'bytes': '3'}]
+
+
+def test_truncation_keeps_data_when_no_header_is_rewritten(tmp_path):
+    path = tmp_path / 'flows.csv'
+    path.write_text('src,bytes\na,1\n')
+    records, stop, thread = _tail(path, from_beginning=False)
+    time.sleep(0.1)
+    path.write_text('b,2\n')
+    _wait_for(lambda: len(records) == 1)
+    stop.set()
+    thread.join(2)
+    assert records == [{'src': 'b', 'bytes': '2'}]
+
+
+def test_header_written_after_the_follower_starts(tmp_path):
+    path = tmp_path / 'flows.csv'
+    path.write_text('')
+    records, stop, thread = _tail(path, from_beginning=False)
+    time.sleep(0.1)
+    with open(path, 'a') as f:
+        f.write('src,bytes\na,1\n')
+    _wait_for(lambda: len(records) == 1)
+    stop.set()
+    thread.join(2)
+    assert records == [{'src': 'a', 'bytes': '1'}]
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from models.isolation_forest import IsolationForestDetector
+from models.sweep import HyperparameterSweep
+from utils.metrics import DetectionMetrics
+
+MODELS = {
+    'isolation_forest': {'n_estimators': 20, 'contamination': 0.1, 'random_state': 0},
+    'autoencoder': {'epochs': 2, 'batch_size': 128, 'validation_split': 0.2},
+}
+GRID = {
+    'isolation_forest': {'contamination': [0.05, 0.1, 'auto']},
+    'detection': {'threshold_percentile': [90, 99], 'ensemble_method': ['union', 'intersection']},
+}
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X_train = rng.normal(size=(1500, 6))
+    X_test = np.vstack([rng.normal(size=(450, 6)), rng.normal(4, 1, size=(50, 6))])
+    y_test = np.r_[np.zeros(450), np.ones(50)]
+    return X_train, X_test, y_test
+
+
+@pytest.fixture(scope='module')
+def table(data):
+    return HyperparameterSweep(MODELS, {'grid': GRID}, workers=2).run(*data)
+
+
+def test_every_combination_is_ranked(table):
+    assert len(table) == 3 * 2 * 2
+    assert table['rank'].tolist() == list(range(1, 13))
+    assert table['f1_score'].is_monotonic_decreasing
+    assert table.attrs['models_fitted'] == 2
+
+
+def test_forest_flags_match_the_detector(data, table):
+    X_train, X_test, y_test = data
+    metrics = DetectionMetrics()
+    for contamination in (0.05, 0.1, 'auto'):
+        detector = IsolationForestDetector({**MODELS['isolation_forest'], 'contamination': contamination})
+        detector.train(X_train)
+        expected = metrics.calculate_metrics(y_test.astype(bool), detector.predict(X_test)['predictions'] == -1)
+        swept = table[table['if_contamination'].astype(str) == str(contamination)]['if_f1_score']
+        assert swept.nunique() == 1
+        assert swept.iloc[0] == pytest.approx(expected['f1_score'], abs=0.02)
+
+
+def test_rejects_non_binary_labels(data):
+    X_train, X_test, y_test = data
+    with pytest.raises(ValueError, match='0 \\(normal\\) or 1'):
+        HyperparameterSweep(MODELS, {'grid': GRID}).run(X_train, X_test, y_test * 2)
+
+
+def test_unlisted_detection_parameters_keep_the_run_config(data):
+    grid = {'isolation_forest': {'contamination': [0.1]}}
+    detection = {'threshold_percentile': 99, 'ensemble_method': 'intersection', 'min_anomaly_score': 0.1}
+    sweep = HyperparameterSweep(MODELS, {'grid': grid}, workers=1, detection_config=detection)
+    table = sweep.run(*data)
+    assert table[['threshold_percentile', 'ensemble_method']].values.tolist() == [[99, 'intersection']]
+
+    with pytest.raises(ValueError, match="cascade"):
+        HyperparameterSweep(MODELS, {'grid': grid}, detection_config={'ensemble_method': 'cascade'})
+    # Listing the methods in the grid overrides an unsweepable configured one
+    HyperparameterSweep(MODELS, {'grid': GRID}, detection_config={'ensemble_method': 'cascade'})
@@ -0,0 +1,68 @@
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.data_loader import NetworkDataLoader
+from data.synthetic import SyntheticTrafficGenerator, output_format
+
+
+def test_output_format_uses_double_suffix():
+    assert output_format('traffic.csv') == 'csv'
+    assert output_format('traffic.CSV.GZ') == 'csv'
+    assert output_format('traffic.jsonl.gz') == 'jsonl'
+    assert output_format('traffic.parquet') == 'parquet'
+    assert output_format('traffic.json.gz') is None
+    assert output_format('traffic.gz') is None
+
+
+def test_json_gz_is_rejected_not_written_as_csv(tmp_path):
+    generator = SyntheticTrafficGenerator(100)
+    with pytest.raises(ValueError, match='Unsupported output format'):
+        generator.write(str(tmp_path / 'traffic.json.gz'))
+    with pytest.raises(ValueError, match='Cannot gzip'):
+        generator.write(str(tmp_path / 'traffic.gz'), fmt='parquet')
+
+
+@pytest.mark.parametrize('name', ['traffic.csv.gz', 'traffic.jsonl.gz', 'traffic.jsonl'])
+def test_written_file_reads_back(tmp_path, name):
+    generator = SyntheticTrafficGenerator(250, chunk_size=100, seed=7)
+    path = tmp_path / name
+    summary = generator.write(str(path))
+    assert summary['rows'] == 250 and summary['chunks'] == 3
+    if name.startswith('traffic.jsonl'):
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'rt') as f:
+            assert json.loads(f.readline())['protocol'] in ('tcp', 'udp', 'icmp')
+    loaded = NetworkDataLoader({'project_features': False, 'downcast': False}).load_from_file(str(path))
+    expected = generator.frame().reset_index(drop=True)
+    pd.testing.assert_frame_equal(loaded[expected.columns], expected, check_dtype=False)
+
+
+def test_output_does_not_depend_on_workers(tmp_path):
+    generator = SyntheticTrafficGenerator(300, chunk_size=100, seed=3)
+    generator.write(str(tmp_path / 'one.csv'), workers=1)
+    generator.write(str(tmp_path / 'two.csv'), workers=2)
+    assert (tmp_path / 'one.csv').read_bytes() == (tmp_path / 'two.csv').read_bytes()
+
+
+def test_anomaly_rate_and_types():
+    frame = SyntheticTrafficGenerator(1000, anomaly_rate=0.2, anomaly_types={'dos': 1}).frame()
+    assert frame['label'].sum() == 200
+    assert (frame.loc[frame['label'] == 1, 'flag'] == 'S0').all()
+
+
+@pytest.mark.parametrize('weights', [{'dos': 0, 'scan': 0}, {'dos': -1, 'scan': 2}, {'dos': float('nan')}])
+def test_invalid_weights_are_rejected(weights):
+    with pytest.raises(ValueError, match='weights'):
+        SyntheticTrafficGenerator.from_config({'synthetic': {'anomaly_types': weights}})
+
+
+def test_unknown_type_and_rate_are_rejected():
+    with pytest.raises(ValueError, match='Unknown anomaly types'):
+        SyntheticTrafficGenerator(10, anomaly_types={'worm': 1})
+    with pytest.raises(ValueError, match='anomaly_rate'):
+        SyntheticTrafficGenerator(10, anomaly_rate=1.5)
+    assert np.isclose(SyntheticTrafficGenerator(10, anomaly_types={'dos': 1, 'scan': 3}).anomaly_weights[1], 0.75)